@@ -0,0 +1,64 @@
+# app/benchmarks/bench_ann.py
+"""
+Índice ANN (IVF, config/ann.py) x busca exata, em galerias sintéticas.
+
+Uso (a partir de app/):
+    python -m benchmarks.bench_ann --tamanhos 10000,100000,1000000
+
+Para cada tamanho: tempo de construção (treino + escrita), tempo de
+abertura (mmap, o que o startup paga), tempo de montar o índice exato em
+memória a partir das linhas (sem contar o download do banco, ver
+bench_galeria), e recall@1 / latência por nprobe. Não usa o banco; grava
+em --diretorio e apaga no fim.
+"""
+import argparse
+import shutil
+import time
+
+import numpy as np
+
+from config.ann import IndiceANN, avaliar, consultas_de_teste
+from config.galeria import IndiceIdentidade
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latência do índice ANN")
+    parser.add_argument("--tamanhos", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--nprobes", default="1,2,4,8,16,32")
+    parser.add_argument("--diretorio", default="/tmp/bench_indice_ann")
+    parser.add_argument("--sem-exato", action="store_true", help="não monta o índice exato (memória)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    nprobes = [int(p) for p in args.nprobes.split(",")]
+    try:
+        for tamanho in (int(t) for t in args.tamanhos.split(",")):
+            ids = [f"pessoa-{i}" for i in range(tamanho)]
+            vet = rng.standard_normal((tamanho, args.dim), dtype=np.float32)
+            exato_s = float("nan")
+            if not args.sem_exato and tamanho <= 100_000:
+                t0 = time.perf_counter()
+                IndiceIdentidade.de_galeria(zip(ids, vet), dim=args.dim)
+                exato_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            indice = IndiceANN.de_matriz(ids, vet, args.diretorio)
+            construir_s = time.perf_counter() - t0
+            del vet, indice
+            t0 = time.perf_counter()
+            indice = IndiceANN(args.diretorio)
+            abrir_s = time.perf_counter() - t0
+
+            print(f"\n{tamanho} pessoas x {args.dim}: {indice.listas} listas | construir {construir_s:.1f} s | "
+                  f"abrir (mmap) {abrir_s * 1000:.0f} ms | índice exato em memória {exato_s:.2f} s")
+            print(f"{'nprobe':>7}{'recall@1':>10}{'ann_p50_ms':>12}{'ann_p99_ms':>12}{'exato_p50_ms':>14}")
+            for r in avaliar(indice, consultas_de_teste(indice, args.consultas), nprobes):
+                print(f"{r['nprobe']:>7}{r['recall_1']:>10.3f}{r['ann_ms_p50']:>12.2f}"
+                      f"{r['ann_ms_p99']:>12.2f}{r['exato_ms_p50']:>14.2f}")
+            del indice
+    finally:
+        shutil.rmtree(args.diretorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# app/benchmarks/bench_compacto.py
+"""
+Tamanho e velocidade de varredura: leituras_emocionais (REAL/VARCHAR) x
+leituras_compactas (SMALLINT em centésimos + códigos), sobre um mês sintético.
+
+Uso (a partir de app/):
+    python -m benchmarks.bench_compacto --pessoas 10 --dias 30
+
+Uma leitura a cada 10 s por pessoa (~8.600/dia). As duas tabelas recebem os
+mesmos valores: a compacta é preenchida a partir da bruta com a mesma
+codificação de config/compacto.py. Consultas medidas: agregado do mês
+inteiro (médias + contagem por dominante) na bruta, na compacta pela view
+decodificada e na compacta direto pelos códigos. Tabelas descartadas no fim.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from config.compacto import COLUNAS_PERCENTUAIS, ESCALA
+from config.conexao import conexao
+from config.database import ensure_tables
+from config.leitura import COLUNAS_LEITURA, PERMITIDAS
+
+BRUTA = "bench_leituras_bruta"
+COMPACTA = "bench_leituras_compacta"
+VIEW = "bench_vw_compacta"
+EMOCOES = ("raiva", "desgosto", "medo", "feliz", "triste", "surpresa", "neutro")
+
+
+def _sem_timeout(cur):
+    cur.execute("SET LOCAL statement_timeout = 0")
+
+def preparar(pessoas: int, dias: int, passo_s: int) -> int:
+    fim = datetime.now().replace(microsecond=0)
+    inicio = fim - timedelta(days=dias)
+    por_pessoa = dias * 86400 // passo_s
+    dominantes = "ARRAY[" + ", ".join(f"'{d}'" for d in sorted(PERMITIDAS)) + "]"
+    decod = {c: f"(c.{c}::real / {ESCALA})::real" for c in COLUNAS_PERCENTUAIS}
+    decod.update(emocao_dominante="e.nome", camera_status="sc.nome", face_status="sf.nome")
+    cols = ["id", *COLUNAS_LEITURA, "inserido_em"]
+    with conexao() as conn, conn.cursor() as cur:
+        _sem_timeout(cur)
+        cur.execute(f"DROP VIEW IF EXISTS {VIEW}")
+        cur.execute(f"DROP TABLE IF EXISTS {BRUTA}, {COMPACTA}")
+        cur.execute(f"CREATE TABLE {BRUTA} (LIKE leituras_emocionais INCLUDING DEFAULTS)")
+        cur.execute(f"CREATE TABLE {COMPACTA} (LIKE leituras_compactas INCLUDING DEFAULTS)")
+        for s in ("ok", "ausente", "economia", "outra_pessoa"):
+            cur.execute("INSERT INTO status_codigo (nome) VALUES (%s) ON CONFLICT DO NOTHING", (s,))
+        cur.execute(f"""
+            INSERT INTO {BRUTA} (pessoa_id, data_captura, raiva, desgosto, medo, feliz, triste, surpresa, neutro,
+                                 emocao_dominante, cpu, memoria, disco, camera_status, face_status,
+                                 mesma_pessoa, qualidade, brilho, face_distance, perfil_energia, leitura_uuid)
+            SELECT 'pessoa-' || p, %(inicio)s + n * %(passo)s * interval '1 second',
+                   random() * 20, random() * 10, random() * 20, random() * 100, random() * 40,
+                   random() * 15, random() * 100,
+                   ({dominantes})[1 + floor(random() * {len(PERMITIDAS)})::int],
+                   random() * 100, 40 + random() * 30, 60, 'ok',
+                   (ARRAY['ok', 'ok', 'ok', 'ausente', 'outra_pessoa'])[1 + floor(random() * 5)::int],
+                   true, 100 + random() * 50, 80 + random() * 40, random() * 0.4, 'tomada', gen_random_uuid()
+              FROM generate_series(0, %(n)s - 1) n, generate_series(1, %(pessoas)s) p
+             ORDER BY 2
+        """, {"inicio": inicio, "passo": passo_s, "n": por_pessoa, "pessoas": pessoas})
+        total = cur.rowcount
+        colunas = ", ".join(COLUNAS_LEITURA)
+        valores = ", ".join(
+            f"round({c} * {ESCALA})::smallint" if c in COLUNAS_PERCENTUAIS
+            else "e.codigo" if c == "emocao_dominante"
+            else "sc.codigo" if c == "camera_status"
+            else "sf.codigo" if c == "face_status"
+            else f"b.{c}"
+            for c in COLUNAS_LEITURA
+        )
+        cur.execute(f"""
+            INSERT INTO {COMPACTA} ({colunas}, inserido_em)
+            SELECT {valores}, b.inserido_em
+              FROM {BRUTA} b
+              LEFT JOIN emocao_codigo e  ON e.nome  = b.emocao_dominante
+              LEFT JOIN status_codigo sc ON sc.nome = b.camera_status
+              LEFT JOIN status_codigo sf ON sf.nome = b.face_status
+             ORDER BY b.id
+        """)
+        cur.execute(f"""
+            CREATE VIEW {VIEW} AS
+            SELECT {", ".join(f"{decod.get(c, f'c.{c}')} AS {c}" for c in cols)}
+              FROM {COMPACTA} c
+              LEFT JOIN emocao_codigo e  ON e.codigo  = c.emocao_dominante
+              LEFT JOIN status_codigo sc ON sc.codigo = c.camera_status
+              LEFT JOIN status_codigo sf ON sf.codigo = c.face_status
+        """)
+    # VACUUM não roda dentro de transação
+    with conexao() as conn:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET statement_timeout = 0")
+                cur.execute(f"VACUUM ANALYZE {BRUTA}")
+                cur.execute(f"VACUUM ANALYZE {COMPACTA}")
+                cur.execute("RESET statement_timeout")
+        finally:
+            conn.autocommit = False
+    return total
+
+def _tamanhos(tabela: str):
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_relation_size(%s), pg_total_relation_size(%s)", (tabela, tabela))
+        heap, total = cur.fetchone()
+        cur.execute(f"SELECT avg(pg_column_size(t.*)) FROM (SELECT * FROM {tabela} LIMIT 10000) t")
+        return heap / 1e6, total / 1e6, float(cur.fetchone()[0])
+
+def medir(sql: str, repeticoes: int = 5) -> float:
+    """Melhor tempo (ms) da consulta; a primeira execução aquece o cache."""
+    melhor = float("inf")
+    with conexao() as conn, conn.cursor() as cur:
+        _sem_timeout(cur)
+        cur.execute(sql)
+        cur.fetchall()
+        for _ in range(repeticoes):
+            t0 = time.perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            melhor = min(melhor, (time.perf_counter() - t0) * 1000)
+    return melhor
+
+def consultas():
+    medias = ", ".join(f"AVG({e})" for e in EMOCOES)
+    medias_cod = ", ".join(f"AVG({e}) / {ESCALA}" for e in EMOCOES)
+    return [
+        ("bruta", f"SELECT {medias}, AVG(cpu), COUNT(*) FROM {BRUTA}",
+                  f"SELECT emocao_dominante, COUNT(*) FROM {BRUTA} GROUP BY 1"),
+        ("compacta (view)", f"SELECT {medias}, AVG(cpu), COUNT(*) FROM {VIEW}",
+                            f"SELECT emocao_dominante, COUNT(*) FROM {VIEW} GROUP BY 1"),
+        ("compacta (códigos)", f"SELECT {medias_cod}, AVG(cpu) / {ESCALA}, COUNT(*) FROM {COMPACTA}",
+                               f"SELECT e.nome, q.n FROM (SELECT emocao_dominante, COUNT(*) n FROM {COMPACTA} "
+                               f"GROUP BY 1) q JOIN emocao_codigo e ON e.codigo = q.emocao_dominante"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamanho/varredura: armazenamento bruto x compacto")
+    parser.add_argument("--pessoas", type=int, default=10)
+    parser.add_argument("--dias", type=int, default=30)
+    parser.add_argument("--passo-s", type=int, default=10, help="segundos entre leituras de uma pessoa")
+    parser.add_argument("--manter", action="store_true")
+    args = parser.parse_args()
+
+    ensure_tables()
+    try:
+        total = preparar(args.pessoas, args.dias, args.passo_s)
+        print(f"{total:,} leituras ({args.pessoas} pessoas, {args.dias} dias)\n")
+        print(f"{'tabela':<22}{'heap_MB':>10}{'total_MB':>10}{'B/linha':>9}")
+        for nome, t in (("bruta", BRUTA), ("compacta", COMPACTA)):
+            heap, tot, linha = _tamanhos(t)
+            print(f"{nome:<22}{heap:>10.1f}{tot:>10.1f}{linha:>9.1f}")
+        print(f"\n{'varredura do mês':<22}{'medias_ms':>11}{'dominantes_ms':>15}")
+        for nome, q_medias, q_dom in consultas():
+            print(f"{nome:<22}{medir(q_medias):>11.1f}{medir(q_dom):>15.1f}")
+    finally:
+        if not args.manter:
+            with conexao() as conn, conn.cursor() as cur:
+                cur.execute(f"DROP VIEW IF EXISTS {VIEW}")
+                cur.execute(f"DROP TABLE IF EXISTS {BRUTA}, {COMPACTA}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# app/benchmarks/bench_escrita.py
+"""
+INSERT linha a linha (1 commit por leitura) x lote com execute_values x COPY.
+
+Uso (a partir de app/):
+    python -m benchmarks.bench_escrita --linhas 20000 --lote 500 --clientes 5000
+
+Grava numa tabela temporária `bench_leituras` (mesmas colunas de
+leituras_emocionais), descartada no fim.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from config.conexao import conexao
+from config.database import ensure_tables, inserir_leituras, linha_leitura
+
+TABELA = "bench_leituras"
+EMOCOES = ["feliz", "triste", "medo", "raiva", "desgosto", "surpresa", "neutro"]
+
+
+def gerar_linhas(n: int, clientes: int):
+    inicio = datetime.now() - timedelta(seconds=n)
+    out = []
+    for i in range(n):
+        emo = {e: random.random() * 100 for e in EMOCOES} if random.random() > 0.2 else None
+        meta = {"camera_status": "ok", "face_status": "ok" if emo else "ausente",
+                "mesma_pessoa": bool(emo), "qualidade": 120.0, "brilho": 90.0, "face_distance": 0.12}
+        rec = {"cpu": random.random() * 100, "mem": 55.0, "disk": 70.0}
+        out.append(linha_leitura(emo, rec, inicio + timedelta(seconds=i), f"pessoa-{i % clientes}", meta))
+    return out
+
+
+def _preparar():
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {TABELA}")
+        cur.execute(f"CREATE UNLOGGED TABLE {TABELA} (LIKE leituras_emocionais INCLUDING DEFAULTS)")
+
+def _limpar():
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {TABELA}")
+
+
+def por_linha(linhas):
+    """Caminho antigo: uma transação (e um commit) por leitura."""
+    for linha in linhas:
+        inserir_leituras([linha], "values", tabela=TABELA)
+
+def em_lote(linhas, metodo: str, lote: int):
+    for i in range(0, len(linhas), lote):
+        inserir_leituras(linhas[i:i + lote], metodo, tabela=TABELA)
+
+
+def medir(nome, fn, n, commits, clientes):
+    _limpar()
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    taxa = n / dt if dt else float("inf")
+    # frota de `clientes` agentes a cada 10 s -> clientes/10 leituras/s
+    demanda = clientes / 10.0
+    print(f"{nome:<22}{n:>10}{commits:>10}{dt:>10.2f}{taxa:>14.0f}{100.0 * demanda / taxa:>14.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de gravação de leituras")
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--lote", type=int, default=500)
+    parser.add_argument("--clientes", type=int, default=5000, help="tamanho da frota (uma leitura a cada 10 s)")
+    parser.add_argument("--sem-por-linha", action="store_true", help="pula o caminho linha a linha (lento)")
+    args = parser.parse_args()
+
+    ensure_tables()
+    _preparar()
+    linhas = gerar_linhas(args.linhas, args.clientes)
+    lotes = -(-args.linhas // args.lote)
+    print(f"frota={args.clientes} clientes -> {args.clientes / 10.0:.0f} leituras/s de demanda")
+    print(f"{'metodo':<22}{'linhas':>10}{'commits':>10}{'seg':>10}{'linhas/s':>14}{'ocupacao':>15}")
+    try:
+        if not args.sem_por_linha:
+            medir("insert_por_linha", lambda: por_linha(linhas), args.linhas, args.linhas, args.clientes)
+        medir(f"execute_values[{args.lote}]", lambda: em_lote(linhas, "values", args.lote), args.linhas, lotes, args.clientes)
+        medir(f"copy[{args.lote}]", lambda: em_lote(linhas, "copy", args.lote), args.linhas, lotes, args.clientes)
+    finally:
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {TABELA}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# app/benchmarks/bench_galeria.py
+"""
+Carga da galeria inteira de embeddings: JSONB (formato antigo) x BYTEA
+float32 x BYTEA float16 (np.frombuffer).
+
+Uso (a partir de app/):
+    python -m benchmarks.bench_galeria --pessoas 10000 --dim 512
+
+Cria tabelas temporárias `bench_pessoas_*`, descartadas no fim.
+"""
+import argparse
+import time
+
+import numpy as np
+from psycopg2.extras import Json, execute_values
+
+from config.conexao import conexao
+from config.database import embedding_para_bytes, embedding_de_bytes
+
+FORMATOS = ("jsonb", "float32", "float16")
+
+
+def _tabela(fmt: str) -> str:
+    return f"bench_pessoas_{fmt}"
+
+def _preparar(embs: np.ndarray):
+    ids = [f"pessoa-{i}" for i in range(len(embs))]
+    with conexao() as conn, conn.cursor() as cur:
+        for fmt in FORMATOS:
+            tipo = "JSONB" if fmt == "jsonb" else "BYTEA"
+            cur.execute(f"DROP TABLE IF EXISTS {_tabela(fmt)}")
+            cur.execute(f"CREATE TABLE {_tabela(fmt)} (pessoa_id VARCHAR(64) PRIMARY KEY, embedding {tipo})")
+            if fmt == "jsonb":
+                valores = [(pid, Json(e.tolist())) for pid, e in zip(ids, embs)]
+            else:
+                valores = [(pid, embedding_para_bytes(e, fmt)) for pid, e in zip(ids, embs)]
+            execute_values(cur, f"INSERT INTO {_tabela(fmt)} VALUES %s", valores, page_size=1000)
+            cur.execute(f"ANALYZE {_tabela(fmt)}")
+
+def _tamanho_mb(fmt: str) -> float:
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_total_relation_size(%s)", (_tabela(fmt),))
+        return cur.fetchone()[0] / 1e6
+
+def carregar(fmt: str):
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"SELECT pessoa_id, embedding FROM {_tabela(fmt)}")
+        rows = cur.fetchall()
+    if fmt == "jsonb":
+        return [(pid, np.array(e, dtype="float32")) for pid, e in rows]
+    return [(pid, embedding_de_bytes(e, fmt)) for pid, e in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga da galeria de embeddings")
+    parser.add_argument("--pessoas", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    embs = np.random.default_rng(0).standard_normal((args.pessoas, args.dim)).astype("float32")
+    _preparar(embs)
+    print(f"{args.pessoas} pessoas x {args.dim} dims")
+    print(f"{'formato':<10}{'tamanho_mb':>12}{'carga_s':>10}{'pessoas/s':>12}{'erro_max':>12}")
+    try:
+        for fmt in FORMATOS:
+            melhor = float("inf")
+            for _ in range(args.repeticoes):
+                t0 = time.perf_counter()
+                galeria = carregar(fmt)
+                melhor = min(melhor, time.perf_counter() - t0)
+            erro = max(float(np.abs(e - embs[int(pid.split("-")[1])]).max()) for pid, e in galeria)
+            print(f"{fmt:<10}{_tamanho_mb(fmt):>12.1f}{melhor:>10.3f}{args.pessoas / melhor:>12.0f}{erro:>12.2e}")
+    finally:
+        with conexao() as conn, conn.cursor() as cur:
+            for fmt in FORMATOS:
+                cur.execute(f"DROP TABLE IF EXISTS {_tabela(fmt)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# app/benchmarks/bench_identidade.py
+"""
+Match de identidade em memória: laço por pessoa (o antigo
+_match_db_by_embedding: astype + duas normas + produto por linha) x
+IndiceIdentidade (matriz normalizada, um produto matriz-vetor).
+
+Uso (a partir de app/):
+    python -m benchmarks.bench_identidade --tamanhos 100,1000,10000,100000,1000000
+
+Não usa o banco. Memória: ~2 x tamanho x dim x 4 bytes no pico (galeria
+bruta + índice), 4 GB para 1M x 512. O laço é lento em galerias grandes: acima de
+--max-laco as consultas dele são limitadas a --consultas-laco.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from config.galeria import IndiceIdentidade
+
+
+def match_laco(candidatos, emb_now, limiar):
+    """Cópia do laço antigo de config/identity.py."""
+    best_id, best_dist = None, 1e9
+    for pid, emb in candidatos:
+        a = emb.astype("float32")
+        b = emb_now.astype("float32")
+        na = np.linalg.norm(a) + 1e-8
+        nb = np.linalg.norm(b) + 1e-8
+        dist = float(1.0 - (a @ b) / (na * nb))
+        if dist < best_dist:
+            best_dist, best_id = dist, pid
+    if best_id is not None and best_dist <= limiar:
+        return best_id, best_dist
+    return None
+
+def _consultas(galeria: np.ndarray, n: int, rng) -> np.ndarray:
+    """Versões ruidosas de pessoas da galeria (metade) e rostos novos (metade)."""
+    alvos = galeria[rng.integers(0, len(galeria), n)]
+    ruido = rng.standard_normal(alvos.shape).astype("float32") * 0.3 * alvos.std()
+    q = alvos + ruido
+    q[n // 2:] = rng.standard_normal(q[n // 2:].shape)
+    return q
+
+def _ms_por_consulta(fn, consultas) -> float:
+    t0 = time.perf_counter()
+    for q in consultas:
+        fn(q)
+    return (time.perf_counter() - t0) * 1000 / len(consultas)
+
+def medir(tamanho: int, dim: int, consultas: int, consultas_laco: int, limiar: float, rng):
+    galeria = rng.standard_normal((tamanho, dim), dtype=np.float32)
+    ids = [f"pessoa-{i}" for i in range(tamanho)]
+    qs = _consultas(galeria, consultas, rng)
+
+    candidatos = list(zip(ids, galeria))   # views: sem cópia
+    qs_laco = qs[:consultas_laco]
+    laco_ms = _ms_por_consulta(lambda q: match_laco(candidatos, q, limiar), qs_laco)
+    vereditos_laco = [match_laco(candidatos, q, limiar) for q in qs_laco]
+
+    novos = rng.standard_normal((min(1000, tamanho), dim), dtype=np.float32)
+    t0 = time.perf_counter()
+    indice = IndiceIdentidade.de_galeria(candidatos, dim=dim, folga=len(novos))
+    carga_s = time.perf_counter() - t0
+    del candidatos, galeria   # 1M x 512: não cabem três cópias
+
+    indice_ms = _ms_por_consulta(lambda q: indice.melhor(q, limiar), qs)
+    topk_ms = _ms_por_consulta(lambda q: indice.top_k(q, 5), qs)
+    # mesmo veredito (mesmo pessoa_id ou ambos sem match) nas consultas do laço
+    pid = lambda hit: hit[0] if hit else None
+    iguais = sum(pid(v) == pid(indice.melhor(q, limiar)) for v, q in zip(vereditos_laco, qs_laco))
+
+    t0 = time.perf_counter()
+    for i, e in enumerate(novos):
+        indice.adicionar(f"novo-{i}", e)
+    add_us = (time.perf_counter() - t0) * 1e6 / len(novos)
+    t0 = time.perf_counter()
+    for i, e in enumerate(novos):
+        indice.adicionar(ids[i], e)
+    upd_us = (time.perf_counter() - t0) * 1e6 / len(novos)
+    t0 = time.perf_counter()
+    for i in range(len(novos)):
+        indice.remover(ids[i])
+    rem_us = (time.perf_counter() - t0) * 1e6 / len(novos)
+    return carga_s, laco_ms, indice_ms, topk_ms, iguais / len(qs_laco), add_us, upd_us, rem_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match de identidade: laço x índice vetorizado")
+    parser.add_argument("--tamanhos", default="100,1000,10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--consultas", type=int, default=50)
+    parser.add_argument("--max-laco", type=int, default=100000)
+    parser.add_argument("--consultas-laco", type=int, default=3)
+    parser.add_argument("--limiar", type=float, default=0.30)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"dim={args.dim}, {args.consultas} consultas (metade de quem está na galeria)")
+    print(f"{'pessoas':>9}{'carga_s':>9}{'laco_ms':>10}{'indice_ms':>11}{'top5_ms':>9}{'speedup':>9}"
+          f"{'mesmo_pid':>10}{'add_us':>8}{'upd_us':>8}{'rem_us':>8}")
+    for tamanho in (int(t) for t in args.tamanhos.split(",")):
+        n_laco = args.consultas if tamanho <= args.max_laco else args.consultas_laco
+        carga, laco, ind, topk, iguais, add, upd, rem = medir(tamanho, args.dim, args.consultas,
+                                                              n_laco, args.limiar, rng)
+        print(f"{tamanho:>9}{carga:>9.2f}{laco:>10.2f}{ind:>11.3f}{topk:>9.3f}{laco / ind:>8.0f}x"
+              f"{iguais:>10.0%}{add:>8.1f}{upd:>8.1f}{rem:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# app/benchmarks/bench_indices.py
+"""
+EXPLAIN ANALYZE das consultas de relatório/painel sobre leituras sintéticas,
+sem e com o conjunto de índices de config/indices.py.
+
+Uso (a partir de app/):
+    python -m benchmarks.bench_indices --linhas 10000000 --clientes 40 --dias 60
+
+Carrega tudo no servidor (generate_series) numa tabela `bench_leituras_idx`
+particionada por mês como a de produção, em ordem de data_captura (como
+chegam as leituras reais). A tabela é descartada no fim (--manter para não).
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from config.conexao import conexao
+from config.database import ensure_tables
+from config.indices import garantir_indices, remover_indices
+from config.leitura import PERMITIDAS
+from config.particoes import inicio_periodo, proximo_periodo
+
+TABELA = "bench_leituras_idx"
+
+# (nome, SQL) — %(fim)s = fim dos dados sintéticos, %(pessoa)s = uma pessoa
+CONSULTAS = [
+    ("relatorio_kpis_24h", f"""
+        SELECT AVG(feliz), AVG(triste), AVG(medo), AVG(raiva), AVG(desgosto), AVG(surpresa), AVG(neutro), COUNT(*)
+          FROM {TABELA}
+         WHERE data_captura BETWEEN %(fim)s - interval '24 hours' AND %(fim)s"""),
+    ("relatorio_top_dominantes_24h", f"""
+        SELECT emocao_dominante, COUNT(*) qtd
+          FROM {TABELA}
+         WHERE data_captura BETWEEN %(fim)s - interval '24 hours' AND %(fim)s
+         GROUP BY emocao_dominante ORDER BY qtd DESC LIMIT 5"""),
+    ("painel_pessoa_7d_por_hora", f"""
+        SELECT date_trunc('hour', data_captura) h, AVG(feliz), AVG(triste), AVG(cpu)
+          FROM {TABELA}
+         WHERE pessoa_id = %(pessoa)s AND data_captura >= %(fim)s - interval '7 days'
+         GROUP BY 1 ORDER BY 1"""),
+    ("ultimas_50_da_pessoa", f"""
+        SELECT * FROM {TABELA}
+         WHERE pessoa_id = %(pessoa)s
+         ORDER BY data_captura DESC LIMIT 50"""),
+    ("painel_todas_1h", f"""
+        SELECT pessoa_id, COUNT(*), AVG(feliz)
+          FROM {TABELA}
+         WHERE data_captura >= %(fim)s - interval '1 hour'
+         GROUP BY pessoa_id"""),
+]
+
+
+def _sem_timeout(cur):
+    # o pool aplica statement_timeout curto; carga e índices aqui levam minutos
+    cur.execute("SET LOCAL statement_timeout = 0")
+
+def preparar(linhas: int, clientes: int, dias: int, fim: datetime) -> None:
+    inicio = fim - timedelta(days=dias)
+    with conexao() as conn, conn.cursor() as cur:
+        _sem_timeout(cur)
+        cur.execute(f"DROP TABLE IF EXISTS {TABELA}")
+        cur.execute(f"""
+            CREATE TABLE {TABELA} (LIKE leituras_emocionais INCLUDING DEFAULTS)
+              PARTITION BY RANGE (data_captura)
+        """)
+        p = inicio_periodo(inicio, "mes")
+        while p <= fim:
+            prox = proximo_periodo(p, "mes")
+            cur.execute(f"CREATE TABLE {TABELA}_p{p:%Y_%m} PARTITION OF {TABELA} FOR VALUES FROM (%s) TO (%s)",
+                        (p, prox))
+            p = prox
+    passo_s = dias * 86400.0 * clientes / linhas
+    dominantes = "ARRAY[" + ", ".join(f"'{d}'" for d in sorted(PERMITIDAS)) + "]"
+    lote = 1_000_000
+    t0 = time.perf_counter()
+    for ini in range(0, linhas, lote):
+        with conexao() as conn, conn.cursor() as cur:
+            _sem_timeout(cur)
+            cur.execute(f"""
+                INSERT INTO {TABELA} (pessoa_id, data_captura, raiva, desgosto, medo, feliz, triste, surpresa, neutro,
+                                      emocao_dominante, cpu, memoria, disco, camera_status, face_status)
+                SELECT 'pessoa-' || (g %% %(clientes)s),
+                       %(inicio)s + (g / %(clientes)s) * %(passo)s * interval '1 second',
+                       random() * 20, random() * 10, random() * 20, random() * 100, random() * 40,
+                       random() * 15, random() * 100,
+                       ({dominantes})[1 + floor(random() * {len(PERMITIDAS)})::int],
+                       random() * 100, 40 + random() * 30, 60, 'ok', 'ok'
+                  FROM generate_series(%(ini)s, %(fim_g)s) g
+            """, {"clientes": clientes, "inicio": inicio, "passo": passo_s,
+                  "ini": ini, "fim_g": min(ini + lote, linhas) - 1})
+        print(f"  carregadas {min(ini + lote, linhas):,} linhas ({time.perf_counter() - t0:.0f}s)", flush=True)
+    with conexao() as conn, conn.cursor() as cur:
+        _sem_timeout(cur)
+        cur.execute(f"ANALYZE {TABELA}")
+
+def explicar(sql: str, params: dict, repeticoes: int = 3) -> dict:
+    """Melhor tempo de execução (ms) em `repeticoes` EXPLAIN ANALYZE + nó do plano."""
+    melhor = None
+    with conexao() as conn, conn.cursor() as cur:
+        _sem_timeout(cur)
+        for _ in range(repeticoes):
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+            plano = cur.fetchone()[0]
+            plano = plano[0] if isinstance(plano, list) else json.loads(plano)[0]
+            if melhor is None or plano["Execution Time"] < melhor["Execution Time"]:
+                melhor = plano
+    return {"ms": melhor["Execution Time"], "plano": _resumo_plano(melhor["Plan"])}
+
+def _resumo_plano(no: dict) -> str:
+    """Nós de varredura do plano (ex.: 'Index Scan x3, Bitmap Heap Scan')."""
+    achados = []
+    def visitar(n):
+        if "Scan" in n["Node Type"]:
+            achados.append(n["Node Type"])
+        for filho in n.get("Plans", []):
+            visitar(filho)
+    visitar(no)
+    cont = {t: achados.count(t) for t in dict.fromkeys(achados)}
+    return ", ".join(f"{t} x{c}" if c > 1 else t for t, c in cont.items())
+
+def medir_todas(params: dict) -> dict:
+    return {nome: explicar(sql, params) for nome, sql in CONSULTAS}
+
+def _tamanhos() -> dict:
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT i.relname, SUM(pg_relation_size(c.oid))::bigint
+              FROM pg_class i
+              JOIN pg_inherits h ON h.inhparent = i.oid
+              JOIN pg_class c ON c.oid = h.inhrelid
+             WHERE i.relkind = 'I' AND i.relname LIKE %s
+             GROUP BY i.relname
+        """, (f"%{TABELA}",))
+        return {nome: tam / 1e6 for nome, tam in cur.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE com/sem índices nas leituras")
+    parser.add_argument("--linhas", type=int, default=10_000_000)
+    parser.add_argument("--clientes", type=int, default=40)
+    parser.add_argument("--dias", type=int, default=60)
+    parser.add_argument("--manter", action="store_true", help="não descarta a tabela no fim")
+    args = parser.parse_args()
+
+    ensure_tables()
+    fim = datetime.now().replace(microsecond=0)
+    params = {"fim": fim, "pessoa": "pessoa-7"}
+    print(f"carregando {args.linhas:,} leituras ({args.clientes} pessoas, {args.dias} dias)...")
+    preparar(args.linhas, args.clientes, args.dias, fim)
+    try:
+        with conexao() as conn, conn.cursor() as cur:
+            remover_indices(cur, TABELA)
+        sem = medir_todas(params)
+        t0 = time.perf_counter()
+        with conexao() as conn, conn.cursor() as cur:
+            _sem_timeout(cur)
+            garantir_indices(cur, TABELA)
+            cur.execute(f"ANALYZE {TABELA}")
+        criacao = time.perf_counter() - t0
+        com = medir_todas(params)
+
+        print(f"\níndices criados em {criacao:.1f}s: " +
+              ", ".join(f"{n} {mb:.1f} MB" for n, mb in _tamanhos().items()))
+        print(f"{'consulta':<30}{'sem_ms':>11}{'com_ms':>11}{'ganho':>9}  plano (com índices)")
+        for nome, _ in CONSULTAS:
+            a, b = sem[nome]["ms"], com[nome]["ms"]
+            print(f"{nome:<30}{a:>11.2f}{b:>11.2f}{a / b if b else float('inf'):>8.1f}x  {com[nome]['plano']}")
+    finally:
+        if not args.manter:
+            with conexao() as conn, conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {TABELA}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# app/benchmarks/bench_leitura.py
+"""
+Custo por leitura no cliente e no servidor: caminho antigo (tupla montada
+com dict.get + texto do INSERT refeito a cada chamada + parse/plan no
+servidor) x Leitura com __slots__ + INSERT preparado (EXECUTE).
+
+Uso (a partir de app/):
+    python -m benchmarks.bench_leitura --leituras 5000
+
+Grava numa tabela `bench_leituras_prep` (mesmas colunas de
+leituras_emocionais), descartada no fim.
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime
+
+from psycopg2.extras import Json, execute_batch, execute_values
+
+from config.conexao import conexao
+from config.database import ensure_tables, inserir_leituras
+from config.leitura import COLUNAS_LEITURA, Leitura, normalizar_dominante as _normalizar_dominante
+
+TABELA = "bench_leituras_prep"
+EMOCOES = {"feliz": 61.0, "neutro": 30.0, "triste": 9.0}
+RECURSOS = {"cpu": 12.0, "mem": 55.0, "disk": 70.0}
+META = {"camera_status": "ok", "face_status": "ok", "mesma_pessoa": True, "qualidade": 120.0,
+        "brilho": 90.0, "face_distance": 0.12, "perfil_energia": "tomada", "latencias": {"grab": 31.0}}
+
+
+def linha_antiga(emocoes, recursos, data_captura, pessoa_id, meta):
+    """Reprodução do salvar_em_banco anterior: dict.get coluna a coluna + SQL montado por chamada."""
+    meta = meta or {}
+    emo = emocoes or {}
+    sql = f"INSERT INTO {TABELA} ({', '.join(COLUNAS_LEITURA)}) VALUES %s"
+    return sql, (
+        pessoa_id, data_captura,
+        emo.get("raiva", 0), emo.get("desgosto", 0), emo.get("medo", 0), emo.get("feliz", 0),
+        emo.get("triste", 0), emo.get("surpresa", 0), emo.get("neutro", 0),
+        _normalizar_dominante(emocoes),
+        recursos.get("cpu", 0), recursos.get("mem", 0), recursos.get("disk", 0),
+        meta.get("camera_status", "ok"), meta.get("face_status", "ok"), meta.get("mesma_pessoa", None),
+        meta.get("qualidade", None), meta.get("brilho", None), meta.get("face_distance", None),
+        meta.get("perfil_energia", None), meta.get("perfil_transicao", None),
+        Json(meta["latencias"]) if meta.get("latencias") is not None else None,
+        meta.get("leitura_uuid") or str(uuid.uuid4()),
+        meta.get("identidade_idade_s", None),
+    )
+
+
+def _us(dt: float, n: int) -> float:
+    return dt / n * 1e6
+
+def medir_cliente(n: int):
+    agora = datetime.now()
+    t0 = time.perf_counter()
+    for i in range(n):
+        linha_antiga(EMOCOES, RECURSOS, agora, "pessoa-1", META)
+    antes = _us(time.perf_counter() - t0, n)
+    t0 = time.perf_counter()
+    for i in range(n):
+        Leitura("pessoa-1", agora, EMOCOES, RECURSOS, META).como_tupla()
+    depois = _us(time.perf_counter() - t0, n)
+    return antes, depois
+
+def medir_servidor(n: int):
+    """Uma leitura por INSERT, todas na mesma conexão (o pool reaproveita a conexão)."""
+    agora = datetime.now()
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {TABELA}")
+        t0 = time.perf_counter()
+        for i in range(n):
+            sql, linha = linha_antiga(EMOCOES, RECURSOS, agora, "pessoa-1", META)
+            execute_values(cur, sql, [linha])
+        antes = _us(time.perf_counter() - t0, n)
+        cur.execute(f"TRUNCATE {TABELA}")
+        t0 = time.perf_counter()
+        for i in range(n):
+            inserir_leituras([Leitura("pessoa-1", agora, EMOCOES, RECURSOS, META).como_tupla()],
+                             "preparado", cur=cur, tabela=TABELA)
+        depois = _us(time.perf_counter() - t0, n)
+    return antes, depois
+
+def medir_servidor_lote(n: int, lote: int = 100):
+    """
+    `lote` leituras por ida e volta (execute_batch): dilui a latência de rede e
+    deixa aparecer o custo de parse/plan no servidor, que o PREPARE elimina.
+    """
+    agora = datetime.now()
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {TABELA}")
+        t0 = time.perf_counter()
+        sql = f"INSERT INTO {TABELA} ({', '.join(COLUNAS_LEITURA)}) VALUES ({', '.join(['%s'] * len(COLUNAS_LEITURA))})"
+        for i in range(0, n, lote):
+            linhas = [linha_antiga(EMOCOES, RECURSOS, agora, "pessoa-1", META)[1] for _ in range(lote)]
+            execute_batch(cur, sql, linhas, page_size=lote)
+        antes = _us(time.perf_counter() - t0, n)
+        cur.execute(f"TRUNCATE {TABELA}")
+        t0 = time.perf_counter()
+        for i in range(0, n, lote):
+            linhas = [Leitura("pessoa-1", agora, EMOCOES, RECURSOS, META).como_tupla() for _ in range(lote)]
+            inserir_leituras(linhas, "preparado", cur=cur, tabela=TABELA)
+        depois = _us(time.perf_counter() - t0, n)
+    return antes, depois
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark do caminho de gravação de uma leitura")
+    parser.add_argument("--leituras", type=int, default=5000)
+    args = parser.parse_args()
+
+    ensure_tables()
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {TABELA}")
+        cur.execute(f"CREATE UNLOGGED TABLE {TABELA} (LIKE leituras_emocionais INCLUDING DEFAULTS)")
+    try:
+        c_antes, c_depois = medir_cliente(args.leituras * 10)
+        s_antes, s_depois = medir_servidor(args.leituras)
+        l_antes, l_depois = medir_servidor_lote(args.leituras * 4)
+        print(f"{'etapa':<34}{'antes_us':>12}{'depois_us':>12}")
+        print(f"{'cliente (montar linha + SQL)':<34}{c_antes:>12.1f}{c_depois:>12.1f}")
+        print(f"{'INSERT ida e volta (cli+srv)':<34}{s_antes:>12.1f}{s_depois:>12.1f}")
+        print(f"{'INSERT em lote de 100 (cli+srv)':<34}{l_antes:>12.1f}{l_depois:>12.1f}")
+    finally:
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {TABELA}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+# app/config/ann.py
+"""
+Índice aproximado (IVF) de identidade para galerias grandes, persistido em
+ANN_CAMINHO (~/.well/indice_ann) e aberto com memory-map no startup.
+
+IVF-Flat: k-means esférico separa os vetores (normalizados) em ~sqrt(n)
+listas; a busca compara a consulta com os centróides e varre só as
+ANN_NPROBE listas mais próximas. Arquivos (.npy, abertos com mmap r+):
+
+    vetores     float32 (capacidade x dim), linhas [0, n_base) ordenadas por lista
+    offsets     int64 (listas + 1): lista j = vetores[offsets[j]:offsets[j+1]]
+    centroides  float32 (listas x dim)
+    ids         S64 (pessoa_id)
+    vivos       bool (remoção/substituição = lápide)
+    meta.json   n, n_base, listas, dim, versão
+
+adicionar() (chamado por salvar_embedding_db) grava no fim, na "cauda"
+[n_base, n), que toda busca varre inteira; quando a cauda passa de
+ANN_CAUDA_MAX_FRACAO da base, compactar() reordena tudo nas listas (e
+retreina os centróides se a galeria cresceu 4x desde o treino). Um único
+processo escreve no diretório.
+
+Pessoas cadastradas por outras máquinas entram pelo sincronizar_ann(),
+chamado pela identificação depois de um miss (adiciona na cauda as que o
+índice não tem), ou reconstruindo do banco (python -m config.ann --construir).
+avaliar() mede recall@1 contra a busca exata e a latência por nprobe:
+
+    python -m config.ann --avaliar 200
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config import ANN_CAMINHO, ANN_NPROBE, ANN_CAUDA_MAX_FRACAO, EMBEDDING_DIM
+from config.log import logger
+
+VERSAO = 1
+_META = "meta.json"
+_EPS = 1e-8
+_BLOCO = 65536           # linhas por bloco ao atribuir listas
+_AMOSTRA_TREINO = 50_000
+_CAUDA_MIN = 1024        # cauda abaixo disso nunca dispara compactação
+_TAM_ID = 64
+
+
+def _normalizar_linhas(m: np.ndarray) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    return m / (np.linalg.norm(m, axis=-1, keepdims=True) + _EPS)
+
+def _num_listas(n: int) -> int:
+    return int(min(4096, max(1, round(n ** 0.5))))
+
+def treinar_centroides(vetores: np.ndarray, listas: int, iteracoes: int = 10,
+                       amostra: int = _AMOSTRA_TREINO, seed: int = 0) -> np.ndarray:
+    """K-means esférico (produto interno) numa amostra dos vetores normalizados."""
+    rng = np.random.default_rng(seed)
+    n = len(vetores)
+    x = vetores[np.sort(rng.choice(n, min(n, max(amostra, listas)), replace=False))]
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    c = x[rng.choice(len(x), listas, replace=False)].copy()
+    for _ in range(iteracoes):
+        a = np.argmax(x @ c.T, axis=1)
+        ordem = np.argsort(a, kind="stable")
+        usadas, inicios = np.unique(a[ordem], return_index=True)
+        c[usadas] = _normalizar_linhas(np.add.reduceat(x[ordem], inicios, axis=0))
+    return c
+
+def _atribuir(vetores: np.ndarray, centroides: np.ndarray) -> np.ndarray:
+    out = np.empty(len(vetores), dtype=np.int32)
+    for i in range(0, len(vetores), _BLOCO):
+        out[i:i + _BLOCO] = np.argmax(vetores[i:i + _BLOCO] @ centroides.T, axis=1)
+    return out
+
+def _id_bytes(pessoa_id: str) -> bytes:
+    b = pessoa_id.encode()
+    if len(b) > _TAM_ID:
+        raise ValueError(f"pessoa_id com mais de {_TAM_ID} bytes: {pessoa_id!r}")
+    return b
+
+
+def _gravar(diretorio: str, ids: List[bytes], vet: np.ndarray, listas: int = 0,
+            centroides: Optional[np.ndarray] = None, n_treino: Optional[int] = None) -> None:
+    """
+    Escreve um índice completo (vetores já normalizados) num diretório
+    temporário e troca pelo atual; leitores com mmap aberto ficam no inode antigo.
+    Com `centroides`, reaproveita o treino (só reatribui as listas).
+    """
+    n, dim = vet.shape
+    if centroides is None:
+        listas = listas or _num_listas(n)
+        centroides = treinar_centroides(vet, listas) if n else np.zeros((1, dim), np.float32)
+        n_treino = n
+    listas = len(centroides)
+    lista = _atribuir(vet, centroides)
+    ordem = np.argsort(lista, kind="stable")
+    offsets = np.zeros(listas + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(lista, minlength=listas))
+
+    tmp = diretorio + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    capacidade = max(1024, n + max(_CAUDA_MIN, n // 4))
+    m = np.lib.format.open_memmap(os.path.join(tmp, "vetores.npy"), mode="w+",
+                                  dtype=np.float32, shape=(capacidade, dim))
+    for i in range(0, n, _BLOCO):
+        j = min(i + _BLOCO, n)
+        m[i:j] = vet[ordem[i:j]]
+    m.flush()
+    m = np.lib.format.open_memmap(os.path.join(tmp, "ids.npy"), mode="w+",
+                                  dtype=f"S{_TAM_ID}", shape=(capacidade,))
+    if n:
+        m[:n] = np.array(ids, dtype=f"S{_TAM_ID}")[ordem]
+    m.flush()
+    m = np.lib.format.open_memmap(os.path.join(tmp, "vivos.npy"), mode="w+",
+                                  dtype=np.bool_, shape=(capacidade,))
+    m[:n] = True
+    m.flush()
+    del m
+    np.save(os.path.join(tmp, "centroides.npy"), np.asarray(centroides, dtype=np.float32))
+    np.save(os.path.join(tmp, "offsets.npy"), offsets)
+    with open(os.path.join(tmp, _META), "w", encoding="utf-8") as f:
+        json.dump({"versao": VERSAO, "dim": dim, "listas": listas, "n": n, "n_base": n,
+                   "n_treino": n_treino or n}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    antigo = diretorio + ".antigo"
+    shutil.rmtree(antigo, ignore_errors=True)
+    if os.path.exists(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(tmp, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+
+class IndiceANN:
+    """Índice aberto de um diretório (ver construir()). Interface de IndiceIdentidade."""
+
+    def __init__(self, diretorio: str = ANN_CAMINHO, nprobe: int = ANN_NPROBE):
+        self.diretorio = os.path.expanduser(diretorio)
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self.metricas = {"consultas": 0, "tempo_total_ms": 0.0, "adicionados": 0, "compactacoes": 0}
+        self._abrir()
+
+    # ---------- arquivos ----------
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.diretorio, f"{nome}.npy")
+
+    def _abrir(self) -> None:
+        with open(os.path.join(self.diretorio, _META), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("versao") != VERSAO:
+            raise ValueError(f"índice ANN versão {meta.get('versao')}, esperado {VERSAO}")
+        self.dim, self.listas = meta["dim"], meta["listas"]
+        self.n, self.n_base, self.n_treino = meta["n"], meta["n_base"], meta["n_treino"]
+        self._vet = np.load(self._caminho("vetores"), mmap_mode="r+")
+        self._ids = np.load(self._caminho("ids"), mmap_mode="r+")
+        self._vivos = np.load(self._caminho("vivos"), mmap_mode="r+")
+        self._centroides = np.load(self._caminho("centroides"))
+        self._offsets = np.load(self._caminho("offsets"))
+        vivos = np.flatnonzero(self._vivos[:self.n])
+        self._pos = dict(zip((b.decode() for b in self._ids[vivos]), vivos.tolist()))
+
+    def _gravar_meta(self) -> None:
+        meta = {"versao": VERSAO, "dim": self.dim, "listas": self.listas, "n": self.n,
+                "n_base": self.n_base, "n_treino": self.n_treino}
+        tmp = os.path.join(self.diretorio, _META + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.diretorio, _META))
+
+    def sincronizar(self) -> None:
+        for mm in (self._vet, self._ids, self._vivos):
+            mm.flush()
+        self._gravar_meta()
+
+    def _soltar_mapas(self) -> None:
+        """
+        Fecha os mmaps por linha (últimas referências). Antes de trocar ou
+        renomear os arquivos: no Windows um arquivo mapeado não pode ser
+        substituído (WinError 32).
+        """
+        for mm in (self._vet, self._ids, self._vivos):
+            if mm is not None:
+                mm.flush()
+        self._vet = self._ids = self._vivos = None
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._soltar_mapas()
+
+    def _crescer(self) -> None:
+        """Dobra a capacidade dos arquivos por linha (recria e troca)."""
+        capacidade = 2 * len(self._vet)
+        self._soltar_mapas()
+        for nome in ("vetores", "ids", "vivos"):
+            antigo = np.load(self._caminho(nome), mmap_mode="r")
+            tmp = self._caminho(nome) + ".tmp"
+            novo = np.lib.format.open_memmap(tmp, mode="w+", dtype=antigo.dtype,
+                                             shape=(capacidade,) + antigo.shape[1:])
+            novo[:self.n] = antigo[:self.n]
+            novo.flush()
+            del antigo, novo
+            os.replace(tmp, self._caminho(nome))
+        self._vet = np.load(self._caminho("vetores"), mmap_mode="r+")
+        self._ids = np.load(self._caminho("ids"), mmap_mode="r+")
+        self._vivos = np.load(self._caminho("vivos"), mmap_mode="r+")
+
+    # ---------- construção ----------
+    @classmethod
+    def construir(cls, pares: Iterable[Tuple[str, Any]], diretorio: str = ANN_CAMINHO,
+                  dim: int = EMBEDDING_DIM, listas: int = 0, nprobe: int = ANN_NPROBE) -> "IndiceANN":
+        """
+        Monta o índice de [(pessoa_id, emb), ...] (ignora dimensões diferentes)
+        e troca pelo atual do diretório. listas=0: ~sqrt(n).
+        """
+        ids, linhas = [], []
+        for pid, emb in pares:
+            v = np.asarray(emb, dtype=np.float32).reshape(-1)
+            if v.shape[0] == dim:
+                ids.append(pid)
+                linhas.append(v)
+        vet = np.stack(linhas) if linhas else np.zeros((0, dim), np.float32)
+        del linhas
+        return cls.de_matriz(ids, vet, diretorio, listas=listas, nprobe=nprobe)
+
+    @classmethod
+    def de_matriz(cls, ids: Sequence[str], vet: np.ndarray, diretorio: str = ANN_CAMINHO,
+                  listas: int = 0, nprobe: int = ANN_NPROBE) -> "IndiceANN":
+        """Como construir(), a partir de uma matriz float32 (n x dim) normalizada no lugar."""
+        for i in range(0, len(vet), _BLOCO):   # em blocos: norm() de tudo copiaria a matriz
+            vet[i:i + _BLOCO] /= np.linalg.norm(vet[i:i + _BLOCO], axis=1, keepdims=True) + _EPS
+        _gravar(os.path.expanduser(diretorio), [_id_bytes(p) for p in ids], vet, listas=listas)
+        return cls(diretorio, nprobe=nprobe)
+
+    def compactar(self, retreinar: Optional[bool] = None) -> None:
+        """Reordena cauda + base nas listas, sem lápides. Retreina se n >= 4x o treino."""
+        with self._lock:
+            vivos = np.flatnonzero(self._vivos[:self.n])
+            if retreinar is None:
+                retreinar = len(vivos) >= 4 * max(1, self.n_treino)
+            ids = list(self._ids[vivos])
+            vet = np.asarray(self._vet[vivos])   # já normalizados (cópia)
+            self._soltar_mapas()   # _gravar renomeia o diretório
+            if retreinar:
+                _gravar(self.diretorio, ids, vet, listas=0)
+            else:
+                _gravar(self.diretorio, ids, vet, centroides=self._centroides, n_treino=self.n_treino)
+            del vet
+            self._abrir()
+            self.metricas["compactacoes"] += 1
+        logger.info(f"Índice ANN compactado: {self.n} vetores, {self.listas} listas"
+                    f"{' (retreinado)' if retreinar else ''}")
+
+    # ---------- escrita ----------
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def __contains__(self, pessoa_id: str) -> bool:
+        return pessoa_id in self._pos
+
+    def adicionar(self, pessoa_id: str, emb: Any, sincronizar: bool = True) -> None:
+        """
+        Insere ou substitui (lápide na linha antiga + nova linha na cauda).
+        sincronizar=False: sem flush/meta.json; quem adiciona em lote chama
+        sincronizar() uma vez no fim.
+        """
+        v = _normalizar_linhas(np.asarray(emb, dtype=np.float32).reshape(-1))
+        if v.shape[0] != self.dim:
+            raise ValueError(f"embedding com {v.shape[0]} dims, índice tem {self.dim}")
+        pid = _id_bytes(pessoa_id)
+        with self._lock:
+            antiga = self._pos.get(pessoa_id)
+            if antiga is not None:
+                self._vivos[antiga] = False
+            if self.n == len(self._vet):
+                self._crescer()
+            i = self.n
+            self._vet[i] = v
+            self._ids[i] = pid
+            self._vivos[i] = True
+            self.n += 1
+            self._pos[pessoa_id] = i
+            self.metricas["adicionados"] += 1
+            if sincronizar:
+                self.sincronizar()
+            cauda = self.n - self.n_base
+        if cauda > max(_CAUDA_MIN, ANN_CAUDA_MAX_FRACAO * self.n_base):
+            self.compactar()
+
+    def remover(self, pessoa_id: str) -> bool:
+        with self._lock:
+            i = self._pos.pop(pessoa_id, None)
+            if i is None:
+                return False
+            self._vivos[i] = False
+            self._vivos.flush()
+            return True
+
+    # ---------- busca ----------
+    def _candidatos(self, q: np.ndarray, nprobe: int) -> List[Tuple[int, int]]:
+        """Faixas [a, b) de linhas a varrer: as nprobe listas mais próximas + a cauda."""
+        nprobe = min(nprobe, self.listas)
+        sims = self._centroides @ q
+        probes = np.argpartition(-sims, nprobe - 1)[:nprobe] if nprobe < self.listas else range(self.listas)
+        faixas = [(int(self._offsets[j]), int(self._offsets[j + 1])) for j in probes]
+        faixas.append((self.n_base, self.n))
+        return [(a, b) for a, b in faixas if b > a]
+
+    def _top_k_faixas(self, q: np.ndarray, faixas: Sequence[Tuple[int, int]], k: int) -> List[Tuple[str, float]]:
+        if not faixas:
+            return []
+        linhas = np.concatenate([np.arange(a, b) for a, b in faixas])
+        dist = np.concatenate([1.0 - self._vet[a:b] @ q for a, b in faixas])
+        dist[~self._vivos[linhas]] = np.inf
+        k = min(k, len(dist))
+        sel = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+        sel = sel[np.argsort(dist[sel])]
+        return [(self._ids[linhas[i]].decode(), float(dist[i])) for i in sel if np.isfinite(dist[i])]
+
+    def top_k(self, emb: Any, k: int = 5, limiar: Optional[float] = None,
+              nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Até k (pessoa_id, dist) aproximados, em ordem crescente de distância."""
+        q = _normalizar_linhas(np.asarray(emb, dtype=np.float32).reshape(-1))
+        t0 = time.perf_counter()
+        with self._lock:
+            out = self._top_k_faixas(q, self._candidatos(q, nprobe or self.nprobe), k)
+        self.metricas["consultas"] += 1
+        self.metricas["tempo_total_ms"] += (time.perf_counter() - t0) * 1000
+        if limiar is not None:
+            out = [(pid, d) for pid, d in out if d <= limiar]
+        return out
+
+    def melhor(self, emb: Any, limiar: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        hits = self.top_k(emb, 1, limiar)
+        return hits[0] if hits else None
+
+    def exato(self, emb: Any, k: int = 1) -> List[Tuple[str, float]]:
+        """Busca exata (todas as linhas): referência para o recall."""
+        q = _normalizar_linhas(np.asarray(emb, dtype=np.float32).reshape(-1))
+        with self._lock:
+            return self._top_k_faixas(q, [(0, self.n)], k)
+
+
+def avaliar(indice: IndiceANN, consultas: np.ndarray, nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32)) -> List[Dict]:
+    """recall@1 (mesmo pessoa_id da busca exata) e latência por nprobe."""
+    exatos, t_exato = [], []
+    for q in consultas:
+        t0 = time.perf_counter()
+        exatos.append(indice.exato(q, 1))
+        t_exato.append((time.perf_counter() - t0) * 1000)
+    out = []
+    for nprobe in nprobes:
+        acertos, tempos = 0, []
+        for q, ref in zip(consultas, exatos):
+            t0 = time.perf_counter()
+            hit = indice.top_k(q, 1, nprobe=nprobe)
+            tempos.append((time.perf_counter() - t0) * 1000)
+            acertos += bool(hit) and bool(ref) and hit[0][0] == ref[0][0]
+        out.append({"nprobe": nprobe, "recall_1": acertos / max(1, len(consultas)),
+                    "ann_ms_p50": float(np.percentile(tempos, 50)), "ann_ms_p99": float(np.percentile(tempos, 99)),
+                    "exato_ms_p50": float(np.percentile(t_exato, 50))})
+    return out
+
+def consultas_de_teste(indice: IndiceANN, n: int, ruido: float = 0.3, seed: int = 0) -> np.ndarray:
+    """Vetores da galeria com ruído gaussiano (relativo à norma), como rostos novos de quem já está lá."""
+    rng = np.random.default_rng(seed)
+    vivos = np.flatnonzero(indice._vivos[:indice.n])
+    base = np.asarray(indice._vet[np.sort(rng.choice(vivos, min(n, len(vivos)), replace=False))])
+    return base + rng.standard_normal(base.shape).astype(np.float32) * ruido / np.sqrt(indice.dim)
+
+
+# ---------- índice do processo ----------
+_estado = {"indice": None, "sincronizado_em": 0.0}
+_estado_lock = threading.Lock()
+
+
+def indice_ann() -> IndiceANN:
+    """Abre (mmap) o índice de ANN_CAMINHO; se não existe ou é incompatível, constrói do banco."""
+    with _estado_lock:
+        if _estado["indice"] is not None:
+            return _estado["indice"]
+        t0 = time.perf_counter()
+        try:
+            indice = IndiceANN(ANN_CAMINHO)
+            if indice.dim != EMBEDDING_DIM:
+                indice.fechar()   # construir() troca o diretório
+                raise ValueError(f"índice ANN com {indice.dim} dims, EMBEDDING_DIM={EMBEDDING_DIM}")
+            origem = "arquivo"
+        except (FileNotFoundError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Índice ANN descartado: {e}")
+            from config.database import listar_pessoas_embeddings
+            indice = IndiceANN.construir(listar_pessoas_embeddings(), ANN_CAMINHO)
+            origem = "banco"
+            _estado["sincronizado_em"] = time.monotonic()
+        _estado["indice"] = indice
+        logger.info(f"Índice ANN aberto ({origem}): {len(indice)} pessoas, {indice.listas} listas, "
+                    f"{(time.perf_counter() - t0) * 1000:.0f} ms")
+        return indice
+
+def sincronizar_ann(max_idade_s: float) -> int:
+    """
+    Adiciona ao índice as pessoas do banco que ele ainda não tem (ex.:
+    cadastradas por outra máquina), se a última sincronização tem mais de
+    max_idade_s. Retorna quantas entraram.
+    """
+    indice = indice_ann()
+    with _estado_lock:
+        if time.monotonic() - _estado["sincronizado_em"] <= max_idade_s:
+            return 0
+        _estado["sincronizado_em"] = time.monotonic()
+    from config.database import listar_pessoas_embeddings
+    t0 = time.perf_counter()
+    novas = 0
+    for pid, emb in listar_pessoas_embeddings(exceto=indice):
+        if np.asarray(emb).size != indice.dim:   # como construir(): ignora dimensões diferentes
+            continue
+        try:
+            indice.adicionar(pid, emb, sincronizar=False)
+            novas += 1
+        except OSError as e:
+            logger.warning(f"Índice ANN: embedding de {pid} não indexado: {e}")
+    if novas:
+        with indice._lock:
+            indice.sincronizar()
+        logger.info(f"Índice ANN sincronizado: +{novas} pessoas em {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return novas
+
+def registrar_embedding(pessoa_id: str, emb: Any) -> None:
+    """Reflete um embedding salvo no índice ANN do processo (se já aberto)."""
+    indice = _estado["indice"]
+    if indice is None:
+        return
+    try:
+        indice.adicionar(pessoa_id, emb)
+    except (ValueError, OSError) as e:
+        logger.warning(f"Índice ANN: embedding de {pessoa_id} não indexado: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice ANN (IVF) de identidade")
+    parser.add_argument("--caminho", default=ANN_CAMINHO)
+    parser.add_argument("--construir", action="store_true", help="reconstrói do banco (pessoas)")
+    parser.add_argument("--listas", type=int, default=0, help="0 = ~sqrt(n)")
+    parser.add_argument("--compactar", action="store_true")
+    parser.add_argument("--avaliar", type=int, default=0, metavar="N", help="N consultas de teste")
+    parser.add_argument("--nprobes", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+
+    if args.construir:
+        from config.database import listar_pessoas_embeddings
+        t0 = time.perf_counter()
+        indice = IndiceANN.construir(listar_pessoas_embeddings(), args.caminho, listas=args.listas)
+        print(f"construído: {len(indice)} pessoas, {indice.listas} listas, {time.perf_counter() - t0:.1f} s")
+    else:
+        indice = IndiceANN(args.caminho)
+    if args.compactar:
+        indice.compactar()
+    print(f"{args.caminho}: {len(indice)} pessoas, base={indice.n_base} cauda={indice.n - indice.n_base}, "
+          f"{indice.listas} listas, dim={indice.dim}")
+    if args.avaliar:
+        consultas = consultas_de_teste(indice, args.avaliar)
+        print(f"{'nprobe':>7}{'recall@1':>10}{'ann_p50_ms':>12}{'ann_p99_ms':>12}{'exato_p50_ms':>14}")
+        for r in avaliar(indice, consultas, [int(p) for p in args.nprobes.split(",")]):
+            print(f"{r['nprobe']:>7}{r['recall_1']:>10.3f}{r['ann_ms_p50']:>12.2f}"
+                  f"{r['ann_ms_p99']:>12.2f}{r['exato_ms_p50']:>14.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,55 @@
-import cv2
+# app/config/camera.py
 import os
 import time
 from datetime import datetime
+from typing import Optional
 
-def capturar_imagem(pessoa_id):
-    pasta_imagens = f"images_{pessoa_id}"
-    os.makedirs(pasta_imagens, exist_ok=True)
+import cv2
 
-    cap = cv2.VideoCapture(0)
+from config.latencia import Cronometro
 
-    for _ in range(5):
-        cap.read()
-        time.sleep(0.1)
+# Otimização da captura
+CAM_WIDTH       = 640
+CAM_HEIGHT      = 480
+WARMUP_FRAMES   = 3
+WARMUP_SLEEP    = 0.05
+JPEG_QUALITY    = 60
+JPEG_OPTIMIZE   = True
 
-    ret, frame = cap.read()
+def _pasta_imgs(pid: str) -> str:
+    pasta = f"images_{pid}"
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+def _abrir_camera_configurada():
+    cap = cv2.VideoCapture(0)
+    try:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH,  CAM_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAM_HEIGHT)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+        cap.set(cv2.CAP_PROP_FOURCC, fourcc)
+    except Exception:
+        pass
+    return cap
 
-    if ret and frame is not None and frame.sum() > 1000:
-        filename = os.path.join(
-            pasta_imagens,
-            f"captura_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-        )
-        cv2.imwrite(filename, frame)
-        cap.release()
-        return filename
-    else:
-        cap.release()
-        raise Exception("Erro ao capturar imagem (imagem vazia ou escura).")
+def capturar_imagem(pessoa_id: str, crono: Optional[Cronometro] = None):
+    crono = crono or Cronometro()
+    pasta = _pasta_imgs(pessoa_id)
+    with crono.etapa("camera_open"):
+        cap = _abrir_camera_configurada()
+    with crono.etapa("warmup"):
+        for _ in range(WARMUP_FRAMES):
+            cap.read(); time.sleep(WARMUP_SLEEP)
+    with crono.etapa("grab"):
+        ok, frame = cap.read()
+    cap.release()
+    if not ok or frame is None or frame.sum() < 1000:
+        raise RuntimeError("Frame inválido/escuro")
+    path = os.path.join(pasta, f"captura_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
+    params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+    if JPEG_OPTIMIZE:
+        params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+    with crono.etapa("encode"):
+        cv2.imwrite(path, frame, params)
+    return path
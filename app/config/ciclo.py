@@ -0,0 +1,455 @@
+# app/config/ciclo.py
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config.log import logger
+from config.config import GRAVAR_LATENCIAS
+from config.latencia import Cronometro, AgregadorLatencia
+from config.leitura import Leitura
+from config.verificacao import CadenciaIdentidade, LADO_ASSINATURA
+
+# ===== Política padrão do loop (main.py sobrescreve com suas constantes) =====
+POLITICA_PADRAO: Dict[str, Any] = {
+    "limiar_cosine":         0.30,
+    "intervalo_base":        10,
+    "intervalo_max":         60,
+    "nitidez_min":           30.0,
+    "brilho_min":            30.0,
+    "economia_ativa":        True,
+    "cpu_alta_limiar":       80.0,   # % de uso de CPU (média da janela)
+    "ruim_streak_limiar":    3,      # leituras seguidas ruins => um cooldown, depois a câmera é testada de novo
+    "cooldown_segundos":     120,    # tempo sem capturar imagem
+    "backoff_multiplicador": 3,      # aumenta o intervalo durante economia
+    "janela_cpu_segundos":   30.0,
+    # cadência da verificação de identidade (config/verificacao.py)
+    "verificacao_intervalo_max": 300.0,  # s entre verificações com o mesmo rosto (0 = todo ciclo)
+    "verificacao_ausencia_max":  120.0,  # s sem ver rosto => reverifica
+    "verificacao_mudanca_max":   0.12,   # mudança média da miniatura do quadro (0-1) => reverifica
+}
+
+MOTIVOS_COOLDOWN = ("ausente", "baixa_qualidade", "ruim_streak")
+MOTIVOS_BACKOFF  = MOTIVOS_COOLDOWN + ("cpu_alta", "cooldown")
+
+# PT-BR emoções
+_MAP_EN_PT = {
+    "happy": "feliz", "sad": "triste", "fear": "medo", "angry": "raiva",
+    "disgust": "desgosto", "surprise": "surpresa", "neutral": "neutro",
+}
+def normalizar_emocoes_pt(emocoes):
+    if not emocoes:
+        return None
+    out = {}
+    for k, v in emocoes.items():
+        k2 = _MAP_EN_PT.get(k.lower(), k.lower())
+        out[k2] = float(v) if v is not None else 0.0
+    for k in ["feliz","triste","medo","raiva","desgosto","surpresa","neutro"]:
+        out.setdefault(k, 0.0)
+    return out
+
+
+class RelogioReal:
+    """Relógio do loop; a simulação injeta um relógio acelerado."""
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.perf_counter()
+
+    def agora(self) -> datetime:
+        return datetime.now()
+
+    def sleep(self, segundos: float) -> None:
+        time.sleep(segundos)
+
+
+class Servicos:
+    """
+    Dependências externas do loop: câmera, modelos, banco e sensores.
+    Imports tardios para que simulação/testes possam sobrescrever sem
+    carregar OpenCV/DeepFace.
+    """
+
+    def capturar(self, pessoa_id: str, crono: Cronometro) -> str:
+        from config.camera import capturar_imagem
+        return capturar_imagem(pessoa_id, crono)
+
+    def qualidade(self, img_path: str):
+        from config.emocao import medir_brilho_nitidez
+        return medir_brilho_nitidez(img_path)
+
+    def detectar(self, img_path: str, detector: str) -> bool:
+        from config.emocao import detectar_rosto
+        return detectar_rosto(img_path, detector)
+
+    def embedding(self, img_path: str):
+        from config.emocao import obter_embedding
+        return obter_embedding(img_path)
+
+    def assinatura(self, img_path: str):
+        from config.emocao import assinatura_quadro
+        return assinatura_quadro(img_path, LADO_ASSINATURA)
+
+    def comparar(self, emb_ref, emb_now, limiar: float):
+        from config.emocao import mesma_pessoa
+        return mesma_pessoa(emb_ref, emb_now, limiar=limiar)
+
+    def emocao(self, img_path: str):
+        from config.emocao import analisar_emocao
+        return analisar_emocao(img_path)
+
+    def identificar(self, img_path: Optional[str], limiar: float, crono: Cronometro):
+        from config.identity import load_or_create_pessoa_id
+        return load_or_create_pessoa_id(img_path, limiar_cosine=limiar, crono=crono)
+
+    def carregar_embedding(self, pessoa_id: str):
+        from config.database import carregar_embedding_db
+        return carregar_embedding_db(pessoa_id)
+
+    def salvar_embedding(self, pessoa_id: str, emb) -> None:
+        from config.database import salvar_embedding_db
+        salvar_embedding_db(pessoa_id, emb)
+
+    def templates(self, pessoa_id: str):
+        from config.templates import carregar_templates
+        return carregar_templates([pessoa_id]).get(pessoa_id)
+
+    def admitir_template(self, pessoa_id: str, emb, qualidade: Optional[float], limiar: float):
+        """Novo centróide se o rosto entrou como template, senão None."""
+        from config.templates import admitir_template
+        return admitir_template(pessoa_id, emb, qualidade, limiar=limiar)
+
+    def guardar_identidade_local(self, pessoa_id: str, origem: str, dist: Optional[float]) -> None:
+        from config.identidade_local import registrar_identidade
+        registrar_identidade(pessoa_id, origem, dist)
+
+    def retomar_identidade(self, local) -> None:
+        from config.identidade_local import semear
+        semear(local)
+
+    def verificar(self, pessoa_id: str, emb_ref, emb_now, limiar: float):
+        """(mesma_pessoa, dist): centróide primeiro; se não bater, os templates da pessoa."""
+        is_same, dist = self.comparar(emb_ref, emb_now, limiar)
+        if is_same:
+            return is_same, dist
+        tpl = self.templates(pessoa_id)
+        if tpl is None:
+            return is_same, dist
+        from config.templates import distancia
+        d = distancia(emb_now, None, tpl)
+        return d <= limiar, min(dist, d)
+
+    def salvar_leitura(self, leitura: Leitura) -> None:
+        from config.database import gravar_leitura
+        gravar_leitura(leitura)
+
+    def remover_imagem(self, img_path: str) -> None:
+        if img_path and os.path.exists(img_path):
+            os.remove(img_path)
+
+    def usando_computador(self) -> bool:
+        from config.monitor import esta_usando_computador
+        return esta_usando_computador()
+
+    def recursos(self) -> Dict[str, float]:
+        from config.recursos import coletar_recursos
+        return coletar_recursos()
+
+    def cpu(self, janela_s: float) -> float:
+        from config.recursos import cpu_suavizada
+        return cpu_suavizada(janela_s)
+
+
+class LoopEmocional:
+    """
+    Loop de captura/análise com economia agressiva (cooldown, backoff,
+    ruim_streak). Relógio, serviços e perfil de energia são injetáveis.
+    """
+
+    def __init__(self,
+                 servicos: Optional[Servicos] = None,
+                 politica: Optional[Dict[str, Any]] = None,
+                 relogio=None,
+                 energia=None,
+                 agregador: Optional[AgregadorLatencia] = None,
+                 gravar_latencias: bool = GRAVAR_LATENCIAS):
+        self.servicos = servicos or Servicos()
+        self.politica = dict(POLITICA_PADRAO, **(politica or {}))
+        self.relogio = relogio or RelogioReal()
+        if energia is None:
+            from config.energia import GerenciadorEnergia
+            energia = GerenciadorEnergia(relogio=self.relogio.monotonic)
+        self.energia = energia
+        self.agregador = agregador or AgregadorLatencia(relogio=self.relogio.monotonic)
+        self.gravar_latencias = gravar_latencias
+        p = self.politica
+        self.cadencia = CadenciaIdentidade(p["verificacao_intervalo_max"], p["verificacao_ausencia_max"],
+                                           p["verificacao_mudanca_max"], relogio=self.relogio.monotonic)
+
+        self.pessoa_id: Optional[str] = None
+        self.emb_ref = None
+        self.intervalo_atual = self.politica["intervalo_base"]
+        self.ruim_streak = 0
+        self.cooldown_ate = 0.0
+        # db_write de uma leitura só é conhecido depois de gravá-la: vai na leitura seguinte
+        self._db_write_anterior_ms: Optional[float] = None
+
+    def _crono(self) -> Cronometro:
+        return Cronometro(relogio=self.relogio.monotonic)
+
+    # ---------- bootstrap ----------
+    def bootstrap(self, local=None) -> str:
+        """
+        Identifica quem está na frente da câmera. Com `local` (IdentidadeLocal do
+        cache em ~/.well) retoma dele, sem câmera nem banco: o primeiro ciclo já
+        verifica o rosto contra o centróide/templates locais.
+        """
+        s = self.servicos
+        limiar = self.politica["limiar_cosine"]
+        if local is not None:
+            s.retomar_identidade(local)
+            self.pessoa_id, self.emb_ref = local.pessoa_id, local.centroide
+            logger.success(f"[IDENTIDADE] pessoa_id={local.pessoa_id} origem=cache_local "
+                           f"(último match {local.origem} em {local.verificado_em}, dist={local.distancia})")
+            return self.pessoa_id
+
+        crono = self._crono()
+        img_bootstrap = None
+        try:
+            img_bootstrap = s.capturar("bootstrap", crono)
+        except Exception:
+            img_bootstrap = None
+
+        pessoa_id, emb_now, dist, origem = s.identificar(img_bootstrap, limiar, crono)
+        logger.success(f"[IDENTIDADE] pessoa_id={pessoa_id} origem={origem} dist={dist}")
+
+        if emb_now is not None:
+            try:
+                # bootstrap com luz ruim não substitui a referência: só entra como template se passar
+                nitidez = crono.medir("quality", s.qualidade, img_bootstrap)[1] if img_bootstrap else None
+                with crono.etapa("db_write"):
+                    s.admitir_template(pessoa_id, emb_now, nitidez, limiar)
+            except Exception:
+                pass
+        try:
+            if img_bootstrap:
+                s.remover_imagem(img_bootstrap)
+        except Exception:
+            pass
+
+        self.pessoa_id = pessoa_id
+        self.emb_ref = s.carregar_embedding(pessoa_id)
+        s.guardar_identidade_local(pessoa_id, origem, dist)
+        logger.info(f"[LATENCIA] bootstrap {crono.como_dict()}")
+        self.agregador.registrar(crono.etapas)
+        return pessoa_id
+
+    def atualizar_referencia(self, pessoa_id: str, centroide) -> None:
+        """Centróide novo vindo da reconciliação em segundo plano (se a pessoa não mudou)."""
+        if pessoa_id == self.pessoa_id:
+            self.emb_ref = centroide
+            self.cadencia.invalidar()
+
+    # ---------- etapas do ciclo ----------
+    def _analisar_rosto(self, img_path: str, perfil, meta, crono: Cronometro):
+        """
+        Identidade + emoção de um frame com rosto; retorna emoções normalizadas.
+        O embedding só roda quando a cadência pede (gatilho); nos outros ciclos
+        o último veredito positivo é herdado e a idade dele vai para a leitura.
+        """
+        s = self.servicos
+        limiar = self.politica["limiar_cosine"]
+        analisar = lambda: normalizar_emocoes_pt(crono.medir("emotion", s.emocao, img_path))
+
+        if not perfil["verificar_identidade"]:
+            # perfil de energia sem checagem de identidade: só emoção
+            return analisar()
+
+        if self.emb_ref is None:
+            try:
+                emb = crono.medir("embed", s.embedding, img_path)
+                centro = s.admitir_template(self.pessoa_id, emb, meta["qualidade"], limiar)
+                self.emb_ref = centro if centro is not None else emb
+            except Exception:
+                self.emb_ref = None
+
+        assinatura = crono.medir("assinatura", s.assinatura, img_path)
+        motivo = self.cadencia.motivo(assinatura) if self.emb_ref is not None else "sem_veredito"
+        if motivo is None:
+            dist, idade = self.cadencia.herdar()
+            meta["mesma_pessoa"] = True
+            meta["face_distance"] = dist
+            meta["identidade_idade_s"] = round(idade, 1)
+            return analisar()
+
+        meta["identidade_idade_s"] = 0.0
+        emb_now_loop = crono.medir("embed", s.embedding, img_path)
+        if self.emb_ref is None:
+            meta["mesma_pessoa"] = True
+            meta["face_distance"] = 0.0
+            return analisar()
+
+        is_same, dist_loop = crono.medir("identity_match", s.verificar, self.pessoa_id,
+                                         self.emb_ref, emb_now_loop, limiar)
+        meta["mesma_pessoa"] = is_same
+        meta["face_distance"] = dist_loop
+        meta["face_status"] = "ok" if is_same else "outra_pessoa"
+        self.cadencia.registrar(motivo, is_same, dist_loop, assinatura)
+        if is_same:
+            # rosto verificado e nítido pode virar template (checagem local; banco só se entrar)
+            centro = s.admitir_template(self.pessoa_id, emb_now_loop, meta["qualidade"], limiar)
+            if centro is not None:
+                self.emb_ref = centro
+                s.guardar_identidade_local(self.pessoa_id, "template", dist_loop)
+            return analisar()
+
+        # Reatribuição automática
+        pid2, emb2, dist2, origem2 = s.identificar(img_path, limiar, crono)
+        if pid2 != self.pessoa_id:
+            self.pessoa_id = pid2
+            self.emb_ref = s.carregar_embedding(pid2)
+            if self.emb_ref is None and emb2 is not None:
+                centro = s.admitir_template(pid2, emb2, meta["qualidade"], limiar)
+                self.emb_ref = centro if centro is not None else emb2
+            meta["face_status"] = f"reatribuido:{origem2}"
+            meta["face_distance"] = dist2
+            s.guardar_identidade_local(pid2, origem2, dist2)
+        else:
+            meta["face_status"] = "variacao_rosto"
+        return analisar()
+
+    def ciclo(self) -> Dict[str, Any]:
+        """
+        Executa um ciclo completo e retorna o resultado:
+        {data_captura, pessoa_id, emocoes, recursos, meta, motivo_backoff, intervalo, latencias}
+        """
+        s, p = self.servicos, self.politica
+        inicio_ciclo = self.relogio.time()
+        data_captura = self.relogio.agora()
+        crono = self._crono()
+        perfil = self.energia.atualizar()
+        intervalo_base = self.energia.intervalo(p["intervalo_base"])
+        intervalo_teto = max(p["intervalo_max"], intervalo_base)
+        recursos = s.recursos()
+        meta = {
+            "camera_status": "ok",
+            "face_status": "ok",
+            "mesma_pessoa": None,
+            "qualidade": None,
+            "brilho": None,
+            "face_distance": None,
+            "identidade_idade_s": None,
+        }
+        self.energia.anotar_meta(meta)
+        emocoes = None
+        img_path = None
+        motivo_backoff = None
+
+        # ===== Economia agressiva: checagens antes de abrir a câmera =====
+        pular = False
+        if p["economia_ativa"]:
+            cpu_alta = s.cpu(p["janela_cpu_segundos"]) >= p["cpu_alta_limiar"]
+            em_cooldown = self.relogio.time() < self.cooldown_ate
+            if cpu_alta or em_cooldown or self.ruim_streak >= p["ruim_streak_limiar"]:
+                if cpu_alta:
+                    motivo_backoff = "cpu_alta"
+                elif em_cooldown:
+                    motivo_backoff = "cooldown"
+                else:
+                    motivo_backoff = "ruim_streak"
+                meta["camera_status"] = "economia"
+                meta["face_status"]   = "ausente"
+                # emocoes = None -> banco marca 'usuario_ausente'
+                pular = True
+
+        if not pular:
+            try:
+                if s.usando_computador():
+                    img_path = s.capturar(self.pessoa_id, crono)
+                    brilho, nitidez = crono.medir("quality", s.qualidade, img_path)
+                    meta["brilho"] = brilho
+                    meta["qualidade"] = nitidez
+
+                    if (brilho is not None and brilho < p["brilho_min"]) or (nitidez is not None and nitidez < p["nitidez_min"]):
+                        meta["camera_status"] = "baixa_qualidade"
+                        motivo_backoff = "baixa_qualidade"
+                        self.ruim_streak += 1
+                    elif crono.medir("detect", s.detectar, img_path, perfil["detector"]):
+                        emocoes = self._analisar_rosto(img_path, perfil, meta, crono)
+                        self.ruim_streak = 0  # sucesso zera streak
+                    else:
+                        meta["face_status"] = "ausente"
+                        motivo_backoff = "ausente"
+                        self.ruim_streak += 1
+                else:
+                    meta["face_status"] = "ausente"
+                    meta["camera_status"] = "ok"
+                    motivo_backoff = "ausente"
+                    self.ruim_streak += 1
+            except Exception:
+                meta["camera_status"] = "erro"
+
+        if emocoes is None:
+            # ciclo sem rosto analisado: o próximo rosto é reverificado
+            self.cadencia.perder()
+
+        # Persistência
+        if self.gravar_latencias:
+            meta["latencias"] = crono.como_dict()
+            if self._db_write_anterior_ms is not None:
+                meta["latencias"]["db_write_anterior"] = self._db_write_anterior_ms
+        leitura = Leitura(self.pessoa_id, data_captura, emocoes, recursos, meta)
+        with crono.etapa("db_write"):
+            s.salvar_leitura(leitura)
+        self._db_write_anterior_ms = round(crono.etapas["db_write"], 2)
+        self.agregador.registrar(crono.etapas)
+        self.agregador.talvez_logar()
+
+        # Remove a imagem
+        try:
+            if img_path:
+                s.remover_imagem(img_path)
+        except Exception:
+            pass
+
+        # ===== Regras de economia: cooldown e backoff =====
+        if p["economia_ativa"]:
+            if motivo_backoff in MOTIVOS_BACKOFF:
+                # entra/renova cooldown exceto se foi apenas cpu_alta (momentânea)
+                if motivo_backoff in MOTIVOS_COOLDOWN:
+                    self.cooldown_ate = max(self.cooldown_ate, self.relogio.time() + p["cooldown_segundos"])
+                if motivo_backoff == "ruim_streak":
+                    # streak já convertido em cooldown; ao fim dele a câmera é testada de novo
+                    self.ruim_streak = 0
+                self.intervalo_atual = min(intervalo_base * p["backoff_multiplicador"], intervalo_teto)
+            else:
+                # sucesso: zera streak e sai de cooldown
+                self.ruim_streak = 0
+                self.cooldown_ate = 0.0
+                self.intervalo_atual = intervalo_base
+        else:
+            self.intervalo_atual = intervalo_base if not motivo_backoff else min(intervalo_base * 3, intervalo_teto)
+
+        gasto = self.relogio.time() - inicio_ciclo
+        return {
+            "data_captura": data_captura,
+            "pessoa_id": self.pessoa_id,
+            "emocoes": emocoes,
+            "recursos": recursos,
+            "meta": meta,
+            "leitura": leitura,
+            "motivo_backoff": motivo_backoff,
+            "intervalo": self.intervalo_atual,
+            "gasto": gasto,
+            "latencias": crono.como_dict(),
+        }
+
+    def executar(self, max_ciclos: Optional[int] = None, ate: Optional[float] = None) -> int:
+        """Roda o loop (para sempre por padrão); retorna o número de ciclos."""
+        n = 0
+        while (max_ciclos is None or n < max_ciclos) and (ate is None or self.relogio.time() < ate):
+            res = self.ciclo()
+            n += 1
+            self.relogio.sleep(max(0.0, res["intervalo"] - res["gasto"]))
+        return n
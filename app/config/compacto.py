@@ -0,0 +1,110 @@
+# app/config/compacto.py
+"""
+Modo de armazenamento compacto das leituras (ARMAZENAMENTO_COMPACTO).
+
+leituras_compactas tem as mesmas colunas de leituras_emocionais, com tipos
+menores:
+
+- emoções e recursos (percentuais): SMALLINT em centésimos de ponto
+  percentual (61.37% -> 6137); 2 bytes em vez de 4, precisão de 0,01.
+- emocao_dominante, camera_status, face_status: SMALLINT com o código das
+  tabelas de lookup emocao_codigo / status_codigo. Dominantes têm códigos
+  fixos; status novos (ex.: "reatribuido:<origem>") ganham código na
+  primeira vez que aparecem.
+- colunas ordenadas por alinhamento (8 -> 4 -> 2 -> 1 byte -> varlena) para
+  não desperdiçar padding.
+
+inserir_leituras() codifica as linhas com codificar_linhas(), no próprio
+cursor, quando o destino é a tabela compacta, então spool, lote e INSERT
+direto não mudam.
+A view vw_leituras_emocionais devolve os nomes e tipos originais (bruto
+UNION ALL compacto decodificado) — Grafana e rollups leem dela nos dois modos.
+Lookups, tabela e view vêm das migrações 0007 e 0009.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config.config import ARMAZENAMENTO_COMPACTO
+from config.leitura import COLUNAS_LEITURA
+
+TABELA = "leituras_emocionais"
+TABELA_COMPACTA = "leituras_compactas"
+VIEW = "vw_leituras_emocionais"
+# de onde ler leituras com os nomes/tipos originais (rollups, exportação)
+ORIGEM_LEITURAS = VIEW if ARMAZENAMENTO_COMPACTO else TABELA
+
+# centésimos de ponto percentual
+COLUNAS_PERCENTUAIS = ("raiva", "desgosto", "medo", "feliz", "triste", "surpresa", "neutro",
+                       "cpu", "memoria", "disco")
+COLUNAS_STATUS = ("camera_status", "face_status")
+ESCALA = 100
+_MAX_SMALLINT = 32767
+
+# códigos fixos (não reordenar: estão gravados nas linhas)
+CODIGOS_DOMINANTE: Dict[str, int] = {
+    "neutro": 0, "feliz": 1, "triste": 2, "medo": 3, "raiva": 4,
+    "desgosto": 5, "surpresa": 6, "usuario_ausente": 7,
+}
+
+_IDX_PERCENTUAIS = tuple(COLUNAS_LEITURA.index(c) for c in COLUNAS_PERCENTUAIS)
+_IDX_DOMINANTE = COLUNAS_LEITURA.index("emocao_dominante")
+_IDX_STATUS = tuple(COLUNAS_LEITURA.index(c) for c in COLUNAS_STATUS)
+
+# nome -> código de status_codigo (cache do processo; códigos nunca mudam)
+_status: Dict[str, int] = {}
+_status_lock = threading.Lock()
+
+
+def _percentual(v) -> Optional[int]:
+    if v is None:
+        return None
+    return max(-_MAX_SMALLINT, min(_MAX_SMALLINT, int(round(float(v) * ESCALA))))
+
+def codigo_status(nome: Optional[str], cur) -> Optional[int]:
+    """
+    Código de um status, criando-o em status_codigo se ainda não existe. Roda
+    no cursor de quem grava (sem pegar uma segunda conexão do pool) e não
+    mexe no cache: o código pode ter sido criado nesta transação, e só quem
+    a controla sabe se ela foi commitada (ver registrar_status).
+    """
+    if nome is None:
+        return None
+    cod = _status.get(nome)
+    if cod is not None:
+        return cod
+    cur.execute("""
+        WITH novo AS (
+          INSERT INTO status_codigo (nome) VALUES (%s) ON CONFLICT (nome) DO NOTHING RETURNING codigo
+        )
+        SELECT codigo FROM novo UNION ALL SELECT codigo FROM status_codigo WHERE nome = %s
+    """, (nome[:30], nome[:30]))
+    return cur.fetchone()[0]
+
+def registrar_status(resolvidos: Dict[str, int]) -> None:
+    """Põe no cache os códigos de codificar_linhas() — só depois do commit da transação."""
+    if resolvidos:
+        with _status_lock:
+            _status.update(resolvidos)
+
+def codificar_linhas(linhas: List[tuple], cur) -> Tuple[List[tuple], Dict[str, int]]:
+    """
+    Tuplas na ordem de COLUNAS_LEITURA -> mesmas posições com os valores
+    compactos, e os códigos de status resolvidos no banco (fora do cache).
+    """
+    resolvidos: Dict[str, int] = {}
+    out = []
+    for linha in linhas:
+        v = list(linha)
+        for i in _IDX_PERCENTUAIS:
+            v[i] = _percentual(v[i])
+        v[_IDX_DOMINANTE] = CODIGOS_DOMINANTE.get(v[_IDX_DOMINANTE]) if v[_IDX_DOMINANTE] is not None else None
+        for i in _IDX_STATUS:
+            nome = v[i]
+            if nome in resolvidos:
+                v[i] = resolvidos[nome]
+                continue
+            v[i] = codigo_status(nome, cur)
+            if nome is not None and nome not in _status:
+                resolvidos[nome] = v[i]
+        out.append(tuple(v))
+    return out, resolvidos
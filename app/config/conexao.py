@@ -0,0 +1,229 @@
+# app/config/conexao.py
+"""
+Pool compartilhado de conexões PostgreSQL para todos os módulos.
+
+    from config.conexao import conexao
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute(...)
+    # commit no fim do bloco; rollback (e descarte se a conexão quebrou) em erro
+
+Obs.: este módulo não usa o loguru — o sink de log no banco passa por aqui
+e logar de dentro dele entraria em recursão.
+"""
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from decouple import config
+
+from config.config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+
+POOL_MIN             = config("DB_POOL_MIN", cast=int, default=1)
+POOL_MAX             = config("DB_POOL_MAX", cast=int, default=4)
+POOL_ESPERA_S        = config("DB_POOL_ESPERA_S", cast=float, default=10.0)
+STATEMENT_TIMEOUT_MS = config("DB_STATEMENT_TIMEOUT_MS", cast=int, default=5000)
+CONNECT_TIMEOUT_S    = config("DB_CONNECT_TIMEOUT_S", cast=int, default=5)
+HEALTHCHECK_OCIOSA_S = 30.0   # conexão ociosa há mais que isso é testada antes do uso
+
+# erros que indicam conexão perdida (descartar em vez de devolver ao pool)
+ERROS_CONEXAO = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolConexoes:
+    """ThreadedConnectionPool com espera limitada, health check e métricas."""
+
+    def __init__(self, minconn: int = POOL_MIN, maxconn: int = POOL_MAX,
+                 espera_s: float = POOL_ESPERA_S,
+                 statement_timeout_ms: int = STATEMENT_TIMEOUT_MS,
+                 **conn_kwargs):
+        kwargs = dict(conn_kwargs)
+        kwargs.setdefault("connect_timeout", CONNECT_TIMEOUT_S)
+        kwargs.setdefault("keepalives", 1)
+        kwargs.setdefault("keepalives_idle", 30)
+        if statement_timeout_ms:
+            opts = kwargs.get("options", "")
+            kwargs["options"] = f"{opts} -c statement_timeout={int(statement_timeout_ms)}".strip()
+        self._kwargs = kwargs
+        self._minconn, self._maxconn = minconn, maxconn
+        self._espera_s = espera_s
+        self._pool: Optional[pg_pool.ThreadedConnectionPool] = None
+        self._sem = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._devolvida_em: Dict[int, float] = {}
+        self._lock_metricas = threading.Lock()   # contadores mudam de várias threads
+        self.metricas = {
+            "emprestimos": 0, "em_uso": 0, "conexoes_criadas": 0, "descartadas": 0,
+            "healthchecks": 0, "healthchecks_falhos": 0, "erros": 0,
+            "espera_total_ms": 0.0, "espera_max_ms": 0.0,
+        }
+
+    def _contar(self, chave: str, n: float = 1) -> None:
+        with self._lock_metricas:
+            self.metricas[chave] += n
+
+    def metricas_copia(self) -> Dict[str, float]:
+        with self._lock_metricas:
+            return dict(self.metricas)
+
+    def _garantir_pool(self) -> pg_pool.ThreadedConnectionPool:
+        with self._lock:
+            if self._pool is None or self._pool.closed:
+                self._pool = pg_pool.ThreadedConnectionPool(self._minconn, self._maxconn, **self._kwargs)
+            return self._pool
+
+    def _saudavel(self, conn) -> bool:
+        if conn.closed:
+            return False
+        ociosa = time.monotonic() - self._devolvida_em.get(id(conn), 0.0)
+        if ociosa < HEALTHCHECK_OCIOSA_S:
+            return True
+        self._contar("healthchecks")
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            self._contar("healthchecks_falhos")
+            return False
+
+    def emprestar(self):
+        t0 = time.monotonic()
+        if not self._sem.acquire(timeout=self._espera_s):
+            self._contar("erros")
+            raise pg_pool.PoolError(f"pool esgotado após {self._espera_s}s de espera")
+        try:
+            pool = self._garantir_pool()
+            for _ in range(2):
+                conn = pool.getconn()
+                if id(conn) not in self._devolvida_em:
+                    self._contar("conexoes_criadas")
+                    self._devolvida_em[id(conn)] = time.monotonic()
+                if self._saudavel(conn):
+                    break
+                # reconecta: descarta a quebrada e pega outra
+                self._descartar(pool, conn)
+            else:
+                conn = pool.getconn()
+                self._contar("conexoes_criadas")
+        except Exception:
+            self._sem.release()
+            self._contar("erros")
+            raise
+        espera = (time.monotonic() - t0) * 1000.0
+        with self._lock_metricas:
+            self.metricas["emprestimos"] += 1
+            self.metricas["em_uso"] += 1
+            self.metricas["espera_total_ms"] += espera
+            self.metricas["espera_max_ms"] = max(self.metricas["espera_max_ms"], espera)
+        return conn
+
+    def _descartar(self, pool, conn) -> None:
+        self._contar("descartadas")
+        self._devolvida_em.pop(id(conn), None)
+        try:
+            pool.putconn(conn, close=True)
+        except Exception:
+            pass
+
+    def devolver(self, conn, quebrada: bool = False) -> None:
+        pool = self._pool
+        try:
+            if pool is None:
+                conn.close()
+            elif quebrada or conn.closed:
+                self._descartar(pool, conn)
+            else:
+                self._devolvida_em[id(conn)] = time.monotonic()
+                pool.putconn(conn)
+        finally:
+            self._contar("em_uso", -1)
+            self._sem.release()
+
+    @contextmanager
+    def conexao(self):
+        conn = self.emprestar()
+        quebrada = False
+        try:
+            yield conn
+            conn.commit()
+        except ERROS_CONEXAO:
+            quebrada = True
+            self._contar("erros")
+            raise
+        except Exception:
+            self._contar("erros")
+            try:
+                conn.rollback()
+            except Exception:
+                quebrada = True
+            raise
+        finally:
+            self.devolver(conn, quebrada=quebrada)
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+            self._devolvida_em.clear()
+
+
+# ---------- registro de pools por nome ----------
+_pools: Dict[str, PoolConexoes] = {}
+_pools_lock = threading.Lock()
+
+def _kwargs_principal() -> Dict[str, Any]:
+    return dict(dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+
+def registrar_pool(nome: str, **kwargs) -> PoolConexoes:
+    """Cria (ou retorna) um pool nomeado; kwargs vão para psycopg2.connect (dsn=... aceito)."""
+    with _pools_lock:
+        if nome not in _pools:
+            _pools[nome] = PoolConexoes(**kwargs)
+        return _pools[nome]
+
+def obter_pool(nome: str = "principal") -> PoolConexoes:
+    with _pools_lock:
+        p = _pools.get(nome)
+    if p is not None:
+        return p
+    if nome != "principal":
+        raise KeyError(f"pool '{nome}' não registrado")
+    return registrar_pool(nome, **_kwargs_principal())
+
+@contextmanager
+def conexao(nome: str = "principal"):
+    with obter_pool(nome).conexao() as conn:
+        yield conn
+
+# comandos preparados (PREPARE) já criados em cada conexão; somem com a conexão
+_preparados: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_preparados_lock = threading.Lock()
+
+def preparar(cur, nome: str, sql: str) -> None:
+    """
+    PREPARE `nome` AS `sql` na conexão do cursor, se ainda não foi feito.
+    Vale até a conexão fechar (PREPARE não é desfeito por ROLLBACK).
+    """
+    with _preparados_lock:
+        feitos = _preparados.setdefault(cur.connection, set())
+        if nome in feitos:
+            return
+    cur.execute(f"PREPARE {nome} AS {sql}")
+    with _preparados_lock:
+        feitos.add(nome)
+
+def metricas_pools() -> Dict[str, Dict[str, float]]:
+    with _pools_lock:
+        return {nome: p.metricas_copia() for nome, p in _pools.items()}
+
+def fechar_pools() -> None:
+    with _pools_lock:
+        for p in _pools.values():
+            p.fechar()
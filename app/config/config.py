@@ -9,3 +9,69 @@ DB_PORT = config("DB_PORT", default="5432")
 
 # Intervalo entre capturas (segundos)
 TEMPO_CAPTURA = config("TEMPO_CAPTURA", cast=int, default=10)
+
+# Instrumentação de latência por etapa (grava JSON em leituras_emocionais.latencias;
+# o db_write de cada leitura vai como db_write_anterior na leitura seguinte)
+GRAVAR_LATENCIAS = config("GRAVAR_LATENCIAS", cast=bool, default=False)
+
+# Formato dos embeddings em pessoas.embedding_bin: float32 ou float16 (metade do espaço)
+EMBEDDING_DTYPE = config("EMBEDDING_DTYPE", default="float32")
+EMBEDDING_DIM   = config("EMBEDDING_DIM", cast=int, default=512)
+# Cache de embeddings por pessoa_id no processo (read/write-through); 0 = sem cache
+EMBEDDING_CACHE_TTL_S = config("EMBEDDING_CACHE_TTL_S", cast=float, default=600.0)
+# Índice da galeria em memória (config/galeria.py): recarga completa do banco a cada N segundos
+GALERIA_RECARGA_S = config("GALERIA_RECARGA_S", cast=float, default=600.0)
+# Vários templates por pessoa (config/templates.py): máximo, nitidez mínima e distância
+# cosseno mínima aos templates atuais para um rosto novo entrar
+TEMPLATES_MAX            = config("TEMPLATES_MAX", cast=int, default=5)
+TEMPLATE_NITIDEZ_MIN     = config("TEMPLATE_NITIDEZ_MIN", cast=float, default=60.0)
+TEMPLATE_DIVERSIDADE_MIN = config("TEMPLATE_DIVERSIDADE_MIN", cast=float, default=0.08)
+# Cache local da identidade (config/identidade_local.py): cold start sem esperar o banco
+IDENTIDADE_CACHE = config("IDENTIDADE_CACHE", default="~/.well/identidade.npz")
+# Índice aproximado (IVF) persistido em disco para galerias grandes (config/ann.py)
+ANN_ATIVO            = config("ANN_ATIVO", cast=bool, default=False)
+ANN_CAMINHO          = config("ANN_CAMINHO", default="~/.well/indice_ann")
+ANN_NPROBE           = config("ANN_NPROBE", cast=int, default=8)
+ANN_CAUDA_MAX_FRACAO = config("ANN_CAUDA_MAX_FRACAO", cast=float, default=0.1)
+
+# Match de identidade no servidor com pgvector (opcional; exige a extensão `vector`)
+PGVECTOR_ATIVO     = config("PGVECTOR_ATIVO", cast=bool, default=False)
+PGVECTOR_INDICE    = config("PGVECTOR_INDICE", default="hnsw")   # hnsw | ivfflat
+PGVECTOR_EF_SEARCH = config("PGVECTOR_EF_SEARCH", cast=int, default=40)
+PGVECTOR_TOP_K     = config("PGVECTOR_TOP_K", cast=int, default=5)
+
+# Gravação de leituras em lote (COPY); tamanho/idade máximos do buffer = perda máxima num crash
+GRAVACAO_EM_LOTE = config("GRAVACAO_EM_LOTE", cast=bool, default=False)
+LOTE_MAX_LINHAS  = config("LOTE_MAX_LINHAS", cast=int, default=30)
+LOTE_MAX_IDADE_S = config("LOTE_MAX_IDADE_S", cast=float, default=60.0)
+LOTE_METODO      = config("LOTE_METODO", default="copy")   # copy | values | preparado
+
+# Spool local (SQLite/WAL): toda leitura passa por ele e é sincronizada com o Postgres em segundo plano
+SPOOL_ATIVO         = config("SPOOL_ATIVO", cast=bool, default=True)
+SPOOL_CAMINHO       = config("SPOOL_CAMINHO", default="~/.well/spool.db")
+SPOOL_LOTE          = config("SPOOL_LOTE", cast=int, default=200)
+SPOOL_MAX_LINHAS    = config("SPOOL_MAX_LINHAS", cast=int, default=500000)
+SPOOL_INTERVALO_S   = config("SPOOL_INTERVALO_S", cast=float, default=30.0)
+SPOOL_BACKOFF_MAX_S = config("SPOOL_BACKOFF_MAX_S", cast=float, default=300.0)
+
+# Armazenamento compacto (config/compacto.py): leituras novas em leituras_compactas (SMALLINT/códigos);
+# leitura pelos nomes originais em vw_leituras_emocionais
+ARMAZENAMENTO_COMPACTO = config("ARMAZENAMENTO_COMPACTO", cast=bool, default=False)
+
+# Log no banco (logs_sistema): fila limitada + INSERT em lote numa thread; fila cheia => descartar | arquivo
+LOG_BANCO_FILA_MAX   = config("LOG_BANCO_FILA_MAX", cast=int, default=5000)
+LOG_BANCO_LOTE       = config("LOG_BANCO_LOTE", cast=int, default=200)
+LOG_BANCO_FLUSH_S    = config("LOG_BANCO_FLUSH_S", cast=float, default=2.0)
+LOG_BANCO_CHEIO      = config("LOG_BANCO_CHEIO", default="arquivo")
+LOG_BANCO_TRANSBORDO = config("LOG_BANCO_TRANSBORDO", default="~/.well/log_pendente.jsonl")
+
+# Particionamento de leituras_emocionais e leituras_compactas por data_captura (mes | semana) e retenção;
+# a conversão das tabelas é explícita: python -m config.particoes --converter
+PARTICIONAR_LEITURAS   = config("PARTICIONAR_LEITURAS", cast=bool, default=True)
+PARTICAO_GRANULARIDADE = config("PARTICAO_GRANULARIDADE", default="mes")
+PARTICOES_A_FRENTE     = config("PARTICOES_A_FRENTE", cast=int, default=3)
+RETENCAO_DIAS          = config("RETENCAO_DIAS", cast=int, default=0)        # 0 = guarda tudo
+RETENCAO_ACAO          = config("RETENCAO_ACAO", default="detach")           # detach | drop
+
+# Job de rollups (config/rollups.py): ligue em um agente só, ou rode python -m config.rollups à parte
+ROLLUPS_ATIVO = config("ROLLUPS_ATIVO", cast=bool, default=False)
@@ -1,189 +1,364 @@
 # app/config/database.py
+import io
 import json
-import psycopg2
-from psycopg2.extras import Json
-from typing import Any, Dict, Optional
+import threading
+import time
+from psycopg2.extras import Json, execute_batch, execute_values
+from typing import Any, Container, Dict, List, Optional
 
-from config.config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+from config.config import (GRAVACAO_EM_LOTE, SPOOL_ATIVO, EMBEDDING_DTYPE, EMBEDDING_CACHE_TTL_S,
+                           ARMAZENAMENTO_COMPACTO)
+from config.conexao import conexao, preparar
+from config.leitura import COLUNAS_LEITURA, Leitura
 from config.log import logger
 
-# ---- conjunto permitido (alinhado ao CHECK do banco) ----
-PERMITIDAS = {
-    "feliz", "triste", "medo", "raiva", "desgosto", "surpresa", "neutro", "usuario_ausente"
-}
-
-# ---------- Conexão ----------
-def _conn():
-    return psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT,
-    )
-
 # ---------- Tabelas (opcional: chame no startup) ----------
-def ensure_tables():
-    """Cria/ajusta tabelas necessárias (idempotente)."""
+def ensure_tables() -> bool:
+    """
+    Aplica as migrações pendentes (app/migracoes, ver config/migracoes.py) e
+    liga o pgvector se configurado. No caso comum é uma consulta à schema_version.
+    Retorna False se falhou (ex.: banco fora): quem chama pode tentar de novo.
+    """
     try:
-        conn = _conn()
-        cur = conn.cursor()
-
-        # Tabela de pessoas (embedding em JSONB)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS pessoas (
-              pessoa_id   VARCHAR(64) PRIMARY KEY,
-              embedding   JSONB NOT NULL,
-              created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # Colunas extras na leituras_emocionais (se ainda não existirem)
-        cur.execute("""
-            ALTER TABLE leituras_emocionais
-              ADD COLUMN IF NOT EXISTS camera_status VARCHAR(30) DEFAULT 'ok',
-              ADD COLUMN IF NOT EXISTS face_status   VARCHAR(30) DEFAULT 'ok',
-              ADD COLUMN IF NOT EXISTS mesma_pessoa  BOOLEAN,
-              ADD COLUMN IF NOT EXISTS qualidade     REAL,
-              ADD COLUMN IF NOT EXISTS brilho        REAL,
-              ADD COLUMN IF NOT EXISTS face_distance REAL;
-        """)
-
-        conn.commit()
-        cur.close()
-        conn.close()
-        logger.info("Tabelas verificadas/criadas com sucesso.")
+        from config.migracoes import aplicar_migracoes
+        aplicar_migracoes()
+        from config.vetores import ensure_pgvector
+        ensure_pgvector()
+        return True
     except Exception as e:
         logger.exception(f"Erro ao garantir tabelas: {e}")
-
-# ---------- helpers ----------
-def _normalizar_dominante(emocoes: Optional[Dict[str, float]]) -> str:
-    """Escolhe a dominante e garante que está no set PERMITIDAS."""
-    if not emocoes:
-        return "usuario_ausente"
-    # pega a chave com maior valor
-    dom = max(emocoes, key=emocoes.get)
-    dom = (dom or "").strip().lower()
-    # alguns modelos/flows podem vir com inglês por engano — mapeia rápido
-    mapa_en_pt = {
-        "happy": "feliz",
-        "sad": "triste",
-        "fear": "medo",
-        "angry": "raiva",
-        "disgust": "desgosto",
-        "surprise": "surpresa",
-        "neutral": "neutro",
-        "usuario_ausente": "usuario_ausente",
-    }
-    dom = mapa_en_pt.get(dom, dom)
-    if dom not in PERMITIDAS:
-        dom = "usuario_ausente"
-    return dom
+        return False
 
 # ---------- Embeddings ----------
+# Gravados como bytes little-endian (float32: 2 KB p/ 512 dims; float16: 1 KB)
+# e lidos direto com np.frombuffer, sem passar por JSON.
+_DTYPES_EMBEDDING = {"float32": "<f4", "float16": "<f2"}
+
+def embedding_para_bytes(emb_array: Any, dtype: str = EMBEDDING_DTYPE) -> bytes:
+    import numpy as np
+    return np.asarray(emb_array, dtype=_DTYPES_EMBEDDING[dtype]).tobytes()
+
+def embedding_de_bytes(buf, dtype: Optional[str] = None):
+    """bytes/memoryview do BYTEA -> np.array(float32)."""
+    import numpy as np
+    arr = np.frombuffer(buf, dtype=_DTYPES_EMBEDDING[dtype or "float32"])
+    return arr if arr.dtype == np.float32 and arr.dtype.isnative else arr.astype("float32")
+
+def _decodificar_embedding(emb_bin, emb_dtype, emb_json):
+    import numpy as np
+    if emb_bin is not None:
+        return embedding_de_bytes(emb_bin, emb_dtype)
+    if emb_json is not None:
+        # linha antiga, ainda em JSONB
+        return np.array(emb_json, dtype="float32")
+    return None
+
+# Cache do processo: pessoa_id -> (validade, embedding ou None). carregar_embedding_db
+# é chamado no bootstrap, a cada reatribuição e na validação do ID local; com o
+# cache, só a primeira consulta (ou a primeira depois do TTL) vai ao banco.
+# salvar_embedding_db invalida e grava no cache depois do commit (write-through).
+# "Não existe" também fica em cache até o TTL ou até um save.
+_cache_emb: Dict[str, tuple] = {}
+_cache_emb_lock = threading.Lock()
+_cache_emb_metricas = {"hits": 0, "misses": 0, "expirados": 0, "invalidacoes": 0}
+
+def guardar_cache_embedding(pessoa_id: str, emb) -> None:
+    if EMBEDDING_CACHE_TTL_S <= 0:
+        return
+    if emb is not None:
+        import numpy as np
+        emb = np.array(emb, dtype="float32")
+        emb.flags.writeable = False   # compartilhado entre chamadores
+    with _cache_emb_lock:
+        _cache_emb[pessoa_id] = (time.monotonic() + EMBEDDING_CACHE_TTL_S, emb)
+
+def invalidar_cache_embedding(pessoa_id: Optional[str] = None) -> None:
+    """Remove uma pessoa do cache (ou todas, sem argumento)."""
+    with _cache_emb_lock:
+        if pessoa_id is None:
+            _cache_emb.clear()
+        else:
+            _cache_emb.pop(pessoa_id, None)
+        _cache_emb_metricas["invalidacoes"] += 1
+
+def metricas_cache_embedding() -> Dict[str, float]:
+    with _cache_emb_lock:
+        m = dict(_cache_emb_metricas, tamanho=len(_cache_emb))
+    consultas = m["hits"] + m["misses"]
+    m["taxa_hit"] = round(m["hits"] / consultas, 3) if consultas else 0.0
+    return m
+
+def gravar_embedding(cur, pessoa_id: str, emb_array: Any) -> bytes:
+    """Upsert do embedding em pessoas na transação de `cur`; chame depois_de_gravar_embedding após o commit."""
+    buf = embedding_para_bytes(emb_array)
+    cur.execute("""
+        INSERT INTO pessoas (pessoa_id, embedding_bin, embedding_dtype)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (pessoa_id) DO UPDATE
+          SET embedding_bin = EXCLUDED.embedding_bin,
+              embedding_dtype = EXCLUDED.embedding_dtype,
+              embedding = NULL
+    """, (pessoa_id, buf, EMBEDDING_DTYPE))
+    from config.vetores import pgvector_ativo, salvar_vetor
+    if pgvector_ativo():
+        salvar_vetor(cur, pessoa_id, emb_array)
+    return buf
+
+def depois_de_gravar_embedding(pessoa_id: str, buf: bytes, emb_array: Any) -> None:
+    """Cache e índices do processo (galeria, ANN) com o embedding já commitado."""
+    # o que o banco devolveria: passa pelo EMBEDDING_DTYPE (float16 perde precisão)
+    guardar_cache_embedding(pessoa_id, embedding_de_bytes(buf, EMBEDDING_DTYPE))
+    from config.galeria import registrar_embedding
+    from config.ann import registrar_embedding as registrar_ann
+    registrar_embedding(pessoa_id, emb_array)
+    registrar_ann(pessoa_id, emb_array)
+
 def salvar_embedding_db(pessoa_id: str, emb_array: Any) -> None:
     """
-    Salva/atualiza o embedding de uma pessoa em JSONB.
+    Salva/atualiza o embedding de uma pessoa (BYTEA em EMBEDDING_DTYPE).
     emb_array: numpy array OU list de floats.
     """
+    invalidar_cache_embedding(pessoa_id)
     try:
-        emb_list = emb_array.tolist() if hasattr(emb_array, "tolist") else list(emb_array)
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO pessoas (pessoa_id, embedding)
-            VALUES (%s, %s)
-            ON CONFLICT (pessoa_id) DO UPDATE
-              SET embedding = EXCLUDED.embedding
-        """, (pessoa_id, Json(emb_list)))
-        conn.commit(); cur.close(); conn.close()
-        logger.debug(f"Embedding salvo para pessoa_id={pessoa_id} (len={len(emb_list)})")
+        with conexao() as conn, conn.cursor() as cur:
+            buf = gravar_embedding(cur, pessoa_id, emb_array)
+        depois_de_gravar_embedding(pessoa_id, buf, emb_array)
+        logger.debug(f"Embedding salvo para pessoa_id={pessoa_id} ({len(buf)} bytes, {EMBEDDING_DTYPE})")
     except Exception as e:
         logger.exception(f"Erro ao salvar embedding no banco: {e}")
 
 def carregar_embedding_db(pessoa_id: str):
     """
-    Retorna o embedding como numpy array (float32) ou None se não existir.
+    Retorna o embedding como numpy array (float32, só leitura) ou None se não
+    existir. Servido do cache do processo enquanto válido (EMBEDDING_CACHE_TTL_S).
     """
+    with _cache_emb_lock:
+        item = _cache_emb.get(pessoa_id)
+        if item is not None and item[0] > time.monotonic():
+            _cache_emb_metricas["hits"] += 1
+            return item[1]
+        _cache_emb_metricas["misses"] += 1
+        if item is not None:
+            _cache_emb_metricas["expirados"] += 1
     try:
-        import numpy as np
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("SELECT embedding FROM pessoas WHERE pessoa_id=%s", (pessoa_id,))
-        row = cur.fetchone()
-        cur.close(); conn.close()
-        if row and row[0] is not None:
-            return np.array(row[0], dtype="float32")
-        return None
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("SELECT embedding_bin, embedding_dtype, embedding FROM pessoas WHERE pessoa_id=%s", (pessoa_id,))
+            row = cur.fetchone()
+        emb = _decodificar_embedding(*row) if row else None
     except Exception as e:
+        # erro não entra no cache: a próxima chamada tenta o banco de novo
         logger.exception(f"Erro ao carregar embedding do banco: {e}")
         return None
+    guardar_cache_embedding(pessoa_id, emb)
+    return emb
+
+def _migrar_lote_embeddings(cur, lote: int) -> int:
+    cur.execute("""
+        SELECT pessoa_id, embedding FROM pessoas
+         WHERE embedding_bin IS NULL AND embedding IS NOT NULL
+         LIMIT %s FOR UPDATE SKIP LOCKED
+    """, (lote,))
+    rows = cur.fetchall()
+    if rows:
+        execute_values(cur, """
+            UPDATE pessoas p
+               SET embedding_bin = v.bin, embedding_dtype = v.dtype, embedding = NULL
+              FROM (VALUES %s) AS v(pessoa_id, bin, dtype)
+             WHERE p.pessoa_id = v.pessoa_id
+        """, [(pid, embedding_para_bytes(emb), EMBEDDING_DTYPE) for pid, emb in rows])
+    return len(rows)
+
+def migrar_embeddings_binarios(lote: int = 500, cur=None) -> int:
+    """
+    Converte linhas antigas (embedding JSONB) para embedding_bin e limpa o JSONB.
+    Idempotente. Com `cur` (migração 0006) roda inteira na transação de quem
+    chama, atômica com o registro da versão; sem `cur`, em lotes curtos com
+    conexões próprias para não segurar locks. Retorna quantas migrou.
+    """
+    total = 0
+    while True:
+        if cur is None:
+            with conexao() as conn, conn.cursor() as c:
+                n = _migrar_lote_embeddings(c, lote)
+        else:
+            n = _migrar_lote_embeddings(cur, lote)
+        if not n:
+            break
+        total += n
+    if total:
+        logger.info(f"Embeddings migrados de JSONB para binário: {total}")
+    return total
 
 # ---------- Leituras (emoções + recursos + metadata) ----------
-def salvar_em_banco(
+_IDX_LATENCIAS = COLUNAS_LEITURA.index("latencias")
+
+def linha_leitura(
     emocoes: Optional[Dict[str, float]],
     recursos: Dict[str, float],
     data_captura,
     pessoa_id: str,
     meta: Optional[Dict[str, Any]] = None
-) -> None:
+) -> tuple:
+    """Tupla na ordem de COLUNAS_LEITURA (atalho para Leitura(...).como_tupla())."""
+    return Leitura(pessoa_id, data_captura, emocoes, recursos, meta).como_tupla()
+
+def _copy_valor(v) -> str:
+    """Formata um valor para COPY ... FROM STDIN (formato text)."""
+    if v is None:
+        return r"\N"
+    if isinstance(v, bool):
+        return "t" if v else "f"
+    if isinstance(v, (dict, list)):
+        v = json.dumps(v)
+    elif hasattr(v, "isoformat"):
+        v = v.isoformat()
+    return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _adaptar_json(linhas: List[tuple]) -> List[tuple]:
+    return [
+        l[:_IDX_LATENCIAS] + (Json(l[_IDX_LATENCIAS]) if l[_IDX_LATENCIAS] is not None else None,) + l[_IDX_LATENCIAS + 1:]
+        for l in linhas
+    ]
+
+def _insert_preparado(cur, tabela: str, idempotente: bool) -> str:
+    """PREPARE do INSERT de uma leitura nesta conexão (uma vez); retorna o nome."""
+    nome = f"ins_{tabela}" + ("_idem" if idempotente else "")
+    params = ", ".join(f"${i}" for i in range(1, len(COLUNAS_LEITURA) + 1))
+    conflito = " ON CONFLICT DO NOTHING" if idempotente else ""
+    preparar(cur, nome, f"INSERT INTO {tabela} ({', '.join(COLUNAS_LEITURA)}) VALUES ({params}){conflito}")
+    return nome
+
+_EXECUTE_PARAMS = ", ".join(["%s"] * len(COLUNAS_LEITURA))
+
+def inserir_leituras(linhas: List[tuple], metodo: str = "copy", cur=None,
+                     tabela: str = "leituras_emocionais", idempotente: bool = False,
+                     status_novos: Optional[Dict[str, int]] = None) -> int:
     """
-    meta: {
-      camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance
-    }
+    Grava várias leituras numa transação.
+    metodo: "copy" (COPY FROM STDIN), "values" (execute_values, multi-row INSERT)
+            ou "preparado" (EXECUTE de um INSERT preparado no servidor; sem re-parse/re-plan).
+    idempotente: ignora leituras cujo leitura_uuid já está no banco (reenvio do spool);
+    no COPY isso passa por uma tabela temporária de staging.
+    Com ARMAZENAMENTO_COMPACTO o destino padrão vira leituras_compactas e as
+    linhas são codificadas aqui (config/compacto.py); status_novos recebe os
+    códigos de status resolvidos no banco, para quem controla a transação
+    passar a registrar_status() depois do commit (sem `cur` isso é feito aqui).
+    Levanta exceção em falha (quem chama decide se re-enfileira).
+    """
+    if not linhas:
+        return 0
+    from config.compacto import TABELA_COMPACTA, codificar_linhas, registrar_status
+    if cur is None:
+        novos: Dict[str, int] = {}
+        with conexao() as conn, conn.cursor() as c:
+            n = inserir_leituras(linhas, metodo, c, tabela, idempotente, novos)
+        registrar_status(novos)   # commitados
+        return n
+    if tabela == "leituras_emocionais" and ARMAZENAMENTO_COMPACTO:
+        tabela = TABELA_COMPACTA
+    if tabela == TABELA_COMPACTA:
+        linhas, resolvidos = codificar_linhas(linhas, cur)
+        if status_novos is not None:
+            status_novos.update(resolvidos)
+    cols = ", ".join(COLUNAS_LEITURA)
+    conflito = " ON CONFLICT DO NOTHING" if idempotente else ""
+    if metodo == "copy":
+        buf = io.StringIO()
+        for linha in linhas:
+            buf.write("\t".join(_copy_valor(v) for v in linha))
+            buf.write("\n")
+        buf.seek(0)
+        if not idempotente:
+            cur.copy_expert(f"COPY {tabela} ({cols}) FROM STDIN", buf)
+            return len(linhas)
+        stage = f"_stage_{tabela}"
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} "
+                    f"(LIKE {tabela} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+        cur.copy_expert(f"COPY {stage} ({cols}) FROM STDIN", buf)
+        cur.execute(f"INSERT INTO {tabela} ({cols}) SELECT {cols} FROM {stage}{conflito}")
+        return cur.rowcount
+    if metodo == "preparado":
+        nome = _insert_preparado(cur, tabela, idempotente)
+        sql = f"EXECUTE {nome} ({_EXECUTE_PARAMS})"
+        if len(linhas) == 1:
+            cur.execute(sql, _adaptar_json(linhas)[0])
+        else:
+            execute_batch(cur, sql, _adaptar_json(linhas), page_size=100)
+        return len(linhas)
+    execute_values(cur, f"INSERT INTO {tabela} ({cols}) VALUES %s{conflito}", _adaptar_json(linhas), page_size=500)
+    return len(linhas)
+
+def gravar_leitura(leitura: Leitura) -> None:
+    """
+    Persiste uma Leitura. Com SPOOL_ATIVO (padrão) vai para o spool local
+    (config/spool.py) e é sincronizada em segundo plano — não espera pela rede
+    nem se perde com o banco fora. Com GRAVACAO_EM_LOTE vai para o buffer em
+    memória (config/lote.py); senão, um INSERT preparado imediato.
     """
-    meta = meta or {}
-    camera_status = meta.get("camera_status", "ok")
-    face_status   = meta.get("face_status", "ok")
-    mesma_pessoa  = meta.get("mesma_pessoa", None)
-    qualidade     = meta.get("qualidade", None)
-    brilho        = meta.get("brilho", None)
-    face_distance = meta.get("face_distance", None)
+    linha = leitura.como_tupla()
+    resumo = (f"pessoa={leitura.pessoa_id} estado={leitura.emocao_dominante} "
+              f"cam={leitura.camera_status} face={leitura.face_status}")
 
-    # Dominante saneada para não violar CHECK
-    dominante = _normalizar_dominante(emocoes)
+    if SPOOL_ATIVO:
+        from config.spool import obter_spool
+        try:
+            obter_spool().adicionar(linha, leitura.leitura_uuid)
+            logger.info(f"Registro no spool — {resumo}")
+            return
+        except Exception as e:
+            # disco local com problema: cai para o INSERT direto abaixo
+            logger.exception(f"❌ Erro ao gravar no spool: {e}")
+    elif GRAVACAO_EM_LOTE:
+        from config.lote import obter_buffer
+        obter_buffer().adicionar(linha)
+        logger.info(f"Registro enfileirado — {resumo}")
+        return
 
     try:
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO leituras_emocionais (
-              pessoa_id, data_captura,
-              raiva, desgosto, medo, feliz, triste, surpresa, neutro, emocao_dominante,
-              cpu, memoria, disco,
-              camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance
-            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,
-                      %s,%s,%s,
-                      %s,%s,%s,%s,%s,%s)
-        """, (
-            pessoa_id, data_captura,
-            (emocoes or {}).get("raiva", 0),
-            (emocoes or {}).get("desgosto", 0),
-            (emocoes or {}).get("medo", 0),
-            (emocoes or {}).get("feliz", 0),
-            (emocoes or {}).get("triste", 0),
-            (emocoes or {}).get("surpresa", 0),
-            (emocoes or {}).get("neutro", 0),
-            dominante,
-            recursos.get("cpu", 0), recursos.get("mem", 0), recursos.get("disk", 0),
-            camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance
-        ))
-        conn.commit(); cur.close(); conn.close()
-        logger.info(f"Registro salvo — pessoa={pessoa_id} estado={dominante} cam={camera_status} face={face_status}")
+        inserir_leituras([linha], metodo="preparado", idempotente=True)
+        logger.info(f"Registro salvo — {resumo}")
     except Exception as e:
         logger.exception(f"❌ Erro ao salvar no banco: {e}")
 
-def listar_pessoas_embeddings():
+def salvar_em_banco(
+    emocoes: Optional[Dict[str, float]],
+    recursos: Dict[str, float],
+    data_captura,
+    pessoa_id: str,
+    meta: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    meta: {
+      camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance,
+      perfil_energia, perfil_transicao, latencias, identidade_idade_s
+    }
+    Monta a Leitura e delega para gravar_leitura.
+    """
+    gravar_leitura(Leitura(pessoa_id, data_captura, emocoes, recursos, meta))
+
+def listar_pessoas_embeddings(exceto: Optional[Container[str]] = None):
     """
     Retorna lista de (pessoa_id, np.array(float32)) com embeddings existentes.
+    exceto: ids já conhecidos; lista os ids primeiro e só traz os embeddings
+    dos demais (sincronização incremental do índice ANN).
     """
-    import numpy as np
     try:
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("SELECT pessoa_id, embedding FROM pessoas")
-        rows = cur.fetchall()
-        cur.close(); conn.close()
+        with conexao() as conn, conn.cursor() as cur:
+            if exceto is None:
+                cur.execute("SELECT pessoa_id, embedding_bin, embedding_dtype, embedding FROM pessoas")
+            else:
+                cur.execute("SELECT pessoa_id FROM pessoas")
+                novos = [pid for (pid,) in cur.fetchall() if pid not in exceto]
+                if not novos:
+                    return []
+                cur.execute("SELECT pessoa_id, embedding_bin, embedding_dtype, embedding FROM pessoas "
+                            "WHERE pessoa_id = ANY(%s)", (novos,))
+            rows = cur.fetchall()
         out = []
-        for pid, emb in rows:
+        for pid, emb_bin, emb_dtype, emb_json in rows:
+            emb = _decodificar_embedding(emb_bin, emb_dtype, emb_json)
             if emb is not None:
-                out.append((pid, np.array(emb, dtype="float32")))
+                out.append((pid, emb))
         return out
     except Exception as e:
         logger.exception(f"Erro ao listar embeddings: {e}")
@@ -3,10 +3,10 @@ from deepface import DeepFace
 import cv2
 import numpy as np
 
-def detectar_rosto(img_path: str) -> bool:
-    """Retorna True se DeepFace/RetinaFace detectar rosto."""
+def detectar_rosto(img_path: str, detector_backend: str = "retinaface") -> bool:
+    """Retorna True se DeepFace detectar rosto (retinaface por padrão; 'ssd'/'opencv' são mais leves)."""
     try:
-        dets = DeepFace.extract_faces(img_path=img_path, detector_backend='retinaface', enforce_detection=False)
+        dets = DeepFace.extract_faces(img_path=img_path, detector_backend=detector_backend, enforce_detection=False)
         return len(dets) > 0
     except Exception:
         return False
@@ -66,3 +66,13 @@ def medir_brilho_nitidez(img_path: str):
     brilho = float(np.mean(gray))
     nitidez = float(cv2.Laplacian(gray, cv2.CV_64F).var())
     return brilho, nitidez
+
+def assinatura_quadro(img_path: str, lado: int = 16):
+    """
+    Miniatura lado x lado em cinza (uint8) para detectar mudança de cena
+    entre ciclos sem rodar o modelo (config/verificacao.py).
+    """
+    gray = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    return cv2.resize(gray, (lado, lado), interpolation=cv2.INTER_AREA)
@@ -0,0 +1,125 @@
+# app/config/energia.py
+import sys
+import time
+from typing import Any, Dict, Optional
+
+import psutil
+
+from config.log import logger
+
+# ---- perfis (intervalo em s, detector, threads de inferência, checagem de identidade) ----
+PERFIS: Dict[str, Dict[str, Any]] = {
+    "tomada":        {"intervalo": 10, "detector": "retinaface", "threads": 4, "verificar_identidade": True},
+    "bateria":       {"intervalo": 30, "detector": "ssd",        "threads": 2, "verificar_identidade": True},
+    "bateria_baixa": {"intervalo": 90, "detector": "opencv",     "threads": 1, "verificar_identidade": False},
+    "termico":       {"intervalo": 60, "detector": "opencv",     "threads": 1, "verificar_identidade": False},
+}
+PERFIL_PADRAO = "tomada"
+
+BATERIA_BAIXA_LIMIAR = 20.0    # % restante
+TEMP_LIMIAR_C        = 85.0    # °C no sensor mais quente
+TEMP_HISTERESE_C     = 5.0     # só sai do 'termico' abaixo de LIMIAR - HISTERESE
+TTL_DETECCAO         = 30.0    # s entre consultas aos sensores
+
+
+def _ler_bateria():
+    """Retorna (percent, na_tomada) ou (None, None) se não houver bateria."""
+    try:
+        bat = psutil.sensors_battery()
+    except Exception:
+        return None, None
+    if bat is None:
+        return None, None
+    return float(bat.percent), bool(bat.power_plugged)
+
+def _ler_temperatura_max() -> Optional[float]:
+    """Maior temperatura atual entre os sensores (só Linux/FreeBSD expõem)."""
+    fn = getattr(psutil, "sensors_temperatures", None)
+    if fn is None:
+        return None
+    try:
+        sensores = fn() or {}
+    except Exception:
+        return None
+    temps = [t.current for lista in sensores.values() for t in lista if t.current is not None]
+    return max(temps) if temps else None
+
+
+def aplicar_threads(n: int) -> None:
+    """Limita threads de inferência (OpenCV e, se já carregado, TensorFlow)."""
+    try:
+        import cv2
+        cv2.setNumThreads(int(n))
+    except Exception:
+        pass
+    tf = sys.modules.get("tensorflow")
+    if tf is not None:
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(int(n))
+            tf.config.threading.set_inter_op_parallelism_threads(int(n))
+        except Exception:
+            # TF só aceita antes de inicializar o runtime; mantém o atual
+            pass
+
+
+class GerenciadorEnergia:
+    """
+    Detecta o perfil de energia (tomada, bateria, bateria_baixa, termico)
+    com cache de TTL_DETECCAO e registra transições.
+    """
+
+    def __init__(self, perfis: Optional[Dict[str, Dict[str, Any]]] = None,
+                 ttl: float = TTL_DETECCAO,
+                 ler_bateria=_ler_bateria,
+                 ler_temperatura=_ler_temperatura_max,
+                 relogio=time.monotonic):
+        self.perfis = perfis or PERFIS
+        self.ttl = ttl
+        self._ler_bateria = ler_bateria
+        self._ler_temperatura = ler_temperatura
+        self._relogio = relogio
+        self.nome = PERFIL_PADRAO
+        self._ultima_deteccao = None
+        self._transicao_pendente: Optional[str] = None
+        aplicar_threads(self.perfil["threads"])
+
+    @property
+    def perfil(self) -> Dict[str, Any]:
+        return self.perfis[self.nome]
+
+    def _detectar(self) -> str:
+        temp = self._ler_temperatura()
+        if temp is not None:
+            limiar = TEMP_LIMIAR_C - (TEMP_HISTERESE_C if self.nome == "termico" else 0.0)
+            if temp >= limiar:
+                return "termico"
+        pct, na_tomada = self._ler_bateria()
+        if pct is None or na_tomada:
+            return "tomada"
+        if pct <= BATERIA_BAIXA_LIMIAR:
+            return "bateria_baixa"
+        return "bateria"
+
+    def atualizar(self) -> Dict[str, Any]:
+        """Reavalia o perfil (respeitando o TTL) e o devolve."""
+        agora = self._relogio()
+        if self._ultima_deteccao is not None and agora - self._ultima_deteccao < self.ttl:
+            return self.perfil
+        self._ultima_deteccao = agora
+        novo = self._detectar()
+        if novo != self.nome:
+            logger.info(f"[ENERGIA] perfil {self.nome} -> {novo}")
+            self._transicao_pendente = f"{self.nome}->{novo}"
+            self.nome = novo
+            aplicar_threads(self.perfil["threads"])
+        return self.perfil
+
+    def intervalo(self, intervalo_politica: float) -> float:
+        """Intervalo de captura: o perfil só alonga o da política, nunca encurta."""
+        return max(intervalo_politica, self.perfil["intervalo"])
+
+    def anotar_meta(self, meta: Dict[str, Any]) -> None:
+        """Grava perfil atual e (uma única vez) a transição ocorrida na leitura."""
+        meta["perfil_energia"] = self.nome
+        meta["perfil_transicao"] = self._transicao_pendente
+        self._transicao_pendente = None
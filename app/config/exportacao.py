@@ -0,0 +1,279 @@
+# app/config/exportacao.py
+"""
+Exportação em streaming das leituras para Parquet particionado (pyarrow).
+
+    exportar_parquet("/dados/export", inicio=datetime(2026, 9, 1), fim=datetime(2026, 10, 1))
+
+    python -m config.exportacao --destino /dados/export --inicio 2026-09-01 --fim 2026-10-01 \\
+        [--pessoa p1 --pessoa p2] [--particao dia|mes] [--linhas-por-grupo 100000]
+
+- Lê por cursor no servidor (named cursor, FETCH de `lote_cursor` linhas),
+  uma transação por partição de saída; cada FETCH vira um RecordBatch na
+  hora. Memória no cliente ~ um row group em Arrow + um lote do cursor.
+- Saída Hive: destino/dia=2026-09-01/parte-00000.parquet (ou mes=2026-09),
+  lida direto por pyarrow.dataset / pandas / DuckDB / Spark.
+- Cada arquivo tem até `grupos_por_arquivo` row groups de `linhas_por_grupo`
+  linhas; é escrito como .tmp e renomeado ao fechar. Depois de cada arquivo
+  fechado, _checkpoint.json guarda a última (data_captura, id) exportada;
+  rodar de novo com o mesmo filtro continua dali (parciais .tmp são
+  descartados). Exportação concluída não refaz nada.
+
+No modo compacto lê de vw_leituras_emocionais, com os nomes/tipos originais.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from config.compacto import ORIGEM_LEITURAS
+from config.conexao import conexao
+from config.leitura import COLUNAS_LEITURA
+from config.log import logger
+
+LINHAS_POR_GRUPO = 100_000
+GRUPOS_POR_ARQUIVO = 10
+LOTE_CURSOR = 10_000
+COMPRESSAO = "zstd"
+CHECKPOINT = "_checkpoint.json"
+
+COLUNAS_EXPORT = ["id", *COLUNAS_LEITURA, "inserido_em"]
+# jsonb/uuid saem como texto (o driver não precisa montar dict/UUID por linha)
+_EXPR_SQL = {"latencias": "latencias::text", "leitura_uuid": "leitura_uuid::text"}
+_IDX_DATA = COLUNAS_EXPORT.index("data_captura")
+_IDX_ID = COLUNAS_EXPORT.index("id")
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("exportação Parquet requer pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+def esquema_arrow():
+    pa, _ = _arrow()
+    tipos = {
+        "id": pa.int64(),
+        "data_captura": pa.timestamp("us"),
+        "inserido_em": pa.timestamp("us", tz="UTC"),
+        "mesma_pessoa": pa.bool_(),
+    }
+    for c in ("raiva", "desgosto", "medo", "feliz", "triste", "surpresa", "neutro",
+              "cpu", "memoria", "disco", "qualidade", "brilho", "face_distance",
+              "identidade_idade_s"):
+        tipos[c] = pa.float32()
+    return pa.schema([(c, tipos.get(c, pa.string())) for c in COLUNAS_EXPORT])
+
+
+# ---------- períodos de saída ----------
+def _inicio_particao(dt: datetime, particao: str) -> datetime:
+    if particao == "dia":
+        return datetime(dt.year, dt.month, dt.day)
+    if particao == "mes":
+        return datetime(dt.year, dt.month, 1)
+    raise ValueError(f"partição desconhecida: {particao}")
+
+def _proxima_particao(ini: datetime, particao: str) -> datetime:
+    if particao == "dia":
+        return ini + timedelta(days=1)
+    return datetime(ini.year + ini.month // 12, ini.month % 12 + 1, 1)
+
+def _nome_particao(ini: datetime, particao: str) -> str:
+    return f"dia={ini:%Y-%m-%d}" if particao == "dia" else f"mes={ini:%Y-%m}"
+
+
+# ---------- checkpoint ----------
+def _ler_checkpoint(destino: str) -> Optional[dict]:
+    caminho = os.path.join(destino, CHECKPOINT)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+def _gravar_checkpoint(destino: str, ck: dict) -> None:
+    caminho = os.path.join(destino, CHECKPOINT)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(ck, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(caminho + ".tmp", caminho)
+
+def _descartar_parciais(destino: str) -> None:
+    for raiz, _, arquivos in os.walk(destino):
+        for a in arquivos:
+            if a.endswith(".parquet.tmp"):
+                os.remove(os.path.join(raiz, a))
+
+def _limites(pessoas: Optional[List[str]]) -> tuple:
+    filtro, params = "", {}
+    if pessoas:
+        filtro, params = "WHERE pessoa_id = ANY(%(pessoas)s)", {"pessoas": pessoas}
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"SELECT MIN(data_captura), MAX(data_captura) FROM {ORIGEM_LEITURAS} {filtro}", params)
+        return cur.fetchone()
+
+
+class _Escritor:
+    """Arquivos de uma partição de saída: row groups de tamanho fixo, .tmp -> .parquet ao fechar."""
+
+    def __init__(self, destino, particao_dir, esquema, linhas_por_grupo, grupos_por_arquivo,
+                 compressao, ck):
+        self.dir = os.path.join(destino, particao_dir)
+        self.destino, self.esquema, self.ck = destino, esquema, ck
+        self.linhas_por_grupo, self.grupos_por_arquivo = linhas_por_grupo, grupos_por_arquivo
+        self.compressao = compressao
+        self._pendentes: list = []     # RecordBatches ainda não escritos
+        self._n_pendentes = 0
+        self._writer = None
+        self._grupos = 0
+        self._linhas_arquivo = 0
+        self._ultimo = None            # (data_captura, id) da última linha já escrita no arquivo aberto
+
+    def adicionar(self, lote) -> None:
+        self._pendentes.append(lote)
+        self._n_pendentes += lote.num_rows
+        while self._n_pendentes >= self.linhas_por_grupo:
+            self._escrever_grupo(self.linhas_por_grupo)
+
+    def _escrever_grupo(self, n: int) -> None:
+        pa, pq = _arrow()
+        tabela = pa.Table.from_batches(self._pendentes, schema=self.esquema)
+        grupo, resto = tabela.slice(0, n), tabela.slice(n)
+        if self._writer is None:
+            os.makedirs(self.dir, exist_ok=True)
+            self._arquivo = os.path.join(self.dir, f"parte-{self._proximo_numero():05d}.parquet")
+            self._writer = pq.ParquetWriter(self._arquivo + ".tmp", self.esquema, compression=self.compressao)
+        self._writer.write_table(grupo, row_group_size=n)
+        self._ultimo = (grupo.column("data_captura")[n - 1].as_py(), grupo.column("id")[n - 1].as_py())
+        self._grupos += 1
+        self._linhas_arquivo += n
+        self._pendentes = resto.to_batches()
+        self._n_pendentes = resto.num_rows
+        if self._grupos >= self.grupos_por_arquivo:
+            self._fechar_arquivo()
+
+    def _proximo_numero(self) -> int:
+        prefixo = os.path.relpath(self.dir, self.destino) + os.sep
+        return sum(1 for a in self.ck["arquivos"] if a.startswith(prefixo))
+
+    def _fechar_arquivo(self) -> None:
+        self._writer.close()
+        os.replace(self._arquivo + ".tmp", self._arquivo)
+        self.ck["arquivos"].append(os.path.relpath(self._arquivo, self.destino))
+        self.ck["linhas"] += self._linhas_arquivo
+        self.ck["apos"] = [self._ultimo[0].isoformat(), self._ultimo[1]]
+        _gravar_checkpoint(self.destino, self.ck)
+        self._writer, self._grupos, self._linhas_arquivo = None, 0, 0
+
+    def fechar(self) -> None:
+        if self._n_pendentes:
+            self._escrever_grupo(self._n_pendentes)
+        if self._writer is not None:
+            self._fechar_arquivo()
+
+
+def exportar_parquet(destino: str, inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                     pessoas: Optional[Iterable[str]] = None, particao: str = "dia",
+                     linhas_por_grupo: int = LINHAS_POR_GRUPO, grupos_por_arquivo: int = GRUPOS_POR_ARQUIVO,
+                     lote_cursor: int = LOTE_CURSOR, compressao: str = COMPRESSAO,
+                     recomecar: bool = False) -> Dict[str, object]:
+    """
+    Exporta [inicio, fim) (padrão: tudo) das pessoas dadas (padrão: todas).
+    Retoma do _checkpoint.json de `destino` se o pedido for o mesmo;
+    recomecar=True apaga a exportação anterior. Retorna o resumo do checkpoint.
+    """
+    pa, _ = _arrow()
+    _inicio_particao(datetime.now(), particao)   # valida
+    pessoas = sorted(set(pessoas)) if pessoas else None
+    pedido = {"inicio": inicio.isoformat() if inicio else None, "fim": fim.isoformat() if fim else None,
+              "pessoas": pessoas, "particao": particao}
+    os.makedirs(destino, exist_ok=True)
+    ck = _ler_checkpoint(destino)
+    if ck is not None and (recomecar or ck["pedido"] != pedido):
+        if not recomecar:
+            raise ValueError(f"{destino} tem uma exportação com outro filtro; use recomecar=True ou outro destino")
+        for a in ck["arquivos"]:
+            if os.path.exists(os.path.join(destino, a)):
+                os.remove(os.path.join(destino, a))
+        os.remove(os.path.join(destino, CHECKPOINT))
+        ck = None
+    _descartar_parciais(destino)
+    if ck is None:
+        if inicio is None or fim is None:
+            minimo, maximo = _limites(pessoas)
+            inicio = inicio or minimo
+            fim = fim or (maximo + timedelta(microseconds=1) if maximo else None)
+        ck = {"pedido": pedido, "inicio": inicio.isoformat() if inicio else None,
+              "fim": fim.isoformat() if fim else None, "apos": None, "arquivos": [], "linhas": 0,
+              "concluido": False}
+        _gravar_checkpoint(destino, ck)
+    if ck["concluido"] or ck["inicio"] is None:
+        return ck
+
+    t0 = time.perf_counter()
+    linhas_antes = ck["linhas"]
+    esquema = esquema_arrow()
+    ini_total, fim_total = datetime.fromisoformat(ck["inicio"]), datetime.fromisoformat(ck["fim"])
+    apos = (datetime.fromisoformat(ck["apos"][0]), ck["apos"][1]) if ck["apos"] else None
+    colunas_sql = ", ".join(_EXPR_SQL.get(c, c) for c in COLUNAS_EXPORT)
+
+    p_ini = _inicio_particao(apos[0] if apos else ini_total, particao)
+    while p_ini < fim_total:
+        p_fim = _proxima_particao(p_ini, particao)
+        params = {"lo": max(p_ini, ini_total), "hi": min(p_fim, fim_total), "pessoas": pessoas}
+        where = "data_captura >= %(lo)s AND data_captura < %(hi)s"
+        if pessoas:
+            where += " AND pessoa_id = ANY(%(pessoas)s)"
+        if apos and apos[0] >= p_ini:
+            where += " AND (data_captura, id) > (%(apos_data)s, %(apos_id)s)"
+            params.update(apos_data=apos[0], apos_id=apos[1])
+        escritor = _Escritor(destino, _nome_particao(p_ini, particao), esquema,
+                             linhas_por_grupo, grupos_por_arquivo, compressao, ck)
+        with conexao() as conn:
+            with conn.cursor() as cur:
+                # o ORDER BY de uma partição grande pode passar do statement_timeout do pool
+                cur.execute("SET LOCAL statement_timeout = 0")
+            with conn.cursor(name="exportacao_leituras") as cur:
+                cur.itersize = lote_cursor
+                cur.execute(f"SELECT {colunas_sql} FROM {ORIGEM_LEITURAS} WHERE {where} ORDER BY data_captura, id",
+                            params)
+                while True:
+                    linhas = cur.fetchmany(lote_cursor)
+                    if not linhas:
+                        break
+                    colunas = list(zip(*linhas))
+                    escritor.adicionar(pa.RecordBatch.from_arrays(
+                        [pa.array(col, type=campo.type) for col, campo in zip(colunas, esquema)], schema=esquema))
+        escritor.fechar()
+        p_ini = p_fim
+
+    ck["concluido"] = True
+    _gravar_checkpoint(destino, ck)
+    dt = time.perf_counter() - t0
+    logger.info(f"Exportação Parquet: {ck['linhas'] - linhas_antes} linhas em {dt:.1f}s "
+                f"({len(ck['arquivos'])} arquivos em {destino})")
+    return ck
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta leituras para Parquet particionado")
+    parser.add_argument("--destino", required=True)
+    parser.add_argument("--inicio", type=datetime.fromisoformat, help="ISO, inclusive (padrão: primeira leitura)")
+    parser.add_argument("--fim", type=datetime.fromisoformat, help="ISO, exclusivo (padrão: última leitura)")
+    parser.add_argument("--pessoa", action="append", help="pode repetir; padrão: todas")
+    parser.add_argument("--particao", choices=("dia", "mes"), default="dia")
+    parser.add_argument("--linhas-por-grupo", type=int, default=LINHAS_POR_GRUPO)
+    parser.add_argument("--grupos-por-arquivo", type=int, default=GRUPOS_POR_ARQUIVO)
+    parser.add_argument("--compressao", default=COMPRESSAO)
+    parser.add_argument("--recomecar", action="store_true", help="apaga a exportação anterior no destino")
+    args = parser.parse_args()
+    ck = exportar_parquet(args.destino, args.inicio, args.fim, args.pessoa, args.particao,
+                          args.linhas_por_grupo, args.grupos_por_arquivo, compressao=args.compressao,
+                          recomecar=args.recomecar)
+    print(f"{ck['linhas']} linhas, {len(ck['arquivos'])} arquivos, concluído={ck['concluido']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# app/config/galeria.py
+"""
+Índice de identidade em memória: a galeria inteira como uma matriz float32
+contígua (n x dim) com as linhas já normalizadas.
+
+    indice = IndiceIdentidade.de_galeria(listar_pessoas_embeddings())
+    indice.melhor(emb_now, limiar=0.30)     # -> (pessoa_id, dist) ou None
+    indice.top_k(emb_now, k=5)              # -> [(pessoa_id, dist), ...]
+    indice.adicionar(pid, emb)              # insere ou substitui
+    indice.remover(pid)
+
+Distância = 1 - cosseno, a mesma de mesma_pessoa(). Uma consulta é um
+produto matriz-vetor (normaliza só a consulta); remover troca a linha pela
+última, então as linhas vivas ficam sempre em [0, n).
+
+indice_galeria() mantém um índice por processo, carregado do banco na
+primeira consulta e recarregado depois de GALERIA_RECARGA_S;
+salvar_embedding_db() o atualiza via registrar_embedding().
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import EMBEDDING_DIM, GALERIA_RECARGA_S
+from config.log import logger
+
+CAPACIDADE_INICIAL = 1024
+_EPS = 1e-8
+
+
+def _normalizar(emb: Any, dim: int) -> np.ndarray:
+    v = np.asarray(emb, dtype=np.float32).reshape(-1)
+    if v.shape[0] != dim:
+        raise ValueError(f"embedding com {v.shape[0]} dims, índice tem {dim}")
+    return v / (np.linalg.norm(v) + _EPS)
+
+
+class IndiceIdentidade:
+    def __init__(self, dim: int = EMBEDDING_DIM, capacidade: int = CAPACIDADE_INICIAL):
+        self.dim = dim
+        self._mat = np.zeros((max(1, capacidade), dim), dtype=np.float32)
+        self._ids: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def de_galeria(cls, pares: Iterable[Tuple[str, Any]], dim: int = EMBEDDING_DIM,
+                   folga: int = 0) -> "IndiceIdentidade":
+        """
+        Monta de uma vez a partir de [(pessoa_id, emb), ...]; ignora dimensões
+        diferentes. `folga`: linhas extras reservadas para adicionar sem realocar.
+        """
+        pares = list(pares)
+        indice = cls(dim, capacidade=len(pares) + folga)
+        ignorados = 0
+        for pid, emb in pares:
+            try:
+                indice.adicionar(pid, emb)
+            except ValueError:
+                ignorados += 1
+        if ignorados:
+            logger.warning(f"Galeria: {ignorados} embeddings com dimensão != {dim} ignorados")
+        return indice
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, pessoa_id: str) -> bool:
+        return pessoa_id in self._pos
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def adicionar(self, pessoa_id: str, emb: Any) -> None:
+        """Insere a pessoa ou substitui o embedding dela."""
+        v = _normalizar(emb, self.dim)
+        with self._lock:
+            i = self._pos.get(pessoa_id)
+            if i is None:
+                i = len(self._ids)
+                if i == self._mat.shape[0]:
+                    mat = np.zeros((2 * i, self.dim), dtype=np.float32)
+                    mat[:i] = self._mat
+                    self._mat = mat
+                self._ids.append(pessoa_id)
+                self._pos[pessoa_id] = i
+            self._mat[i] = v
+
+    def remover(self, pessoa_id: str) -> bool:
+        with self._lock:
+            i = self._pos.pop(pessoa_id, None)
+            if i is None:
+                return False
+            ultimo = len(self._ids) - 1
+            if i != ultimo:
+                self._mat[i] = self._mat[ultimo]
+                self._ids[i] = self._ids[ultimo]
+                self._pos[self._ids[i]] = i
+            self._ids.pop()
+            return True
+
+    def _distancias(self, emb: Any) -> np.ndarray:
+        # chamador segura o lock
+        return 1.0 - self._mat[:len(self._ids)] @ _normalizar(emb, self.dim)
+
+    def melhor(self, emb: Any, limiar: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """(pessoa_id, dist) mais próximo; None se vazio ou acima do limiar."""
+        with self._lock:
+            if not self._ids:
+                return None
+            dist = self._distancias(emb)
+            i = int(np.argmin(dist))
+            pid, d = self._ids[i], float(dist[i])
+        if limiar is not None and d > limiar:
+            return None
+        return pid, d
+
+    def top_k(self, emb: Any, k: int = 5, limiar: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Até k (pessoa_id, dist) em ordem crescente de distância."""
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or k <= 0:
+                return []
+            dist = self._distancias(emb)
+            k = min(k, n)
+            sel = np.argpartition(dist, k - 1)[:k] if k < n else np.arange(n)
+            sel = sel[np.argsort(dist[sel])]
+            out = [(self._ids[i], float(dist[i])) for i in sel]
+        if limiar is not None:
+            out = [(pid, d) for pid, d in out if d <= limiar]
+        return out
+
+
+# ---------- índice do processo ----------
+_estado = {"indice": None, "carregado_em": 0.0}
+_estado_lock = threading.Lock()
+
+
+def indice_galeria(max_idade_s: float = GALERIA_RECARGA_S) -> IndiceIdentidade:
+    """Índice da galeria do banco; (re)carrega se ainda não existe ou tem mais de max_idade_s."""
+    with _estado_lock:
+        indice = _estado["indice"]
+        if indice is not None and time.monotonic() - _estado["carregado_em"] <= max_idade_s:
+            return indice
+        from config.database import listar_pessoas_embeddings
+        t0 = time.perf_counter()
+        indice = IndiceIdentidade.de_galeria(listar_pessoas_embeddings())
+        _estado.update(indice=indice, carregado_em=time.monotonic())
+        logger.debug(f"Galeria carregada: {len(indice)} pessoas em {(time.perf_counter() - t0) * 1000:.0f} ms")
+        return indice
+
+def registrar_embedding(pessoa_id: str, emb: Any) -> None:
+    """Reflete um embedding salvo no índice do processo (se já carregado)."""
+    indice = _estado["indice"]
+    if indice is None:
+        return
+    try:
+        indice.adicionar(pessoa_id, emb)
+    except ValueError as e:
+        logger.warning(f"Galeria: embedding de {pessoa_id} não indexado: {e}")
+
+def descartar_indice() -> None:
+    with _estado_lock:
+        _estado.update(indice=None, carregado_em=0.0)
@@ -0,0 +1,200 @@
+# app/config/identidade_local.py
+"""
+Cache local da identidade do usuário em ~/.well (IDENTIDADE_CACHE), para o
+agente começar a amostrar sem esperar banco, câmera de bootstrap nem modelo.
+
+Guarda, além do ~/.well/pessoa_id, o centróide e os templates da pessoa e
+os metadados do último match (origem, distância, quando). Formato .npz
+versionado (VERSAO, EMBEDDING_DIM); escrita atômica (tmp + replace).
+Incompatível, corrompido ou de outro pessoa_id => ignorado.
+
+    local = carregar_identidade_local()
+    if local:
+        loop.bootstrap(local)                      # só memória: semeia os caches do processo
+        iniciar_reconciliacao(loop.pessoa_id, ...)  # banco em segundo plano
+    else:
+        ensure_tables(); loop.bootstrap()           # caminho antigo
+
+A reconciliação trata o banco como fonte da verdade: se a pessoa existe
+lá, centróide/templates do banco substituem os locais (e o loop recebe o
+centróide novo); se não existe (banco recriado, cadastro offline), os
+locais são gravados nele. Sem banco, tenta de novo com backoff.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+import numpy as np
+
+from config.config import IDENTIDADE_CACHE, EMBEDDING_DIM
+from config.log import logger
+
+VERSAO = 1
+ARQUIVO_PESSOA_ID = "~/.well/pessoa_id"
+_BACKOFF_INICIAL_S = 30.0
+_BACKOFF_MAX_S = 600.0
+
+
+class IdentidadeLocal(NamedTuple):
+    pessoa_id: str
+    centroide: np.ndarray
+    templates: np.ndarray          # k x dim (pode ser 0 x dim)
+    slots: List[int]
+    origem: str                    # origem do último match (db_match, new_id, template, ...)
+    distancia: Optional[float]
+    verificado_em: str             # ISO
+    sincronizado_em: Optional[str]  # última reconciliação com o banco (ISO)
+
+
+def _caminho() -> str:
+    return os.path.expanduser(IDENTIDADE_CACHE)
+
+def _id_local() -> Optional[str]:
+    # mesmo arquivo de config/identity.py (que importa o DeepFace: não serve no cold start)
+    try:
+        with open(os.path.expanduser(ARQUIVO_PESSOA_ID), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def salvar_identidade_local(ident: IdentidadeLocal) -> None:
+    caminho = _caminho()
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    meta = {"versao": VERSAO, "dim": int(ident.centroide.shape[-1]), "pessoa_id": ident.pessoa_id,
+            "slots": list(ident.slots), "origem": ident.origem, "distancia": ident.distancia,
+            "verificado_em": ident.verificado_em, "sincronizado_em": ident.sincronizado_em}
+    tmp = caminho + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta)),
+                 centroide=np.asarray(ident.centroide, dtype=np.float32),
+                 templates=np.asarray(ident.templates, dtype=np.float32))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, caminho)
+
+def carregar_identidade_local() -> Optional[IdentidadeLocal]:
+    """Identidade do cache local, ou None se não existe/é incompatível/é de outro pessoa_id."""
+    caminho = _caminho()
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with np.load(caminho, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            centroide = z["centroide"].astype(np.float32)
+            templates = z["templates"].astype(np.float32)
+    except Exception as e:
+        logger.warning(f"Cache local de identidade ilegível, ignorado: {e}")
+        return None
+    if meta.get("versao") != VERSAO or meta.get("dim") != EMBEDDING_DIM:
+        logger.info(f"Cache local de identidade incompatível (versão {meta.get('versao')}, dim {meta.get('dim')})")
+        return None
+    if meta["pessoa_id"] != _id_local():
+        return None
+    return IdentidadeLocal(meta["pessoa_id"], centroide, templates.reshape(-1, EMBEDDING_DIM),
+                           meta.get("slots") or [], meta.get("origem") or "", meta.get("distancia"),
+                           meta.get("verificado_em") or "", meta.get("sincronizado_em"))
+
+def registrar_identidade(pessoa_id: str, origem: str, distancia: Optional[float] = None,
+                         sincronizado: bool = False) -> bool:
+    """
+    Grava o cache local a partir dos caches do processo (centróide/templates já
+    carregados ou recém-gravados). Sem centróide (pessoa sem rosto) não grava.
+    """
+    from config.database import carregar_embedding_db
+    from config.templates import templates_em_cache
+    centro = carregar_embedding_db(pessoa_id)
+    if centro is None or len(centro) != EMBEDDING_DIM:
+        return False
+    slots, mat = templates_em_cache(pessoa_id) or ([], np.zeros((0, EMBEDDING_DIM), np.float32))
+    anterior = carregar_identidade_local()
+    agora = datetime.now().isoformat(timespec="seconds")
+    sincronizado_em = agora if sincronizado else (
+        anterior.sincronizado_em if anterior and anterior.pessoa_id == pessoa_id else None)
+    try:
+        salvar_identidade_local(IdentidadeLocal(pessoa_id, centro, mat, slots, origem,
+                                                None if distancia is None else float(distancia),
+                                                agora, sincronizado_em))
+        return True
+    except OSError as e:
+        logger.warning(f"Cache local de identidade não gravado: {e}")
+        return False
+
+def semear(ident: IdentidadeLocal) -> None:
+    """Põe centróide/templates do cache local nos caches do processo (verificação sem banco)."""
+    from config.database import guardar_cache_embedding
+    from config.templates import semear_templates
+    guardar_cache_embedding(ident.pessoa_id, ident.centroide)
+    if len(ident.templates):
+        semear_templates(ident.pessoa_id, ident.slots or list(range(len(ident.templates))), ident.templates)
+
+def reconciliar(pessoa_id: str) -> Optional[np.ndarray]:
+    """
+    Uma rodada de reconciliação com o banco; levanta exceção se o banco falhar.
+    Retorna o centróide do banco se ele substituiu o local, senão None.
+    """
+    from config.conexao import conexao
+    from config.database import embedding_de_bytes, guardar_cache_embedding
+    from config.templates import ler_templates, gravar_templates, semear_templates
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("SELECT embedding_bin, embedding_dtype FROM pessoas WHERE pessoa_id = %s", (pessoa_id,))
+        row = cur.fetchone()
+        lidos = ler_templates(cur, [pessoa_id]).get(pessoa_id)
+
+    if row is None or row[0] is None:
+        local = carregar_identidade_local()
+        if local is None or local.pessoa_id != pessoa_id:
+            return None
+        slots = local.slots or list(range(len(local.templates)))
+        mat = local.templates if len(local.templates) else local.centroide[None, :]
+        gravar_templates(pessoa_id, slots[:len(mat)] or [0], mat)
+        logger.info(f"Identidade local enviada ao banco: pessoa_id={pessoa_id} ({len(mat)} templates)")
+        registrar_identidade(pessoa_id, local.origem, local.distancia, sincronizado=True)
+        return None
+
+    centro = embedding_de_bytes(row[0], row[1])
+    guardar_cache_embedding(pessoa_id, centro)
+    if lidos:
+        semear_templates(pessoa_id, *lidos)
+    local = carregar_identidade_local()
+    mudou = local is None or local.pessoa_id != pessoa_id or not np.allclose(local.centroide, centro, atol=1e-3)
+    registrar_identidade(pessoa_id, local.origem if local else "reconciliado",
+                         local.distancia if local else None, sincronizado=True)
+    if mudou:
+        logger.info(f"Identidade local atualizada pelo banco: pessoa_id={pessoa_id}")
+        return centro
+    return None
+
+def iniciar_reconciliacao(pessoa_id: str, antes: Optional[Callable[[], Optional[bool]]] = None,
+                          ao_atualizar: Optional[Callable[[str, np.ndarray], None]] = None) -> threading.Thread:
+    """
+    Thread daemon: roda `antes` (ex.: ensure_tables) e reconcilia com o banco,
+    repetindo os dois com backoff até conseguir (`antes` que levanta ou
+    retorna False é repetido antes da reconciliação). ao_atualizar(pessoa_id,
+    centróide) recebe o centróide do banco quando ele substitui o local.
+    """
+    def _rodar():
+        espera = _BACKOFF_INICIAL_S
+        preparado = antes is None
+        while True:
+            try:
+                if not preparado:
+                    if antes() is False:
+                        raise RuntimeError("schema do banco não garantido")
+                    preparado = True
+                t0 = time.perf_counter()
+                centro = reconciliar(pessoa_id)
+                logger.info(f"Identidade reconciliada com o banco em {(time.perf_counter() - t0) * 1000:.0f} ms")
+                if centro is not None and ao_atualizar is not None:
+                    ao_atualizar(pessoa_id, centro)
+                return
+            except Exception as e:
+                logger.warning(f"Reconciliação da identidade falhou (nova tentativa em {espera:.0f}s): {e}")
+                time.sleep(espera)
+                espera = min(espera * 2, _BACKOFF_MAX_S)
+
+    t = threading.Thread(target=_rodar, name="reconciliar-identidade", daemon=True)
+    t.start()
+    return t
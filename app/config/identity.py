@@ -5,10 +5,17 @@ from pathlib import Path
 import numpy as np
 from typing import Optional, Tuple
 
-from config.emocao import obter_embedding, mesma_pessoa
-from config.database import listar_pessoas_embeddings, salvar_embedding_db
+from config.emocao import obter_embedding
+from config.templates import admitir_template, carregar_templates, distancia, refinar
+from config.galeria import indice_galeria
+from config.ann import indice_ann, sincronizar_ann
+from config.latencia import Cronometro
+from config.config import PGVECTOR_TOP_K, ANN_ATIVO
+from config.vetores import pgvector_ativo, buscar_similares
+from config.log import logger
 
 LIMIAR_COSINE_DEFAULT = 0.30  # ajuste fino depois
+RECARGA_APOS_MISS_S = 60.0    # idade mínima da galeria/índice ANN para recarregar quando ninguém bate
 STORE_DIR = Path(os.path.expanduser("~/.well"))
 STORE_DIR.mkdir(parents=True, exist_ok=True)
 STORE_FILE = STORE_DIR / "pessoa_id"
@@ -33,28 +40,40 @@ def _write_local_id(pid: str) -> None:
 
 def _match_db_by_embedding(emb_now: np.ndarray, limiar: float) -> Optional[Tuple[str, float]]:
     """
-    Percorre embeddings do banco e retorna (pessoa_id, dist) do melhor match <= limiar.
+    Retorna (pessoa_id, dist) do melhor match <= limiar.
+    Os índices guardam o centróide de cada pessoa: pega os top-k centróides e
+    refina contra os templates deles (config/templates.py). Top-k vem do
+    pgvector se ativo; senão (ou se a consulta falhar) do índice ANN em disco
+    (ANN_ATIVO, config/ann.py) ou do índice exato em memória (config/galeria.py).
     """
-    candidatos = listar_pessoas_embeddings()  # [(pessoa_id, np.array), ...]
-    best_id, best_dist = None, 1e9
-    for pid, emb in candidatos:
-        # cosine distance já embutida dentro de mesma_pessoa; aqui reaproveitamos cálculo
-        # mas precisamos só da distância
-        a = emb.astype("float32")
-        b = emb_now.astype("float32")
-        na = np.linalg.norm(a) + 1e-8
-        nb = np.linalg.norm(b) + 1e-8
-        dist = float(1.0 - (a @ b) / (na * nb))
-        if dist < best_dist:
-            best_dist, best_id = dist, pid
+    k = PGVECTOR_TOP_K
+    if pgvector_ativo():
+        try:
+            return refinar(emb_now, buscar_similares(emb_now, k=k), limiar)
+        except Exception as e:
+            logger.warning(f"Busca pgvector falhou, usando a galeria em memória: {e}")
 
-    if best_id is not None and best_dist <= limiar:
-        return best_id, best_dist
-    return None
+    if ANN_ATIVO:
+        ann = indice_ann()
+        hit = refinar(emb_now, ann.top_k(emb_now, k), limiar)
+        if hit is None:
+            # um miss criaria pessoa_id novo: confirma com a busca exata (mesmos vetores, mmap)
+            hit = refinar(emb_now, ann.exato(emb_now, k), limiar)
+        if hit is None and sincronizar_ann(RECARGA_APOS_MISS_S):
+            # o mmap só conhece o que esta máquina indexou: traz as pessoas novas do banco
+            hit = refinar(emb_now, ann.top_k(emb_now, k), limiar)
+        return hit
+
+    hit = refinar(emb_now, indice_galeria().top_k(emb_now, k), limiar)
+    if hit is None:
+        # pode ser alguém cadastrado por outra máquina depois da carga: recarrega se não for recente
+        hit = refinar(emb_now, indice_galeria(max_idade_s=RECARGA_APOS_MISS_S).top_k(emb_now, k), limiar)
+    return hit
 
 def load_or_create_pessoa_id(
     img_path_for_enrollment: Optional[str],
-    limiar_cosine: float = LIMIAR_COSINE_DEFAULT
+    limiar_cosine: float = LIMIAR_COSINE_DEFAULT,
+    crono: Optional[Cronometro] = None
 ) -> Tuple[str, Optional[np.ndarray], Optional[float], str]:
     """
     Retorna (pessoa_id, emb_now, distancia_usada, origem)
@@ -62,17 +81,19 @@ def load_or_create_pessoa_id(
     - Tenta identificar por face via DB.
     - Se falhar, tenta validar o ID local contra o rosto atual (se houver).
     - Se tudo falhar, gera novo ID.
+    crono: se informado, acumula tempos de 'embed' e 'identity_match'.
     """
+    crono = crono or Cronometro()
     emb_now = None
     if img_path_for_enrollment:
         try:
-            emb_now = obter_embedding(img_path_for_enrollment)
+            emb_now = crono.medir("embed", obter_embedding, img_path_for_enrollment)
         except Exception:
             emb_now = None
 
     # 1) Se tenho embedding atual, tento bater com DB
     if emb_now is not None:
-        hit = _match_db_by_embedding(emb_now, limiar_cosine)
+        hit = crono.medir("identity_match", _match_db_by_embedding, emb_now, limiar_cosine)
         if hit:
             pid, dist = hit
             _write_local_id(pid)
@@ -85,10 +106,12 @@ def load_or_create_pessoa_id(
             # valida se o ID local corresponde ao rosto atual (comparando com embedding salvo, se existir)
             # para isso tentamos pegar o embedding do local_id no DB (se existir)
             from config.database import carregar_embedding_db
-            emb_ref = carregar_embedding_db(local_id)
+            with crono.etapa("identity_match"):
+                emb_ref = carregar_embedding_db(local_id)
             if emb_ref is not None:
-                same, dist = mesma_pessoa(emb_ref, emb_now, limiar=limiar_cosine)
-                if same:
+                with crono.etapa("identity_match"):
+                    dist = distancia(emb_now, emb_ref, carregar_templates([local_id]).get(local_id))
+                if dist <= limiar_cosine:
                     return local_id, emb_now, dist, "local_valid"
                 # Se não for a mesma pessoa, caímos para gerar novo ID
             else:
@@ -101,7 +124,7 @@ def load_or_create_pessoa_id(
     # 3) Nada local e sem match: criar novo
     new_id = gerar_pessoa_id()
     _write_local_id(new_id)
-    # se tenho emb_now, já salvo como perfil
+    # se tenho emb_now, já salvo como primeiro template (cadastro)
     if emb_now is not None:
-        salvar_embedding_db(new_id, emb_now)
+        admitir_template(new_id, emb_now)
     return new_id, emb_now, None, "new_id"
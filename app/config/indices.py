@@ -0,0 +1,91 @@
+# app/config/indices.py
+"""
+Conjunto gerenciado de índices das tabelas de leituras.
+
+Os relatórios filtram por faixa de data_captura e a consulta natural por
+usuário filtra por pessoa_id + faixa de data:
+
+- ix_leituras_pessoa_data: btree (pessoa_id, data_captura) — painel/consulta
+  de uma pessoa numa janela.
+- ix_leituras_data_brin: BRIN (data_captura) — janelas de tempo de todas as
+  pessoas; minúsculo (KBs) porque data_captura cresce junto com a ordem
+  física das linhas.
+
+Em leituras_emocionais particionada, o índice no pai vale para todas as
+partições (inclusive as futuras); criar_indice_online o constrói sem travar
+as inserções (ON ONLY + CONCURRENTLY por partição + ATTACH). O schema vem das migrações (0005 em
+leituras_emocionais, 0007 em leituras_compactas; ux_leituras_uuid na 0002 e
+o BRIN de inserido_em na 0004): um índice novo aqui precisa de uma migração
+nova. garantir_indices/remover_indices servem aos benchmarks.
+"""
+from typing import Dict, List, Optional
+
+from config.log import logger
+
+TABELA = "leituras_emocionais"
+
+# nome -> corpo do CREATE INDEX (depois de "ON <tabela>")
+INDICES_LEITURAS: Dict[str, str] = {
+    "ix_leituras_pessoa_data": "(pessoa_id, data_captura)",
+    "ix_leituras_data_brin":   "USING brin (data_captura) WITH (pages_per_range = 32)",
+}
+
+
+def _nome(nome: str, tabela: str) -> str:
+    # índices de outras tabelas (benchmarks) ganham sufixo para não colidir
+    return nome if tabela == TABELA else f"{nome}_{tabela}"
+
+def garantir_indices(cur, tabela: str = TABELA) -> List[str]:
+    """CREATE INDEX IF NOT EXISTS de todo o conjunto (trava escritas: só para tabelas de benchmark); retorna os que não existiam."""
+    criados = []
+    for nome, corpo in INDICES_LEITURAS.items():
+        nome = _nome(nome, tabela)
+        cur.execute("SELECT to_regclass(%s)", (nome,))
+        if cur.fetchone()[0] is None:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} {corpo}")
+            criados.append(nome)
+    if criados:
+        logger.info(f"Índices criados em {tabela}: {', '.join(criados)}")
+    return criados
+
+def _indice_valido(cur, nome: str) -> Optional[bool]:
+    """None se o índice não existe; False se sobrou inválido de um CONCURRENTLY interrompido."""
+    cur.execute("SELECT x.indisvalid FROM pg_index x WHERE x.indexrelid = to_regclass(%s)", (nome,))
+    row = cur.fetchone()
+    return None if row is None else row[0]
+
+def _criar_concorrente(cur, tabela: str, nome: str, corpo: str) -> None:
+    if _indice_valido(cur, nome) is False:
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nome}")
+    cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {nome} ON {tabela} {corpo}")
+
+def criar_indice_online(cur, tabela: str, nome: str, corpo: str) -> None:
+    """
+    Cria o índice sem bloquear as inserções (a conexão precisa estar em
+    autocommit: CONCURRENTLY não roda dentro de transação). Tabela comum:
+    CREATE INDEX CONCURRENTLY. Particionada: índice só no pai (ON ONLY,
+    instantâneo e inválido), um CONCURRENTLY por partição e ATTACH de cada
+    um; com todas anexadas o do pai fica válido, e partições futuras já
+    nascem com ele. Idempotente: retoma um build interrompido.
+    """
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (tabela,))
+    if cur.fetchone()[0] != "p":
+        _criar_concorrente(cur, tabela, nome, corpo)
+        return
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON ONLY {tabela} {corpo}")
+    cur.execute("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = to_regclass(%s)
+           AND NOT EXISTS (
+             SELECT 1 FROM pg_inherits ii JOIN pg_index x ON x.indexrelid = ii.inhrelid
+              WHERE ii.inhparent = to_regclass(%s) AND x.indrelid = c.oid)
+         ORDER BY c.relname
+    """, (tabela, nome))
+    for (particao,) in cur.fetchall():
+        nome_particao = f"{particao}_{nome}"[:63]
+        _criar_concorrente(cur, particao, nome_particao, corpo)
+        cur.execute(f"ALTER INDEX {nome} ATTACH PARTITION {nome_particao}")
+
+def remover_indices(cur, tabela: str = TABELA) -> None:
+    for nome in INDICES_LEITURAS:
+        cur.execute(f"DROP INDEX IF EXISTS {_nome(nome, tabela)}")
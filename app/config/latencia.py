@@ -0,0 +1,94 @@
+# app/config/latencia.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from config.log import logger
+
+# Etapas conhecidas (ordem usada no resumo)
+ETAPAS = (
+    "camera_open", "warmup", "grab", "encode", "quality",
+    "detect", "assinatura", "embed", "identity_match", "emotion", "db_write",
+)
+JANELA_AMOSTRAS  = 500     # amostras por etapa no agregador
+INTERVALO_LOG_S  = 300.0   # resumo no log a cada 5 min
+PERCENTIS        = (50, 90, 99)
+
+
+class Cronometro:
+    """Tempos (ms) das etapas de um ciclo, medidos com relógio monotônico."""
+
+    def __init__(self, relogio: Callable[[], float] = time.perf_counter):
+        self._relogio = relogio
+        self.etapas: Dict[str, float] = {}
+
+    @contextmanager
+    def etapa(self, nome: str):
+        t0 = self._relogio()
+        try:
+            yield
+        finally:
+            # soma: a mesma etapa pode rodar mais de uma vez no ciclo (ex.: embed)
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + (self._relogio() - t0) * 1000.0
+
+    def medir(self, nome: str, fn, *args, **kwargs):
+        with self.etapa(nome):
+            return fn(*args, **kwargs)
+
+    def como_dict(self) -> Dict[str, float]:
+        return {k: round(v, 2) for k, v in self.etapas.items()}
+
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    if not ordenados:
+        return 0.0
+    k = (len(ordenados) - 1) * (p / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(ordenados) - 1)
+    return ordenados[lo] + (ordenados[hi] - ordenados[lo]) * (k - lo)
+
+
+class AgregadorLatencia:
+    """Janela deslizante por etapa com p50/p90/p99 e log periódico."""
+
+    def __init__(self, janela: int = JANELA_AMOSTRAS,
+                 intervalo_log: float = INTERVALO_LOG_S,
+                 relogio: Callable[[], float] = time.monotonic):
+        self._janela = janela
+        self._amostras: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._intervalo_log = intervalo_log
+        self._relogio = relogio
+        self._ultimo_log = relogio()
+
+    def registrar(self, etapas: Dict[str, float]) -> None:
+        with self._lock:
+            for nome, ms in etapas.items():
+                self._amostras.setdefault(nome, deque(maxlen=self._janela)).append(ms)
+
+    def resumo(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            copia = {k: sorted(v) for k, v in self._amostras.items()}
+        ordem = [e for e in ETAPAS if e in copia] + sorted(k for k in copia if k not in ETAPAS)
+        out = {}
+        for nome in ordem:
+            vals = copia[nome]
+            linha = {"n": len(vals)}
+            for p in PERCENTIS:
+                linha[f"p{p}"] = round(_percentil(vals, p), 1)
+            out[nome] = linha
+        return out
+
+    def talvez_logar(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Loga o resumo se o intervalo venceu; retorna o resumo logado (ou None)."""
+        agora = self._relogio()
+        if agora - self._ultimo_log < self._intervalo_log:
+            return None
+        self._ultimo_log = agora
+        res = self.resumo()
+        if res:
+            partes = [f"{k}=p50:{v['p50']}/p90:{v['p90']}/p99:{v['p99']}ms(n={v['n']})" for k, v in res.items()]
+            logger.info("[LATENCIA] " + " | ".join(partes))
+        return res
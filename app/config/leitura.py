@@ -0,0 +1,108 @@
+# app/config/leitura.py
+"""
+Registro tipado de uma leitura (uma linha de leituras_emocionais).
+
+Montado uma vez por ciclo; `como_tupla()` devolve os valores na ordem de
+COLUNAS_LEITURA, que é a ordem usada pelo INSERT preparado, pelo COPY e
+pelo spool. Sem dependência de psycopg2 (a simulação usa este módulo).
+"""
+import uuid
+from operator import attrgetter
+from typing import Any, Dict, Optional
+
+# ---- conjunto permitido (alinhado ao CHECK do banco) ----
+PERMITIDAS = {
+    "feliz", "triste", "medo", "raiva", "desgosto", "surpresa", "neutro", "usuario_ausente"
+}
+
+# alguns modelos/flows podem vir com inglês por engano — mapeia rápido
+_MAPA_EN_PT = {
+    "happy": "feliz",
+    "sad": "triste",
+    "fear": "medo",
+    "angry": "raiva",
+    "disgust": "desgosto",
+    "surprise": "surpresa",
+    "neutral": "neutro",
+    "usuario_ausente": "usuario_ausente",
+}
+
+COLUNAS_LEITURA = (
+    "pessoa_id", "data_captura",
+    "raiva", "desgosto", "medo", "feliz", "triste", "surpresa", "neutro", "emocao_dominante",
+    "cpu", "memoria", "disco",
+    "camera_status", "face_status", "mesma_pessoa", "qualidade", "brilho", "face_distance",
+    "perfil_energia", "perfil_transicao", "latencias", "leitura_uuid",
+    "identidade_idade_s",
+)
+_VALORES = attrgetter(*COLUNAS_LEITURA)
+
+
+def normalizar_dominante(emocoes: Optional[Dict[str, float]]) -> str:
+    """Escolhe a dominante e garante que está no set PERMITIDAS."""
+    if not emocoes:
+        return "usuario_ausente"
+    # pega a chave com maior valor
+    dom = max(emocoes, key=emocoes.get)
+    dom = (dom or "").strip().lower()
+    dom = _MAPA_EN_PT.get(dom, dom)
+    if dom not in PERMITIDAS:
+        dom = "usuario_ausente"
+    return dom
+
+
+class Leitura:
+    """Campos = COLUNAS_LEITURA. latencias fica como dict; leitura_uuid é a chave de idempotência."""
+
+    __slots__ = COLUNAS_LEITURA
+
+    def __init__(self, pessoa_id: str, data_captura,
+                 emocoes: Optional[Dict[str, float]] = None,
+                 recursos: Optional[Dict[str, float]] = None,
+                 meta: Optional[Dict[str, Any]] = None):
+        emo = emocoes or {}
+        rec = recursos or {}
+        meta = meta or {}
+        self.pessoa_id = pessoa_id
+        self.data_captura = data_captura
+        self.raiva = emo.get("raiva", 0)
+        self.desgosto = emo.get("desgosto", 0)
+        self.medo = emo.get("medo", 0)
+        self.feliz = emo.get("feliz", 0)
+        self.triste = emo.get("triste", 0)
+        self.surpresa = emo.get("surpresa", 0)
+        self.neutro = emo.get("neutro", 0)
+        # Dominante saneada para não violar CHECK
+        self.emocao_dominante = normalizar_dominante(emocoes)
+        self.cpu = rec.get("cpu", 0)
+        self.memoria = rec.get("mem", 0)
+        self.disco = rec.get("disk", 0)
+        self.camera_status = meta.get("camera_status", "ok")
+        self.face_status = meta.get("face_status", "ok")
+        self.mesma_pessoa = meta.get("mesma_pessoa")
+        self.qualidade = meta.get("qualidade")
+        self.brilho = meta.get("brilho")
+        self.face_distance = meta.get("face_distance")
+        self.perfil_energia = meta.get("perfil_energia")
+        self.perfil_transicao = meta.get("perfil_transicao")
+        self.latencias = meta.get("latencias")
+        self.leitura_uuid = meta.get("leitura_uuid") or str(uuid.uuid4())
+        self.identidade_idade_s = meta.get("identidade_idade_s")
+
+    def como_tupla(self) -> tuple:
+        return _VALORES(self)
+
+    @classmethod
+    def de_tupla(cls, valores) -> "Leitura":
+        obj = cls.__new__(cls)
+        for nome, v in zip(COLUNAS_LEITURA, valores):
+            setattr(obj, nome, v)
+        return obj
+
+    @property
+    def com_emocao(self) -> bool:
+        return self.emocao_dominante != "usuario_ausente"
+
+    def __repr__(self) -> str:
+        return (f"Leitura(pessoa_id={self.pessoa_id!r}, data_captura={self.data_captura!r}, "
+                f"dominante={self.emocao_dominante!r}, camera={self.camera_status!r}, face={self.face_status!r})")
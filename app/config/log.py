@@ -1,49 +1,200 @@
 # app/utils/logger.py
 from loguru import logger
 from random import randint
-import psycopg2
 from datetime import datetime
-from decouple import config
+import atexit
+import json
+import os
+import queue
+import threading
+import time
 
-# Configurações do banco
-DB_NAME = config("DB_NAME", default="emocional")
-DB_USER = config("DB_USER", default="arthurfaria")
-DB_PASSWORD = config("DB_PASSWORD", default="")
-DB_HOST = config("DB_HOST", default="localhost")
-DB_PORT = config("DB_PORT", default="5432")
+from psycopg2.extras import execute_values
+
+from config.config import (
+    LOG_BANCO_FILA_MAX, LOG_BANCO_LOTE, LOG_BANCO_FLUSH_S, LOG_BANCO_CHEIO, LOG_BANCO_TRANSBORDO,
+)
+from config.conexao import conexao
 
 ARQUIVO_LOG = "log.txt"
 IDENTIFICACAO = randint(10, 100000000)
 
-# Função para inserir log no banco
-def salvar_log_no_banco(message):
-    try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO logs_sistema (identificacao, data_hora, nivel, mensagem)
-            VALUES (%s, %s, %s, %s)
-        """, (
-            message.record["extra"]["id"],
-            datetime.fromtimestamp(message.record["time"].timestamp()),
-            message.record["level"].name,
-            message.record["message"]
-        ))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        print(f"❌ Erro ao salvar log no banco: {e}")
+# Com o banco fora, o sink não tenta a cada lote (cada tentativa pode levar o
+# connect_timeout inteiro) nem imprime um erro por lote: tenta de novo após
+# SINK_PAUSA_S e avisa só na queda e na volta.
+SINK_PAUSA_S = 60.0
+FECHAR_ESPERA_S = 5.0
+
+_INSERT = "INSERT INTO logs_sistema (identificacao, data_hora, nivel, mensagem) VALUES %s"
+
+
+class SinkBanco:
+    """
+    Sink do loguru para logs_sistema. A chamada só enfileira (put_nowait); uma
+    thread junta até `lote` registros ou `flush_s` segundos e grava com um
+    INSERT de várias linhas. Fila cheia ou banco fora: os registros são
+    descartados (`cheio="descartar"`) ou vão para um arquivo JSONL
+    (`cheio="arquivo"`) reenviado quando o banco volta. No exit, esvazia a fila.
+
+    Não loga pelo loguru (entraria em recursão): avisos vão para o stdout.
+    """
+
+    def __init__(self, fila_max: int = LOG_BANCO_FILA_MAX, lote: int = LOG_BANCO_LOTE,
+                 flush_s: float = LOG_BANCO_FLUSH_S, cheio: str = LOG_BANCO_CHEIO,
+                 transbordo: str = LOG_BANCO_TRANSBORDO):
+        if cheio not in ("descartar", "arquivo"):
+            raise ValueError(f"LOG_BANCO_CHEIO desconhecido: {cheio}")
+        self._fila = queue.Queue(maxsize=fila_max)
+        self._lote = lote
+        self._flush_s = flush_s
+        self._cheio = cheio
+        self._transbordo = os.path.expanduser(transbordo)
+        self._lock_arquivo = threading.Lock()
+        self._lock_gravar = threading.Lock()   # thread e fechar() não gravam/reenviam juntos
+        self._pausado_ate = 0.0
+        self._fora = False
+        self.contadores = {"gravados": 0, "descartados": 0, "transbordados": 0}
+        self._parar = threading.Event()
+        # a thread sobe no primeiro registro: quem só importa e troca os sinks
+        # (simulação) não toca no banco nem no arquivo de transbordo
+        self._thread = None
+        self._lock_thread = threading.Lock()
+
+    def _iniciar(self) -> None:
+        with self._lock_thread:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="log-banco", daemon=True)
+                self._thread.start()
+                atexit.register(self.fechar)
+
+    # ---------- lado do chamador ----------
+    def __call__(self, message):
+        if self._thread is None:
+            self._iniciar()
+        r = message.record
+        item = (r["extra"].get("id", IDENTIFICACAO), datetime.fromtimestamp(r["time"].timestamp()),
+                r["level"].name, r["message"])
+        try:
+            self._fila.put_nowait(item)
+        except queue.Full:
+            self._desviar([item])
+
+    # ---------- thread ----------
+    def _coletar(self) -> list:
+        try:
+            itens = [self._fila.get(timeout=self._flush_s)]
+        except queue.Empty:
+            return []
+        limite = time.monotonic() + self._flush_s
+        while len(itens) < self._lote:
+            resta = limite - time.monotonic()
+            if resta <= 0:
+                break
+            try:
+                itens.append(self._fila.get(timeout=resta))
+            except queue.Empty:
+                break
+        return itens
+
+    def _loop(self):
+        while not self._parar.is_set():
+            itens = self._coletar()
+            if itens:
+                self._gravar(itens)
+            elif os.path.exists(self._transbordo) or os.path.exists(self._transbordo + ".enviando"):
+                self._gravar([])
+
+    def _gravar(self, itens: list) -> None:
+        with self._lock_gravar:
+            self._gravar_travado(itens)
+
+    def _gravar_travado(self, itens: list) -> None:
+        if time.monotonic() < self._pausado_ate:
+            self._desviar(itens)
+            return
+        try:
+            self._reenviar_transbordo()
+            if itens:
+                with conexao() as conn, conn.cursor() as cur:
+                    execute_values(cur, _INSERT, itens, page_size=len(itens))
+                self.contadores["gravados"] += len(itens)
+            if self._fora:
+                self._fora = False
+                print(f"✅ Log no banco restabelecido ({self.contadores['descartados']} descartados, "
+                      f"{self.contadores['transbordados']} via {self._transbordo})")
+        except Exception as e:
+            self._pausado_ate = time.monotonic() + SINK_PAUSA_S
+            self._desviar(itens)
+            if not self._fora:
+                self._fora = True
+                print(f"❌ Erro ao salvar log no banco (nova tentativa em {SINK_PAUSA_S:.0f}s): {e}")
+
+    # ---------- transbordo ----------
+    def _desviar(self, itens: list) -> None:
+        if not itens:
+            return
+        if self._cheio == "descartar":
+            self.contadores["descartados"] += len(itens)
+            return
+        try:
+            with self._lock_arquivo:
+                os.makedirs(os.path.dirname(self._transbordo) or ".", exist_ok=True)
+                with open(self._transbordo, "a", encoding="utf-8") as f:
+                    for ident, data_hora, nivel, msg in itens:
+                        f.write(json.dumps([ident, data_hora.isoformat(), nivel, msg], ensure_ascii=False) + "\n")
+            self.contadores["transbordados"] += len(itens)
+        except OSError:
+            self.contadores["descartados"] += len(itens)
+
+    def _reenviar_transbordo(self) -> None:
+        """Grava o arquivo de transbordo (se houver) antes dos registros novos."""
+        enviando = self._transbordo + ".enviando"
+        with self._lock_arquivo:
+            if not os.path.exists(enviando):
+                if not os.path.exists(self._transbordo):
+                    return
+                os.replace(self._transbordo, enviando)
+        # se falhar no meio, o .enviando fica e é reenviado inteiro na próxima (linhas podem repetir)
+        with open(enviando, encoding="utf-8") as f:
+            linhas = [json.loads(l) for l in f if l.strip()]
+        with conexao() as conn, conn.cursor() as cur:
+            for i in range(0, len(linhas), self._lote):
+                pedaco = [(a, datetime.fromisoformat(b), c, d) for a, b, c, d in linhas[i:i + self._lote]]
+                execute_values(cur, _INSERT, pedaco, page_size=len(pedaco))
+        os.remove(enviando)
+        self.contadores["gravados"] += len(linhas)
+
+    def fechar(self, espera_s: float = FECHAR_ESPERA_S) -> None:
+        """
+        Para a thread e grava o que ainda está na fila (uma tentativa). Se a
+        thread ainda está gravando depois da espera, a fila vai para o
+        transbordo em vez de disputar o banco e o .enviando com ela.
+        """
+        if self._parar.is_set() or self._thread is None:
+            return
+        self._parar.set()
+        t0 = time.monotonic()
+        self._thread.join(espera_s)
+        itens = []
+        while True:
+            try:
+                itens.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        if not self._lock_gravar.acquire(timeout=max(0.0, espera_s - (time.monotonic() - t0))):
+            self._desviar(itens)
+            return
+        try:
+            for i in range(0, len(itens), self._lote):
+                self._gravar_travado(itens[i:i + self._lote])
+        finally:
+            self._lock_gravar.release()
+
+
+sink_banco = SinkBanco()
 
 # Configura loguru para arquivo e banco
-logger.add(ARQUIVO_LOG, format="{time:DD/MM/YYYY HH:mm:ss} | {level} | {extra[id]} | {message}")
-logger.add(salvar_log_no_banco)  # Envia pro banco também
+# delay: o arquivo só é criado no primeiro registro (quem troca os sinks ao importar não o deixa vazio)
+logger.add(ARQUIVO_LOG, format="{time:DD/MM/YYYY HH:mm:ss} | {level} | {extra[id]} | {message}", delay=True)
+logger.add(sink_banco)  # Envia pro banco também (em lote, fora da thread que loga)
 logger = logger.bind(id=IDENTIFICACAO)
@@ -0,0 +1,130 @@
+# app/config/lote.py
+import atexit
+import threading
+import time
+from typing import Callable, List, Optional
+
+from config.config import LOTE_MAX_LINHAS, LOTE_MAX_IDADE_S, LOTE_METODO
+from config.log import logger
+
+# em falha do banco, mantém no máximo isso em memória (descarta as mais antigas)
+LOTE_MAX_PENDENTES_FATOR = 20
+
+
+class BufferLeituras:
+    """
+    Acumula leituras e grava em bloco (COPY/execute_values) quando atinge
+    `max_linhas` ou quando a mais antiga passa de `max_idade_s`.
+
+    Perda máxima num crash: max_linhas leituras ou max_idade_s segundos de
+    leituras (o que vier primeiro). Com o banco fora, o buffer segura até
+    max_linhas * LOTE_MAX_PENDENTES_FATOR e depois descarta as mais antigas.
+    """
+
+    def __init__(self,
+                 max_linhas: int = LOTE_MAX_LINHAS,
+                 max_idade_s: float = LOTE_MAX_IDADE_S,
+                 metodo: str = LOTE_METODO,
+                 gravar: Optional[Callable[[List[tuple], str], int]] = None,
+                 relogio: Callable[[], float] = time.monotonic):
+        if gravar is None:
+            from config.database import inserir_leituras
+            gravar = inserir_leituras
+        self.max_linhas = max(1, int(max_linhas))
+        self.max_idade_s = float(max_idade_s)
+        self.max_pendentes = self.max_linhas * LOTE_MAX_PENDENTES_FATOR
+        self.metodo = metodo
+        self._gravar = gravar
+        self._relogio = relogio
+        self._linhas: List[tuple] = []
+        self._primeira_em: Optional[float] = None
+        self._cond = threading.Condition()
+        self._parar = False
+        self._gravando = threading.Lock()
+        self._ultima_falhou = False
+        self.metricas = {"gravadas": 0, "lotes": 0, "falhas": 0, "descartadas": 0}
+        self._thread = threading.Thread(target=self._loop, name="buffer-leituras", daemon=True)
+        self._thread.start()
+
+    def adicionar(self, linha: tuple) -> None:
+        with self._cond:
+            if not self._linhas:
+                self._primeira_em = self._relogio()
+            self._linhas.append(linha)
+            excesso = len(self._linhas) - self.max_pendentes
+            if excesso > 0:
+                del self._linhas[:excesso]
+                self.metricas["descartadas"] += excesso
+            if len(self._linhas) >= self.max_linhas:
+                self._cond.notify()
+
+    def pendentes(self) -> int:
+        with self._cond:
+            return len(self._linhas)
+
+    def _vencido(self) -> bool:
+        if not self._linhas:
+            return False
+        if len(self._linhas) >= self.max_linhas:
+            return True
+        return self._relogio() - self._primeira_em >= self.max_idade_s
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._parar and not self._vencido():
+                    espera = self.max_idade_s
+                    if self._linhas:
+                        espera = max(0.05, self.max_idade_s - (self._relogio() - self._primeira_em))
+                    self._cond.wait(timeout=espera)
+                if self._parar:
+                    return
+            self.descarregar()
+            if self._ultima_falhou:
+                # evita laço quente de retry com o banco fora
+                with self._cond:
+                    self._cond.wait(timeout=min(self.max_idade_s, 5.0))
+
+    def descarregar(self) -> int:
+        """Grava tudo o que está pendente; em falha, devolve as linhas ao buffer."""
+        with self._gravando:
+            with self._cond:
+                lote, self._linhas = self._linhas, []
+                primeira = self._primeira_em
+                self._primeira_em = None
+            if not lote:
+                return 0
+            try:
+                n = self._gravar(lote, self.metodo)
+                self._ultima_falhou = False
+                self.metricas["gravadas"] += n
+                self.metricas["lotes"] += 1
+                return n
+            except Exception as e:
+                self.metricas["falhas"] += 1
+                logger.warning(f"[LOTE] falha ao gravar {len(lote)} leituras: {e}")
+                with self._cond:
+                    self._linhas = (lote + self._linhas)[-self.max_pendentes:]
+                    self._primeira_em = primeira if primeira is not None else self._relogio()
+                self._ultima_falhou = True
+                return 0
+
+    def fechar(self) -> None:
+        """Para a thread e faz o flush final (chamado no atexit)."""
+        with self._cond:
+            self._parar = True
+            self._cond.notify()
+        self._thread.join(timeout=5.0)
+        self.descarregar()
+
+
+_buffer: Optional[BufferLeituras] = None
+_buffer_lock = threading.Lock()
+
+def obter_buffer() -> BufferLeituras:
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = BufferLeituras()
+            atexit.register(_buffer.fechar)
+        return _buffer
@@ -0,0 +1,180 @@
+# app/config/migracoes.py
+"""
+Migrações de schema versionadas.
+
+Cada banco tem um diretório de arquivos ordenados `NNNN_descricao.sql` ou
+`NNNN_descricao.py` (este com `def aplicar(cur)`):
+
+    app/migracoes/         -> banco principal (pool "principal")
+    app/trial/migracoes/   -> banco do trial (também montado no
+                              docker-entrypoint-initdb.d do trial-db)
+
+A tabela schema_version guarda as versões aplicadas. No startup,
+aplicar_migracoes() faz uma consulta barata (MAX(versao)) e, só se houver
+pendentes, pega o advisory lock e aplica cada uma na sua própria transação
+— assim uma frota reiniciando junta não toma ACCESS EXCLUSIVE nas tabelas
+quentes a cada login. Migrações são escritas idempotentes (IF NOT EXISTS),
+então um banco criado antes do runner só registra as versões.
+
+Uma migração .py com `TRANSACAO = False` roda em autocommit, sem
+statement_timeout (ex.: CREATE INDEX CONCURRENTLY na tabela quente, que não
+roda dentro de transação); precisa ser idempotente, porque uma falha no
+meio não é desfeita. O registro da versão vem depois, na sua transação.
+
+Uma versão aplicada não muda: o DDL fica escrito na própria migração (não
+chama código do app que evolui depois), e toda mudança de schema é uma
+migração nova com o próximo número.
+
+Uso manual:
+
+    python -m config.migracoes                    # principal
+    python -m config.migracoes --alvo trial --dsn postgresql://...
+    python -m config.migracoes --status
+"""
+import argparse
+import importlib.util
+import os
+import re
+import time
+from typing import List, NamedTuple, Optional
+
+from config.conexao import conexao, registrar_pool
+from config.log import logger
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIOS = {
+    "principal": os.path.join(_RAIZ, "migracoes"),
+    "trial":     os.path.join(_RAIZ, "trial", "migracoes"),
+}
+_RE_ARQUIVO = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+_LOCK_CHAVE = "schema_version"
+
+
+class Migracao(NamedTuple):
+    versao: int
+    nome: str
+    caminho: str
+
+
+def listar_migracoes(diretorio: str) -> List[Migracao]:
+    migracoes = []
+    for arq in sorted(os.listdir(diretorio)):
+        m = _RE_ARQUIVO.match(arq)
+        if m:
+            migracoes.append(Migracao(int(m.group(1)), m.group(2), os.path.join(diretorio, arq)))
+    versoes = [m.versao for m in migracoes]
+    if len(set(versoes)) != len(versoes):
+        raise ValueError(f"versões de migração repetidas em {diretorio}")
+    return migracoes
+
+def versao_atual(cur) -> int:
+    cur.execute("SELECT to_regclass('schema_version')")
+    if cur.fetchone()[0] is None:
+        return 0
+    cur.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+def _carregar(migracao: Migracao):
+    """Módulo de uma migração .py (None para .sql)."""
+    if migracao.caminho.endswith(".sql"):
+        return None
+    spec = importlib.util.spec_from_file_location(f"migracao_{migracao.versao:04d}", migracao.caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def _executar(cur, migracao: Migracao, modulo) -> None:
+    if modulo is None:
+        with open(migracao.caminho, encoding="utf-8") as f:
+            cur.execute(f.read())
+        return
+    modulo.aplicar(cur)
+
+def _executar_fora_de_transacao(conn, cur, migracao: Migracao, modulo) -> None:
+    conn.autocommit = True
+    try:
+        cur.execute("SET statement_timeout = 0")
+        try:
+            _executar(cur, migracao, modulo)
+        finally:
+            cur.execute("RESET statement_timeout")
+    finally:
+        conn.autocommit = False
+
+def aplicar_migracoes(pool: str = "principal", diretorio: Optional[str] = None) -> List[int]:
+    """Aplica as migrações pendentes; retorna as versões aplicadas (vazia no caso comum)."""
+    migracoes = listar_migracoes(diretorio or DIRETORIOS[pool])
+    if not migracoes:
+        return []
+    with conexao(pool) as conn, conn.cursor() as cur:
+        if versao_atual(cur) >= migracoes[-1].versao:
+            return []
+
+    aplicadas = []
+    with conexao(pool) as conn, conn.cursor() as cur:
+        # lock de sessão: vale entre os commits de cada migração
+        cur.execute("SELECT pg_advisory_lock(hashtext(%s))", (_LOCK_CHAVE,))
+        try:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                  versao       INTEGER PRIMARY KEY,
+                  nome         VARCHAR(100) NOT NULL,
+                  aplicada_em  TIMESTAMPTZ NOT NULL DEFAULT now(),
+                  duracao_ms   REAL
+                )
+            """)
+            cur.execute("SELECT versao FROM schema_version")
+            feitas = {r[0] for r in cur.fetchall()}
+            conn.commit()
+            for m in migracoes:
+                if m.versao in feitas:
+                    continue
+                t0 = time.perf_counter()
+                try:
+                    modulo = _carregar(m)
+                    if getattr(modulo, "TRANSACAO", True):
+                        # conversões/cópias podem passar do statement_timeout do pool
+                        cur.execute("SET LOCAL statement_timeout = 0")
+                        _executar(cur, m, modulo)
+                    else:
+                        _executar_fora_de_transacao(conn, cur, m, modulo)
+                    cur.execute("INSERT INTO schema_version (versao, nome, duracao_ms) VALUES (%s, %s, %s)",
+                                (m.versao, m.nome, (time.perf_counter() - t0) * 1000))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    logger.error(f"Migração {m.versao:04d}_{m.nome} falhou; versões seguintes não aplicadas")
+                    raise
+                aplicadas.append(m.versao)
+                logger.info(f"Migração {m.versao:04d}_{m.nome} aplicada ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (_LOCK_CHAVE,))
+    return aplicadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrações de schema versionadas")
+    parser.add_argument("--alvo", choices=sorted(DIRETORIOS), default="principal")
+    parser.add_argument("--dsn", help="banco de destino (obrigatório para --alvo trial)")
+    parser.add_argument("--status", action="store_true", help="só mostra versão atual e pendentes")
+    args = parser.parse_args()
+
+    pool = "principal"
+    if args.dsn:
+        pool = f"migracoes:{args.alvo}"
+        registrar_pool(pool, dsn=args.dsn)
+    elif args.alvo != "principal":
+        parser.error("--dsn é obrigatório para o banco do trial")
+
+    if args.status:
+        with conexao(pool) as conn, conn.cursor() as cur:
+            atual = versao_atual(cur)
+        pendentes = [m for m in listar_migracoes(DIRETORIOS[args.alvo]) if m.versao > atual]
+        print(f"versão atual: {atual}")
+        for m in pendentes:
+            print(f"pendente: {m.versao:04d}_{m.nome}")
+        return
+    print(aplicar_migracoes(pool, DIRETORIOS[args.alvo]))
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,251 @@
-import pyautogui
+# app/config/monitor.py
+"""
+Detecção de atividade do usuário (teclado + mouse) sem polling do pyautogui.
+
+Backends, em ordem de preferência:
+  - windows: GetLastInputInfo (user32)
+  - macos:   CGEventSourceSecondsSinceLastEventType (Quartz)
+  - x11:     XScreenSaverQueryInfo (libXss)
+  - evdev:   thread lendo /dev/input/event* (requer permissão de leitura)
+  - polling: posição do mouse via pyautogui (import tardio, último recurso)
+
+Todos expõem `idle_seconds()`; para testes use `BackendFake`.
+"""
+import ctypes
+import ctypes.util
+import glob
+import os
+import select
+import sys
+import threading
 import time
+from typing import Optional
 
-ultima_posicao_mouse = None
-tempo_ultimo_movimento = time.time()
+TIMEOUT_PADRAO = 60
 
-def esta_usando_computador():
-    global ultima_posicao_mouse, tempo_ultimo_movimento
-    pos_atual = pyautogui.position()
 
-    if pos_atual != ultima_posicao_mouse:
-        ultima_posicao_mouse = pos_atual
-        tempo_ultimo_movimento = time.time()
-        return True
+class BackendFake:
+    """Backend controlável para testes: idle fixo ou avançado manualmente."""
+    nome = "fake"
+
+    def __init__(self, idle: float = 0.0):
+        self.idle = float(idle)
+
+    def idle_seconds(self) -> float:
+        return self.idle
+
+
+class BackendWindows:
+    nome = "windows"
+
+    class _LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+    def __init__(self):
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.GetTickCount.restype = ctypes.c_uint
+        self._info = self._LASTINPUTINFO()
+        self._info.cbSize = ctypes.sizeof(self._LASTINPUTINFO)
+        self.idle_seconds()  # falha cedo se a API não estiver disponível
+
+    def idle_seconds(self) -> float:
+        if not self._user32.GetLastInputInfo(ctypes.byref(self._info)):
+            raise OSError("GetLastInputInfo falhou")
+        # GetTickCount dá a volta em ~49 dias; a máscara mantém a diferença correta
+        ms = (self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF
+        return ms / 1000.0
+
+
+class BackendMac:
+    nome = "macos"
+    _HID_SYSTEM_STATE = 1
+    _ANY_INPUT_EVENT = 0xFFFFFFFF
+
+    def __init__(self):
+        path = ctypes.util.find_library("ApplicationServices")
+        if not path:
+            raise OSError("ApplicationServices indisponível")
+        lib = ctypes.cdll.LoadLibrary(path)
+        self._fn = lib.CGEventSourceSecondsSinceLastEventType
+        self._fn.argtypes = [ctypes.c_int32, ctypes.c_uint32]
+        self._fn.restype = ctypes.c_double
+        self.idle_seconds()
+
+    def idle_seconds(self) -> float:
+        return float(self._fn(self._HID_SYSTEM_STATE, self._ANY_INPUT_EVENT))
+
+
+class BackendX11:
+    nome = "x11"
+
+    class _XScreenSaverInfo(ctypes.Structure):
+        _fields_ = [
+            ("window", ctypes.c_ulong), ("state", ctypes.c_int), ("kind", ctypes.c_int),
+            ("til_or_since", ctypes.c_ulong), ("idle", ctypes.c_ulong), ("eventMask", ctypes.c_ulong),
+        ]
+
+    def __init__(self):
+        if not os.environ.get("DISPLAY"):
+            raise OSError("DISPLAY não definido")
+        xlib_path = ctypes.util.find_library("X11")
+        xss_path = ctypes.util.find_library("Xss")
+        if not xlib_path or not xss_path:
+            raise OSError("libX11/libXss indisponíveis")
+        self._xlib = ctypes.cdll.LoadLibrary(xlib_path)
+        self._xss = ctypes.cdll.LoadLibrary(xss_path)
+        self._xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self._xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self._xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self._xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(self._XScreenSaverInfo)
+        self._xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(self._XScreenSaverInfo)
+        ]
+        self._dpy = self._xlib.XOpenDisplay(None)
+        if not self._dpy:
+            raise OSError("XOpenDisplay falhou")
+        self._root = self._xlib.XDefaultRootWindow(self._dpy)
+        self._info = self._xss.XScreenSaverAllocInfo()
+        self.idle_seconds()
+
+    def idle_seconds(self) -> float:
+        if not self._xss.XScreenSaverQueryInfo(self._dpy, self._root, self._info):
+            raise OSError("XScreenSaverQueryInfo falhou")
+        return self._info.contents.idle / 1000.0
 
-    if time.time() - tempo_ultimo_movimento > 60:
-        return False
-    return True
+
+class BackendEvdev:
+    """Marca o instante do último evento lido em /dev/input/event* (thread daemon)."""
+    nome = "evdev"
+    RESCAN_S = 30.0   # procura dispositivos novos/reconectados
+
+    def __init__(self, padrao: str = "/dev/input/event*"):
+        self._padrao = padrao
+        self._fds = {}   # fd -> caminho
+        self._abrir_dispositivos()
+        if not self._fds:
+            raise OSError("nenhum dispositivo de entrada legível")
+        self._ultimo = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name="monitor-evdev", daemon=True)
+        self._thread.start()
+
+    def _abrir_dispositivos(self) -> None:
+        abertos = set(self._fds.values())
+        for path in glob.glob(self._padrao):
+            if path in abertos:
+                continue
+            try:
+                self._fds[os.open(path, os.O_RDONLY | os.O_NONBLOCK)] = path
+            except OSError:
+                continue
+
+    def _fechar(self, fd: int) -> None:
+        self._fds.pop(fd, None)
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+    def _loop(self):
+        proximo_scan = time.monotonic() + self.RESCAN_S
+        while True:
+            if not self._fds or time.monotonic() >= proximo_scan:
+                # todos desconectados (ou scan periódico): o teclado/mouse pode ter voltado
+                self._abrir_dispositivos()
+                proximo_scan = time.monotonic() + self.RESCAN_S
+            if not self._fds:
+                time.sleep(5.0)
+                continue
+            try:
+                prontos, _, _ = select.select(list(self._fds), [], [], 5.0)
+            except (OSError, ValueError):
+                for fd in list(self._fds):
+                    self._fechar(fd)
+                continue
+            lidos = False
+            for fd in prontos:
+                try:
+                    if not os.read(fd, 4096):
+                        raise OSError("fim do arquivo")
+                    lidos = True
+                    while os.read(fd, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                except OSError:
+                    # dispositivo desconectado (ENODEV/EOF): fica "pronto" para sempre; sai do select
+                    self._fechar(fd)
+            if lidos:
+                self._ultimo = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self._ultimo
+
+
+class BackendPolling:
+    """Fallback: compara a posição do mouse entre chamadas (não vê teclado)."""
+    nome = "polling"
+
+    def __init__(self):
+        import pyautogui  # import tardio: só entra se nenhum backend nativo servir
+        self._pyautogui = pyautogui
+        self._pos = None
+        self._ultimo = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        pos = self._pyautogui.position()
+        if pos != self._pos:
+            self._pos = pos
+            self._ultimo = time.monotonic()
+        return time.monotonic() - self._ultimo
+
+
+def detectar_backend():
+    """Escolhe o primeiro backend que inicializa nesta plataforma."""
+    if sys.platform.startswith("win"):
+        candidatos = [BackendWindows, BackendPolling]
+    elif sys.platform == "darwin":
+        candidatos = [BackendMac, BackendPolling]
+    else:
+        candidatos = [BackendX11, BackendEvdev, BackendPolling]
+    for cls in candidatos:
+        try:
+            return cls()
+        except Exception:
+            continue
+    return None
+
+
+# ---------- API do módulo ----------
+_backend = None
+_backend_resolvido = False
+
+def definir_backend(backend) -> None:
+    """Força um backend (ex.: BackendFake em testes/simulação)."""
+    global _backend, _backend_resolvido
+    _backend = backend
+    _backend_resolvido = True
+
+def obter_backend():
+    global _backend, _backend_resolvido
+    if not _backend_resolvido:
+        _backend = detectar_backend()
+        _backend_resolvido = True
+    return _backend
+
+def idle_seconds() -> Optional[float]:
+    """Segundos desde a última entrada do usuário; None se não houver backend."""
+    backend = obter_backend()
+    if backend is None:
+        return None
+    try:
+        return backend.idle_seconds()
+    except Exception:
+        return None
+
+def esta_usando_computador(timeout: float = TIMEOUT_PADRAO) -> bool:
+    """True se houve teclado/mouse nos últimos `timeout` s (na dúvida, True)."""
+    idle = idle_seconds()
+    if idle is None:
+        return True
+    return idle <= timeout
@@ -0,0 +1,320 @@
+# app/config/particoes.py
+"""
+Particionamento declarativo das tabelas de leituras (leituras_emocionais e
+leituras_compactas) por faixa de data_captura (mensal ou semanal) + retenção.
+As duas recebem o mesmo tratamento: com ARMAZENAMENTO_COMPACTO as leituras
+novas vão para leituras_compactas, e a retenção precisa valer nela também.
+
+- converter_para_particionada(): conversão única de uma tabela comum para
+  PARTITION BY RANGE (data_captura), copiando as linhas existentes. É um
+  comando explícito (--converter), não roda sozinha no startup nem numa
+  migração: o schema de uma versão não depende do ambiente do host.
+- criar_particoes(): garante as partições do período atual e das
+  PARTICOES_A_FRENTE seguintes (a partição DEFAULT só pega o que escapar).
+- aplicar_retencao(): partições que terminam antes de agora - RETENCAO_DIAS
+  são desanexadas (DETACH, ficam como tabela solta `*_arquivo`) ou
+  removidas (DROP) — em vez de DELETEs que incham a tabela.
+
+Tudo roda sob advisory lock, então várias instâncias podem chamar
+manter_particoes() ao mesmo tempo; tabelas ainda não particionadas ficam de
+fora. Uso manual:
+
+    python -m config.particoes --converter   # uma vez: tabelas comuns -> particionadas
+    python -m config.particoes               # cria à frente + retenção
+    python -m config.particoes --listar
+"""
+import argparse
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from config.config import (
+    PARTICIONAR_LEITURAS, PARTICAO_GRANULARIDADE, PARTICOES_A_FRENTE,
+    RETENCAO_DIAS, RETENCAO_ACAO,
+)
+from config.compacto import TABELA_COMPACTA
+from config.conexao import conexao
+from config.log import logger
+
+TABELA = "leituras_emocionais"
+TABELAS = (TABELA, TABELA_COMPACTA)
+INTERVALO_MANUTENCAO_S = 6 * 3600
+_LOCK_CHAVE = "particoes_leituras_emocionais"
+
+
+def _default(tabela: str) -> str:
+    return f"{tabela}_default"
+
+def _re_particao(tabela: str) -> "re.Pattern":
+    return re.compile(rf"^{tabela}_p(\d{{4}})_(\d{{2}})(?:_(\d{{2}}))?$")
+
+
+# ---------- períodos ----------
+def inicio_periodo(dt: datetime, granularidade: str = PARTICAO_GRANULARIDADE) -> datetime:
+    if granularidade == "mes":
+        return datetime(dt.year, dt.month, 1)
+    if granularidade == "semana":
+        d = datetime(dt.year, dt.month, dt.day)
+        return d - timedelta(days=d.weekday())   # segunda-feira
+    raise ValueError(f"granularidade desconhecida: {granularidade}")
+
+def proximo_periodo(inicio: datetime, granularidade: str = PARTICAO_GRANULARIDADE) -> datetime:
+    if granularidade == "mes":
+        return datetime(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    return inicio + timedelta(days=7)
+
+def nome_particao(inicio: datetime, granularidade: str = PARTICAO_GRANULARIDADE,
+                  tabela: str = TABELA) -> str:
+    if granularidade == "mes":
+        return f"{tabela}_p{inicio:%Y_%m}"
+    return f"{tabela}_p{inicio:%Y_%m_%d}"
+
+def _periodo_do_nome(nome: str, tabela: str = TABELA) -> Optional[Tuple[datetime, datetime]]:
+    m = _re_particao(tabela).match(nome)
+    if not m:
+        return None
+    ano, mes, dia = int(m.group(1)), int(m.group(2)), m.group(3)
+    if dia is None:
+        ini = datetime(ano, mes, 1)
+        return ini, proximo_periodo(ini, "mes")
+    ini = datetime(ano, mes, int(dia))
+    return ini, proximo_periodo(ini, "semana")
+
+
+# ---------- catálogo ----------
+def esta_particionada(cur, tabela: str = TABELA) -> bool:
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (tabela,))
+    row = cur.fetchone()
+    return bool(row) and row[0] == "p"
+
+def listar_particoes(cur, tabela: str = TABELA) -> List[str]:
+    cur.execute("""
+        SELECT c.relname FROM pg_inherits i
+          JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = to_regclass(%s)
+         ORDER BY c.relname
+    """, (tabela,))
+    return [r[0] for r in cur.fetchall()]
+
+
+# ---------- operações ----------
+def converter_para_particionada(cur, tabela: str = TABELA) -> int:
+    """
+    Troca a tabela comum por uma particionada com as mesmas colunas, defaults e
+    CHECKs, e copia as linhas. PK vira (id, data_captura) — chave de partição
+    precisa estar em toda constraint única. Os índices (fora os de constraint)
+    e as FKs (LIKE não as copia; leituras_compactas referencia os lookups de
+    códigos) são recriados no pai com as definições da tabela antiga, e as
+    views que leem dela (vw_leituras_emocionais) são removidas e recriadas com
+    a mesma definição — o RENAME as levaria para a tabela antiga, que é removida.
+    Retorna quantas linhas copiou.
+    """
+    legado = f"{tabela}_legado"
+    cur.execute("SELECT pg_get_serial_sequence(%s, 'id')", (tabela,))
+    seq = cur.fetchone()[0]
+    cur.execute("""
+        SELECT DISTINCT v.oid::regclass::text, pg_get_viewdef(v.oid)
+          FROM pg_depend d
+          JOIN pg_rewrite r ON r.oid = d.objid
+          JOIN pg_class v ON v.oid = r.ev_class
+         WHERE d.classid = 'pg_rewrite'::regclass AND d.refobjid = to_regclass(%s) AND v.relkind = 'v'
+    """, (tabela,))
+    views = cur.fetchall()
+    for nome, _ in views:
+        cur.execute(f"DROP VIEW {nome}")
+    cur.execute("""
+        SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x
+         WHERE x.indrelid = to_regclass(%s)
+           AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    """, (tabela,))
+    indices = [re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX IF NOT EXISTS ", d) for (d,) in cur.fetchall()]
+    cur.execute("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+         WHERE conrelid = to_regclass(%s) AND contype = 'f'
+    """, (tabela,))
+    fks = cur.fetchall()
+    cur.execute(f"ALTER TABLE {tabela} RENAME TO {legado}")
+    # nomes de constraints/índices são por schema: libera para a tabela nova
+    cur.execute("""
+        SELECT c.conname FROM pg_constraint c
+         WHERE c.conrelid = to_regclass(%s) AND c.contype IN ('p', 'u')
+    """, (legado,))
+    for (conname,) in cur.fetchall():
+        cur.execute(f'ALTER TABLE {legado} RENAME CONSTRAINT "{conname}" TO "{conname}_legado"')
+    cur.execute("""
+        SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+         WHERE x.indrelid = to_regclass(%s)
+           AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    """, (legado,))
+    for (idx,) in cur.fetchall():
+        cur.execute(f'ALTER INDEX "{idx}" RENAME TO "{idx}_legado"')
+
+    cur.execute(f"""
+        CREATE TABLE {tabela}
+          (LIKE {legado} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)
+          PARTITION BY RANGE (data_captura)
+    """)
+    cur.execute(f"ALTER TABLE {tabela} ADD PRIMARY KEY (id, data_captura)")
+    if seq:
+        cur.execute(f"ALTER SEQUENCE {seq} OWNED BY {tabela}.id")
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {_default(tabela)} PARTITION OF {tabela} DEFAULT")
+
+    cur.execute(f"SELECT MIN(data_captura), MAX(data_captura) FROM {legado}")
+    ini, fim = cur.fetchone()
+    if ini is not None:
+        criar_particoes(cur, desde=ini, ate=fim, tabela=tabela)
+    criar_particoes(cur, tabela=tabela)
+    cur.execute(f"INSERT INTO {tabela} SELECT * FROM {legado}")
+    copiadas = cur.rowcount
+    # depois da cópia: construir de uma vez é mais rápido que manter linha a linha
+    for definicao in indices:
+        cur.execute(definicao)
+    for conname, definicao in fks:
+        cur.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT "{conname}" {definicao}')
+    cur.execute(f"DROP TABLE {legado}")
+    for nome, definicao in views:
+        cur.execute(f"CREATE VIEW {nome} AS {definicao}")
+    logger.info(f"{tabela} convertida para particionada ({PARTICAO_GRANULARIDADE}); {copiadas} linhas copiadas")
+    return copiadas
+
+def _criar_particao(cur, tabela: str, inicio: datetime, fim: datetime, nome: str) -> None:
+    default = _default(tabela)
+    cur.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE data_captura >= %s AND data_captura < %s)",
+                (inicio, fim))
+    if not cur.fetchone()[0]:
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {nome} PARTITION OF {tabela} FOR VALUES FROM (%s) TO (%s)",
+                    (inicio, fim))
+        return
+    # a DEFAULT já tem linhas desse período: tira a DEFAULT, cria a partição e re-roteia as linhas
+    cur.execute(f"ALTER TABLE {tabela} DETACH PARTITION {default}")
+    cur.execute(f"CREATE TABLE {nome} PARTITION OF {tabela} FOR VALUES FROM (%s) TO (%s)", (inicio, fim))
+    cur.execute(f"""
+        WITH movidas AS (
+          DELETE FROM {default} WHERE data_captura >= %s AND data_captura < %s RETURNING *
+        )
+        INSERT INTO {tabela} SELECT * FROM movidas
+    """, (inicio, fim))
+    logger.info(f"{cur.rowcount} linhas movidas da partição default para {nome}")
+    cur.execute(f"ALTER TABLE {tabela} ATTACH PARTITION {default} DEFAULT")
+
+def criar_particoes(cur, a_frente: int = PARTICOES_A_FRENTE,
+                    desde: Optional[datetime] = None, ate: Optional[datetime] = None,
+                    tabela: str = TABELA) -> List[str]:
+    """Cria (se faltarem) as partições de `desde` até `ate` + a_frente períodos. Retorna as criadas."""
+    agora = datetime.now()
+    ini = inicio_periodo(desde or agora)
+    limite = inicio_periodo(max(ate or agora, desde or agora))
+    for _ in range(a_frente):
+        limite = proximo_periodo(limite)
+    criadas = []
+    while ini <= limite:
+        fim = proximo_periodo(ini)
+        nome = nome_particao(ini, tabela=tabela)
+        cur.execute("SELECT to_regclass(%s)", (nome,))
+        if cur.fetchone()[0] is None:
+            _criar_particao(cur, tabela, ini, fim, nome)
+            criadas.append(nome)
+        ini = fim
+    return criadas
+
+def aplicar_retencao(cur, dias: int = RETENCAO_DIAS, acao: str = RETENCAO_ACAO,
+                     tabela: str = TABELA) -> List[str]:
+    """DETACH/DROP das partições inteiramente mais antigas que `dias`. dias <= 0 desliga."""
+    if dias <= 0:
+        return []
+    if acao not in ("detach", "drop"):
+        raise ValueError(f"ação de retenção desconhecida: {acao}")
+    corte = datetime.now() - timedelta(days=dias)
+    removidas = []
+    for nome in listar_particoes(cur, tabela):
+        periodo = _periodo_do_nome(nome, tabela)
+        if periodo is None or periodo[1] > corte:
+            continue
+        cur.execute(f"ALTER TABLE {tabela} DETACH PARTITION {nome}")
+        if acao == "drop":
+            cur.execute(f"DROP TABLE {nome}")
+        else:
+            # renomeia para não colidir se o período voltar a receber dados
+            cur.execute(f"ALTER TABLE {nome} RENAME TO {nome}_arquivo")
+        removidas.append(nome)
+    if removidas:
+        logger.info(f"Retenção ({dias} dias, {acao}): {', '.join(removidas)}")
+    return removidas
+
+def _travar(cur) -> None:
+    """Advisory lock + timeout liberado."""
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_LOCK_CHAVE,))
+    # conversão e re-roteio de linhas da DEFAULT passam do statement_timeout do pool
+    cur.execute("SET LOCAL statement_timeout = 0")
+
+def _existe(cur, tabela: str) -> bool:
+    cur.execute("SELECT to_regclass(%s)", (tabela,))
+    return cur.fetchone()[0] is not None
+
+def converter() -> int:
+    """Comando explícito: converte as tabelas que ainda não são particionadas. Retorna as linhas copiadas."""
+    copiadas = 0
+    with conexao() as conn, conn.cursor() as cur:
+        _travar(cur)
+        for tabela in TABELAS:
+            if _existe(cur, tabela) and not esta_particionada(cur, tabela):
+                copiadas += converter_para_particionada(cur, tabela)
+    return copiadas
+
+def manter_particoes() -> dict:
+    """Cria partições à frente e aplica a retenção nas tabelas já particionadas."""
+    if not PARTICIONAR_LEITURAS:
+        return {}
+    criadas, removidas = [], []
+    with conexao() as conn, conn.cursor() as cur:
+        _travar(cur)
+        for tabela in TABELAS:
+            if not _existe(cur, tabela):
+                continue
+            if not esta_particionada(cur, tabela):
+                logger.info(f"{tabela} não é particionada; rode python -m config.particoes --converter")
+                continue
+            criadas += criar_particoes(cur, tabela=tabela)
+            removidas += aplicar_retencao(cur, tabela=tabela)
+    if criadas:
+        logger.info(f"Partições criadas: {', '.join(criadas)}")
+    return {"criadas": criadas, "removidas": removidas}
+
+def iniciar_manutencao(intervalo_s: float = INTERVALO_MANUTENCAO_S) -> threading.Thread:
+    """Thread daemon que roda manter_particoes() periodicamente."""
+    parar = threading.Event()
+
+    def _loop():
+        # primeira rodada já no início (fora do startup): partições à frente + retenção
+        while True:
+            try:
+                manter_particoes()
+            except Exception as e:
+                logger.warning(f"Manutenção de partições falhou: {e}")
+            if parar.wait(intervalo_s):
+                break
+
+    t = threading.Thread(target=_loop, name="manutencao-particoes", daemon=True)
+    t.parar = parar
+    t.start()
+    return t
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partições das tabelas de leituras")
+    parser.add_argument("--listar", action="store_true", help="só lista as partições")
+    parser.add_argument("--converter", action="store_true",
+                        help="converte as tabelas comuns para particionadas (uma vez)")
+    args = parser.parse_args()
+    if args.converter:
+        print(f"linhas copiadas: {converter()}")
+    if not args.listar:
+        print(manter_particoes())
+    with conexao() as conn, conn.cursor() as cur:
+        for tabela in TABELAS:
+            for nome in listar_particoes(cur, tabela):
+                print(nome)
+
+if __name__ == "__main__":
+    main()
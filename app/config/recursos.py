@@ -1,8 +1,152 @@
+# app/config/recursos.py
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
 import psutil
 
-def coletar_recursos():
-    return {
-        "cpu": psutil.cpu_percent(interval=1),
-        "mem": psutil.virtual_memory().percent,
-        "disk": psutil.disk_usage('/').percent
-    }
+# Cadência própria do amostrador (independente do loop de captura)
+INTERVALO_AMOSTRA  = 2.0     # segundos entre amostras
+TAMANHO_BUFFER     = 300     # ~10 min de histórico com amostras a cada 2s
+PRIMEIRA_AMOSTRA_S = 0.25    # atraso da 1ª amostra (cpu_percent precisa de um delta)
+DISCO_PATH         = "/"
+
+CHAVES_MEDIA = ("cpu", "mem", "disk", "proc_cpu", "proc_mem_mb", "bateria")
+
+
+class AmostradorRecursos:
+    """
+    Coleta CPU/memória/disco (e opcionalmente processo e bateria) numa thread
+    de fundo, guardando as amostras num ring buffer. Leituras são instantâneas:
+    o loop principal nunca dorme só para medir CPU.
+    """
+
+    def __init__(self,
+                 intervalo: float = INTERVALO_AMOSTRA,
+                 tamanho: int = TAMANHO_BUFFER,
+                 disco_path: str = DISCO_PATH,
+                 incluir_processo: bool = False,
+                 incluir_bateria: bool = False):
+        self.intervalo = float(intervalo)
+        self.disco_path = disco_path
+        self.incluir_bateria = incluir_bateria
+        self._proc = psutil.Process(os.getpid()) if incluir_processo else None
+        self._buf = deque(maxlen=int(tamanho))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- coleta ----------
+    def _amostrar(self) -> Dict[str, float]:
+        # interval=None: não bloqueia, mede desde a chamada anterior
+        amostra = {
+            "ts": time.monotonic(),
+            "cpu": psutil.cpu_percent(interval=None),
+            "mem": psutil.virtual_memory().percent,
+            "disk": psutil.disk_usage(self.disco_path).percent,
+        }
+        if self._proc is not None:
+            try:
+                amostra["proc_cpu"] = self._proc.cpu_percent(interval=None)
+                amostra["proc_mem_mb"] = self._proc.memory_info().rss / (1024 * 1024)
+            except Exception:
+                pass
+        if self.incluir_bateria:
+            try:
+                bat = psutil.sensors_battery()
+                if bat is not None:
+                    amostra["bateria"] = float(bat.percent)
+                    amostra["na_tomada"] = bool(bat.power_plugged)
+            except Exception:
+                pass
+        return amostra
+
+    def _loop(self):
+        espera = PRIMEIRA_AMOSTRA_S
+        while not self._stop.wait(espera):
+            try:
+                amostra = self._amostrar()
+                with self._lock:
+                    self._buf.append(amostra)
+            except Exception:
+                pass
+            espera = self.intervalo
+
+    def iniciar(self) -> "AmostradorRecursos":
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        # "prime" dos contadores de CPU para a 1ª amostra já ter um delta válido
+        psutil.cpu_percent(interval=None)
+        if self._proc is not None:
+            try:
+                self._proc.cpu_percent(interval=None)
+            except Exception:
+                pass
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="amostrador-recursos", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    # ---------- leitura ----------
+    def ultimo(self) -> Optional[Dict[str, float]]:
+        with self._lock:
+            return dict(self._buf[-1]) if self._buf else None
+
+    def media(self, chave: str = "cpu", janela_s: float = 60.0) -> Optional[float]:
+        """Média de `chave` nas amostras dos últimos `janela_s` segundos."""
+        limite = time.monotonic() - janela_s
+        with self._lock:
+            vals = [a[chave] for a in self._buf if a["ts"] >= limite and chave in a]
+        if not vals:
+            return None
+        return sum(vals) / len(vals)
+
+    def medias(self, janela_s: float = 60.0) -> Dict[str, float]:
+        out = {}
+        for k in CHAVES_MEDIA:
+            v = self.media(k, janela_s)
+            if v is not None:
+                out[k] = v
+        return out
+
+
+# ---------- instância compartilhada do processo ----------
+_amostrador: Optional[AmostradorRecursos] = None
+_amostrador_lock = threading.Lock()
+
+def obter_amostrador(**kwargs) -> AmostradorRecursos:
+    """Retorna (e inicia na 1ª chamada) o amostrador compartilhado."""
+    global _amostrador
+    with _amostrador_lock:
+        if _amostrador is None:
+            _amostrador = AmostradorRecursos(**kwargs).iniciar()
+        return _amostrador
+
+def coletar_recursos() -> Dict[str, float]:
+    """
+    Última amostra no formato histórico {"cpu","mem","disk"} — sem bloquear.
+    Antes da 1ª amostra da thread, cpu vem 0.0 e mem/disk são lidos na hora.
+    """
+    ult = obter_amostrador().ultimo()
+    if ult is None:
+        return {
+            "cpu": 0.0,
+            "mem": psutil.virtual_memory().percent,
+            "disk": psutil.disk_usage(DISCO_PATH).percent,
+        }
+    return {"cpu": ult["cpu"], "mem": ult["mem"], "disk": ult["disk"]}
+
+def cpu_suavizada(janela_s: float = 30.0) -> float:
+    """CPU média da janela (sinal suavizado para o modo economia)."""
+    v = obter_amostrador().media("cpu", janela_s)
+    if v is None:
+        return coletar_recursos()["cpu"]
+    return v
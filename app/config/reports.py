@@ -1,15 +1,12 @@
-import psycopg2, pandas as pd
+import pandas as pd
 from datetime import datetime, timedelta
 import smtplib, ssl
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from decouple import config
 
-DB_NAME = config("DB_NAME", default="emocional")
-DB_USER = config("DB_USER", default="arthurfaria")
-DB_PASSWORD = config("DB_PASSWORD", default="")
-DB_HOST = config("DB_HOST", default="localhost")
-DB_PORT = config("DB_PORT", default="5432")
+from config.conexao import conexao
+from config.rollups import EMOCOES, DOMINANTES, TABELA, escolher_grao, tabela_rollup, TRUNC_SQL
 
 SMTP_HOST = config("SMTP_HOST")
 SMTP_PORT = config("SMTP_PORT", cast=int, default=587)
@@ -19,35 +16,36 @@ REPORT_TO  = config("REPORT_TO")
 REPORT_FROM = config("REPORT_FROM", default=SMTP_USER)
 
 def _q(sql, params=None):
-    conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD,
-                            host=DB_HOST, port=DB_PORT)
-    df = pd.read_sql(sql, conn, params=params)
-    conn.close()
-    return df
+    with conexao() as conn:
+        return pd.read_sql(sql, conn, params=params)
 
 def build_report(period_hours=24):
     t_end = datetime.now()
     t_start = t_end - timedelta(hours=period_hours)
 
-    kpis = _q("""
-        SELECT AVG(feliz) feliz, AVG(triste) triste, AVG(medo) medo, AVG(raiva) raiva,
-               AVG(desgosto) desgosto, AVG(surpresa) surpresa, AVG(neutro) neutro, COUNT(*) leituras
-        FROM leituras_emocionais
-        WHERE data_captura BETWEEN %(ini)s AND %(fim)s
-    """, {"ini": t_start, "fim": t_end}).iloc[0].fillna(0)
+    # lê dos rollups como estão (custo ~ tamanho da janela); quem os atualiza
+    # é o job de config/rollups.py, não o relatório
+    marca = _q("SELECT ate FROM rollup_marca WHERE nome = %(nome)s", {"nome": TABELA})
+    ate = marca.iloc[0, 0] if len(marca) else None
+    grao = escolher_grao(t_start, t_end)
+    params = {"trunc": TRUNC_SQL[grao], "ini": t_start, "fim": t_end}
+    janela = f"FROM {tabela_rollup(grao)} WHERE balde >= date_trunc(%(trunc)s, %(ini)s) AND balde <= %(fim)s"
 
-    dom = _q("""
-        SELECT emocao_dominante, COUNT(*) qtd
-        FROM leituras_emocionais
-        WHERE data_captura BETWEEN %(ini)s AND %(fim)s
-        GROUP BY emocao_dominante
-        ORDER BY qtd DESC
-        LIMIT 5
-    """, {"ini": t_start, "fim": t_end})
+    medias = ", ".join(f"SUM(soma_{e}) / NULLIF(SUM(n_emocoes), 0) {e}" for e in EMOCOES)
+    kpis = _q(f"""
+        SELECT {medias}, COALESCE(SUM(leituras), 0) leituras
+        {janela}
+    """, params).iloc[0].fillna(0)
+
+    hist = _q(f"SELECT {', '.join(f'SUM(dom_{d}) {d}' for d in DOMINANTES)} {janela}", params).iloc[0].fillna(0)
+    dom = (hist.rename_axis("emocao_dominante").reset_index(name="qtd")
+               .astype({"qtd": int}).query("qtd > 0")
+               .sort_values("qtd", ascending=False).head(5))
 
     html = f"""
     <h2>Relatório Emocional — Últimas {period_hours}h</h2>
-    <p><b>Janela:</b> {t_start:%d/%m %H:%M} → {t_end:%d/%m %H:%M}</p>
+    <p><b>Janela:</b> {t_start:%d/%m %H:%M} → {t_end:%d/%m %H:%M}
+       (rollups até {f"{ate:%d/%m %H:%M}" if ate is not None else "—"})</p>
     <ul>
       <li>Leituras: <b>{int(kpis['leituras'])}</b></li>
       <li>Médias (%): feliz {kpis['feliz']:.1f} | triste {kpis['triste']:.1f} |
@@ -0,0 +1,199 @@
+# app/config/rollups.py
+"""
+Rollups de leituras_emocionais por minuto, hora e dia (chave: balde, pessoa_id).
+
+Cada balde guarda somas e contagens — nunca médias — para que baldes
+maiores sejam a soma dos menores e qualquer janela seja agregável:
+
+    leituras, ausentes, n_emocoes, soma_<emoção>, dom_<dominante>,
+    n_recursos, soma_cpu, soma_memoria, soma_disco
+
+Atualização incremental (atualizar_rollups): a marca d'água é
+leituras_emocionais.inserido_em (quando a linha chegou ao banco, não quando
+foi capturada — o spool pode entregar leituras atrasadas). Cada rodada pega
+as linhas inseridas desde a marca menos SOBREPOSICAO_S, descobre os baldes
+de minuto afetados e os recalcula inteiros a partir do bruto; hora e dia são
+recalculados a partir do minuto. Recalcular (em vez de somar deltas) torna a
+sobreposição inofensiva e cobre transações que commitaram fora de ordem.
+
+Relatórios/Grafana leem das views vw_rollup_<grão> (médias prontas) ou das
+tabelas, e o custo passa a depender do tamanho da janela, não do número de
+leituras brutas. Tabelas, views e inserido_em vêm da migração 0004; mudar
+COLUNAS_ROLLUP pede uma migração nova.
+
+O job roda num lugar só, não em cada agente de captura: ROLLUPS_ATIVO=true
+num agente (main.py sobe a thread) ou um processo dedicado:
+
+    python -m config.rollups             # a cada INTERVALO_ROLLUP_S
+    python -m config.rollups --uma-vez
+"""
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from config.compacto import ORIGEM_LEITURAS as ORIGEM
+from config.conexao import conexao
+from config.leitura import PERMITIDAS
+from config.log import logger
+
+TABELA = "leituras_emocionais"
+GRAOS = ("minuto", "hora", "dia")
+TRUNC_SQL = {"minuto": "minute", "hora": "hour", "dia": "day"}
+_INTERVALO = {"minuto": "1 minute", "hora": "1 hour", "dia": "1 day"}
+EMOCOES = ("raiva", "desgosto", "medo", "feliz", "triste", "surpresa", "neutro")
+DOMINANTES = tuple(sorted(PERMITIDAS))
+RECURSOS = ("cpu", "memoria", "disco")
+SOBREPOSICAO_S = 300
+INTERVALO_ROLLUP_S = 60.0
+_LOCK_CHAVE = "rollups_leituras_emocionais"
+
+# coluna -> (tipo, agregação sobre o bruto)
+COLUNAS_ROLLUP: Dict[str, tuple] = {
+    "leituras":  ("INTEGER", "COUNT(*)"),
+    "ausentes":  ("INTEGER", "COUNT(*) FILTER (WHERE face_status = 'ausente')"),
+    "n_emocoes": ("INTEGER", "COUNT(feliz)"),
+    **{f"soma_{e}": ("DOUBLE PRECISION", f"COALESCE(SUM({e}), 0)") for e in EMOCOES},
+    **{f"dom_{d}": ("INTEGER", f"COUNT(*) FILTER (WHERE emocao_dominante = '{d}')") for d in DOMINANTES},
+    "n_recursos": ("INTEGER", "COUNT(cpu)"),
+    **{f"soma_{r}": ("DOUBLE PRECISION", f"COALESCE(SUM({r}), 0)") for r in RECURSOS},
+}
+
+
+def tabela_rollup(grao: str) -> str:
+    return f"leituras_rollup_{grao}"
+
+def _recalcular_minutos(cur) -> None:
+    """Recalcula, a partir do bruto, os baldes de minuto listados em _rollup_afetados."""
+    cols = ", ".join(COLUNAS_ROLLUP)
+    aggs = ", ".join(agg for _, agg in COLUNAS_ROLLUP.values())
+    sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in COLUNAS_ROLLUP)
+    cur.execute(f"""
+        INSERT INTO {tabela_rollup("minuto")} (balde, pessoa_id, {cols})
+        SELECT a.balde, a.pessoa_id, {aggs}
+          FROM _rollup_afetados a
+          JOIN {ORIGEM} l
+            ON COALESCE(l.pessoa_id, '') = a.pessoa_id
+           AND l.data_captura >= a.balde AND l.data_captura < a.balde + interval '1 minute'
+         GROUP BY a.balde, a.pessoa_id
+        ON CONFLICT (balde, pessoa_id) DO UPDATE SET {sets}
+    """)
+
+def _reconstruir_minutos(cur) -> None:
+    """Primeira carga: agrega o bruto inteiro de uma vez (sem o join por balde)."""
+    cols = ", ".join(COLUNAS_ROLLUP)
+    aggs = ", ".join(agg for _, agg in COLUNAS_ROLLUP.values())
+    cur.execute(f"""
+        INSERT INTO {tabela_rollup("minuto")} (balde, pessoa_id, {cols})
+        SELECT date_trunc('minute', data_captura), COALESCE(pessoa_id, ''), {aggs}
+          FROM {ORIGEM}
+         WHERE data_captura IS NOT NULL
+         GROUP BY 1, 2
+    """)
+
+def _recalcular_grao(cur, grao: str, origem: str) -> None:
+    """Recalcula os baldes de `grao` afetados somando os baldes de `origem`."""
+    cols = ", ".join(COLUNAS_ROLLUP)
+    somas = ", ".join(f"SUM(o.{c})" for c in COLUNAS_ROLLUP)
+    sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in COLUNAS_ROLLUP)
+    trunc = TRUNC_SQL[grao]
+    cur.execute(f"""
+        INSERT INTO {tabela_rollup(grao)} (balde, pessoa_id, {cols})
+        SELECT a.balde, a.pessoa_id, {somas}
+          FROM (SELECT DISTINCT date_trunc('{trunc}', balde) AS balde, pessoa_id FROM _rollup_afetados) a
+          JOIN {tabela_rollup(origem)} o
+            ON o.pessoa_id = a.pessoa_id
+           AND o.balde >= a.balde AND o.balde < a.balde + interval '{_INTERVALO[grao]}'
+         GROUP BY a.balde, a.pessoa_id
+        ON CONFLICT (balde, pessoa_id) DO UPDATE SET {sets}
+    """)
+
+def atualizar_rollups(esperar_lock: bool = True) -> Optional[int]:
+    """
+    Rodada incremental. Na primeira vez (sem marca d'água) reconstrói tudo.
+    Retorna quantos baldes de minuto foram recalculados, ou None se outra
+    instância está rodando e esperar_lock=False.
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        if esperar_lock:
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_LOCK_CHAVE,))
+        else:
+            cur.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", (_LOCK_CHAVE,))
+            if not cur.fetchone()[0]:
+                return None
+        # a primeira carga (e uma rodada depois de muito atraso) passa do statement_timeout do pool
+        cur.execute("SET LOCAL statement_timeout = 0")
+        cur.execute("SELECT ate FROM rollup_marca WHERE nome = %s", (TABELA,))
+        row = cur.fetchone()
+        marca = row[0] if row else None
+        cur.execute("SELECT now()")
+        ate = cur.fetchone()[0]
+
+        if marca is None:
+            filtro, params = "TRUE", {}
+            for grao in GRAOS:
+                cur.execute(f"TRUNCATE {tabela_rollup(grao)}")
+        else:
+            filtro = "inserido_em > %(desde)s - %(sobreposicao)s * interval '1 second'"
+            params = {"desde": marca, "sobreposicao": SOBREPOSICAO_S}
+        cur.execute(f"""
+            CREATE TEMP TABLE _rollup_afetados ON COMMIT DROP AS
+            SELECT DISTINCT date_trunc('minute', data_captura) AS balde, COALESCE(pessoa_id, '') AS pessoa_id
+              FROM {ORIGEM}
+             WHERE {filtro} AND data_captura IS NOT NULL
+        """, params)
+        n = cur.rowcount
+        if n:
+            cur.execute("ANALYZE _rollup_afetados")
+            if marca is None:
+                _reconstruir_minutos(cur)
+            else:
+                _recalcular_minutos(cur)
+            _recalcular_grao(cur, "hora", "minuto")
+            _recalcular_grao(cur, "dia", "hora")
+        cur.execute("""
+            INSERT INTO rollup_marca (nome, ate) VALUES (%s, %s)
+            ON CONFLICT (nome) DO UPDATE SET ate = EXCLUDED.ate
+        """, (TABELA, ate))
+    if marca is None or n:
+        logger.debug(f"[ROLLUP] {n} baldes de minuto recalculados (marca {marca} -> {ate})")
+    return n
+
+def escolher_grao(inicio: datetime, fim: datetime) -> str:
+    """Grão mais grosso que ainda representa bem a janela."""
+    horas = (fim - inicio).total_seconds() / 3600.0
+    if horas <= 6:
+        return "minuto"
+    if horas <= 24 * 31:
+        return "hora"
+    return "dia"
+
+def iniciar_rollups(intervalo_s: float = INTERVALO_ROLLUP_S) -> threading.Thread:
+    """Thread daemon que roda atualizar_rollups() periodicamente."""
+    parar = threading.Event()
+
+    def _loop():
+        while not parar.wait(intervalo_s):
+            try:
+                atualizar_rollups(esperar_lock=False)
+            except Exception as e:
+                logger.warning(f"Atualização de rollups falhou: {e}")
+
+    t = threading.Thread(target=_loop, name="rollups", daemon=True)
+    t.parar = parar
+    t.start()
+    return t
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollups minuto/hora/dia de leituras_emocionais")
+    parser.add_argument("--uma-vez", action="store_true", help="uma rodada e sai")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_ROLLUP_S, help="segundos entre rodadas")
+    args = parser.parse_args()
+    if args.uma_vez:
+        print(atualizar_rollups())
+        return
+    iniciar_rollups(args.intervalo).join()
+
+if __name__ == "__main__":
+    main()
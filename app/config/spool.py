@@ -0,0 +1,227 @@
+# app/config/spool.py
+"""
+Spool local (SQLite em modo WAL) para as leituras: toda leitura é gravada
+primeiro aqui e uma thread de sincronização drena para o Postgres em lotes.
+
+- O loop de captura nunca espera pela rede: `adicionar` é um INSERT local.
+- Cada linha tem uma chave de idempotência (leitura_uuid); o envio usa
+  ON CONFLICT DO NOTHING, então reenviar um lote já gravado não duplica.
+- Com o banco fora, o sincronizador faz backoff exponencial (com jitter)
+  e as leituras ficam no disco — sobrevivem a quedas, reinícios e suspensão.
+"""
+import atexit
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from config.config import (
+    SPOOL_CAMINHO, SPOOL_LOTE, SPOOL_MAX_LINHAS, SPOOL_INTERVALO_S,
+    SPOOL_BACKOFF_MAX_S, LOTE_METODO,
+)
+from config.leitura import COLUNAS_LEITURA
+from config.log import logger
+
+BACKOFF_MIN_S = 2.0
+INTERVALO_LOG_S = 300.0   # resumo de pendências no log enquanto houver atraso
+
+
+def _json_padrao(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if hasattr(v, "item"):   # escalares numpy
+        return v.item()
+    raise TypeError(f"tipo não serializável no spool: {type(v).__name__}")
+
+def _linha(texto: str) -> tuple:
+    # linhas de versões anteriores têm menos colunas (acrescentadas no fim de COLUNAS_LEITURA)
+    v = json.loads(texto)
+    return tuple(v) + (None,) * (len(COLUNAS_LEITURA) - len(v))
+
+
+class SpoolLeituras:
+    """Fila durável em SQLite + thread que envia ao Postgres."""
+
+    def __init__(self,
+                 caminho: str = SPOOL_CAMINHO,
+                 lote: int = SPOOL_LOTE,
+                 max_linhas: int = SPOOL_MAX_LINHAS,
+                 intervalo_s: float = SPOOL_INTERVALO_S,
+                 backoff_max_s: float = SPOOL_BACKOFF_MAX_S,
+                 metodo: str = LOTE_METODO,
+                 gravar: Optional[Callable[[List[tuple], str], int]] = None,
+                 relogio: Callable[[], float] = time.time,
+                 iniciar: bool = True):
+        if gravar is None:
+            from config.database import inserir_leituras
+            gravar = lambda linhas, metodo: inserir_leituras(linhas, metodo, idempotente=True)
+        self.caminho = os.path.expanduser(caminho)
+        if self.caminho != ":memory:":
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        self.lote = max(1, int(lote))
+        self.max_linhas = int(max_linhas)
+        self.intervalo_s = float(intervalo_s)
+        self.backoff_max_s = float(backoff_max_s)
+        self.metodo = metodo
+        self._gravar = gravar
+        self._relogio = relogio
+        self._local = threading.local()
+        self._acordar = threading.Event()
+        self._parar = False
+        self._enviando = threading.Lock()
+        self._backoff = 0.0
+        self._ultimo_log = 0.0
+        # _tamanho muda no produtor (insert/descarte) e no sincronizador (envio)
+        self._lock_tamanho = threading.Lock()
+        self.metricas = {
+            "enfileiradas": 0, "enviadas": 0, "lotes": 0, "falhas": 0, "descartadas": 0,
+            "ultimo_envio": None, "ultimo_erro": None,
+        }
+        self._criar_schema()
+        self._tamanho = self._contar()
+        self._thread = None
+        if iniciar:
+            self._thread = threading.Thread(target=self._loop, name="spool-sync", daemon=True)
+            self._thread.start()
+
+    # ---------- SQLite ----------
+    def _db(self) -> sqlite3.Connection:
+        """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # NORMAL em WAL: sobrevive a crash do processo; queda de energia pode perder o último commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _criar_schema(self) -> None:
+        self._db().execute("""
+            CREATE TABLE IF NOT EXISTS leituras (
+              seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+              chave      TEXT NOT NULL UNIQUE,
+              criado_em  REAL NOT NULL,
+              linha      TEXT NOT NULL
+            )
+        """)
+
+    def _contar(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM leituras").fetchone()[0]
+
+    # ---------- produtor (loop de captura) ----------
+    def adicionar(self, linha: tuple, chave: str) -> None:
+        """Grava a leitura no spool local. Não toca na rede."""
+        db = self._db()
+        cur = db.execute(
+            "INSERT OR IGNORE INTO leituras (chave, criado_em, linha) VALUES (?, ?, ?)",
+            (chave, self._relogio(), json.dumps(list(linha), default=_json_padrao)),
+        )
+        if cur.rowcount == 0:
+            return   # chave repetida: já está no spool
+        with self._lock_tamanho:
+            self._tamanho += 1
+            excesso = self._tamanho - self.max_linhas
+        self.metricas["enfileiradas"] += 1
+        if self.max_linhas > 0 and excesso > 0:
+            # disco não é infinito: descarta as mais antigas
+            cur = db.execute("DELETE FROM leituras WHERE seq IN (SELECT seq FROM leituras ORDER BY seq LIMIT ?)",
+                             (excesso,))
+            with self._lock_tamanho:
+                self._tamanho = max(0, self._tamanho - cur.rowcount)
+            self.metricas["descartadas"] += cur.rowcount
+        if self._tamanho >= self.lote and self._backoff == 0.0:
+            self._acordar.set()
+
+    # ---------- consumidor (sincronizador) ----------
+    def tamanho(self) -> int:
+        return self._tamanho
+
+    def atraso_s(self) -> float:
+        """Idade da leitura mais antiga ainda não enviada (0 se o spool está vazio)."""
+        row = self._db().execute("SELECT MIN(criado_em) FROM leituras").fetchone()
+        return max(0.0, self._relogio() - row[0]) if row and row[0] is not None else 0.0
+
+    def resumo(self) -> Dict:
+        return dict(self.metricas, pendentes=self.tamanho(), atraso_s=round(self.atraso_s(), 1),
+                    backoff_s=round(self._backoff, 1))
+
+    def drenar(self) -> int:
+        """Envia lotes até esvaziar; em falha, para e agenda o próximo retry (backoff)."""
+        total = 0
+        with self._enviando:
+            db = self._db()
+            while True:
+                rows = db.execute("SELECT seq, linha FROM leituras ORDER BY seq LIMIT ?", (self.lote,)).fetchall()
+                if not rows:
+                    break
+                linhas = [_linha(l) for _, l in rows]
+                try:
+                    self._gravar(linhas, self.metodo)
+                except Exception as e:
+                    self.metricas["falhas"] += 1
+                    self.metricas["ultimo_erro"] = str(e).strip()[:200]
+                    anterior = self._backoff
+                    self._backoff = min(self.backoff_max_s, max(BACKOFF_MIN_S, anterior * 2))
+                    if anterior == 0.0:
+                        logger.warning(f"[SPOOL] banco indisponível, {self._tamanho} leituras retidas localmente: {e}")
+                    break
+                # só apaga depois do commit no Postgres; se cair aqui, o reenvio é idempotente
+                # rowcount, não len(rows): o produtor pode ter descartado parte do lote no meio
+                apagadas = db.execute("DELETE FROM leituras WHERE seq <= ?", (rows[-1][0],)).rowcount
+                with self._lock_tamanho:
+                    self._tamanho = max(0, self._tamanho - apagadas)
+                total += len(rows)
+                self.metricas["enviadas"] += len(rows)
+                self.metricas["lotes"] += 1
+                self.metricas["ultimo_envio"] = self._relogio()
+                if self._backoff:
+                    logger.info(f"[SPOOL] banco de volta; sincronizando pendências ({self._tamanho} restantes)")
+                    self._backoff = 0.0
+        return total
+
+    def _loop(self):
+        while not self._parar:
+            espera = self._backoff * random.uniform(0.8, 1.2) if self._backoff else self.intervalo_s
+            self._acordar.wait(timeout=espera)
+            self._acordar.clear()
+            if self._parar:
+                return
+            try:
+                self.drenar()
+            except Exception as e:
+                # erro no SQLite local: não derruba a thread
+                logger.exception(f"[SPOOL] erro no sincronizador: {e}")
+            agora = self._relogio()
+            if self._tamanho and agora - self._ultimo_log >= INTERVALO_LOG_S:
+                self._ultimo_log = agora
+                logger.info(f"[SPOOL] pendentes={self._tamanho} atraso={self.atraso_s():.0f}s "
+                            f"falhas={self.metricas['falhas']}")
+
+    def fechar(self) -> None:
+        """Para a thread e tenta um último envio; o que não for enviado fica no disco."""
+        self._parar = True
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        if self._backoff == 0.0:
+            try:
+                self.drenar()
+            except Exception:
+                pass
+
+
+_spool: Optional[SpoolLeituras] = None
+_spool_lock = threading.Lock()
+
+def obter_spool() -> SpoolLeituras:
+    global _spool
+    with _spool_lock:
+        if _spool is None:
+            _spool = SpoolLeituras()
+            atexit.register(_spool.fechar)
+        return _spool
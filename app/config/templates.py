@@ -0,0 +1,238 @@
+# app/config/templates.py
+"""
+Galeria com vários templates por pessoa.
+
+Cada pessoa guarda até TEMPLATES_MAX embeddings em pessoa_templates e um
+centróide (média normalizada dos templates) em pessoas.embedding_bin — é o
+centróide que galeria em memória, índice ANN e pgvector indexam, então o
+match continua sendo um top-k por pessoa, não por template.
+
+- Match: top-k pelos centróides, depois refinar() pega, para cada
+  candidato, a menor distância entre centróide e templates.
+- Admissão (admitir_template): o primeiro template sempre entra (cadastro);
+  depois só entra um rosto verificado como a mesma pessoa, com nitidez >=
+  TEMPLATE_NITIDEZ_MIN e a pelo menos TEMPLATE_DIVERSIDADE_MIN (distância
+  cosseno) de todos os templates atuais. Com a galeria cheia, sai o template
+  mais redundante (mais perto do vizinho). Um bootstrap com luz ruim não
+  sobrescreve mais a referência.
+
+Templates ficam num cache do processo (mesmo TTL do cache de embeddings);
+a checagem de admissão roda nele e só vai ao banco quando o template entra.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import (EMBEDDING_CACHE_TTL_S, EMBEDDING_DTYPE, TEMPLATES_MAX,
+                           TEMPLATE_NITIDEZ_MIN, TEMPLATE_DIVERSIDADE_MIN)
+from config.conexao import conexao
+from config.log import logger
+
+_EPS = 1e-8
+
+# pessoa_id -> (validade, slots, matriz k x dim normalizada)
+_cache: Dict[str, Tuple[float, List[int], np.ndarray]] = {}
+_cache_lock = threading.Lock()
+
+
+def _normalizar(m: Any) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    return m / (np.linalg.norm(m, axis=-1, keepdims=True) + _EPS)
+
+def centroide(templates: np.ndarray) -> np.ndarray:
+    return _normalizar(templates.mean(axis=0))
+
+def _guardar(pessoa_id: str, slots: List[int], mat: np.ndarray) -> None:
+    mat.flags.writeable = False
+    with _cache_lock:
+        _cache[pessoa_id] = (time.monotonic() + EMBEDDING_CACHE_TTL_S, slots, mat)
+
+def ler_templates(cur, pessoa_ids: List[str]) -> Dict[str, Tuple[List[int], np.ndarray]]:
+    from config.database import embedding_de_bytes
+    cur.execute("""
+        SELECT pessoa_id, slot, embedding_bin, embedding_dtype FROM pessoa_templates
+         WHERE pessoa_id = ANY(%s) ORDER BY pessoa_id, slot
+    """, (pessoa_ids,))
+    linhas: Dict[str, List[Tuple[int, np.ndarray]]] = {}
+    for pid, slot, buf, dtype in cur.fetchall():
+        linhas.setdefault(pid, []).append((slot, embedding_de_bytes(buf, dtype)))
+    return {pid: ([s for s, _ in ls], _normalizar(np.stack([e for _, e in ls])))
+            for pid, ls in linhas.items()}
+
+def carregar_templates(pessoa_ids: Iterable[str]) -> Dict[str, np.ndarray]:
+    """pessoa_id -> matriz (k x dim, linhas normalizadas); uma consulta só para os fora do cache."""
+    pessoa_ids = list(dict.fromkeys(pessoa_ids))
+    agora = time.monotonic()
+    out, faltam = {}, []
+    with _cache_lock:
+        for pid in pessoa_ids:
+            item = _cache.get(pid)
+            if item is not None and item[0] > agora:
+                if len(item[2]):
+                    out[pid] = item[2]
+            else:
+                faltam.append(pid)
+    if faltam:
+        try:
+            with conexao() as conn, conn.cursor() as cur:
+                lidos = ler_templates(cur, faltam)
+        except Exception as e:
+            logger.warning(f"Templates indisponíveis, usando só centróides: {e}")
+            return out
+        for pid in faltam:
+            slots, mat = lidos.get(pid, ([], np.zeros((0, 0), np.float32)))
+            _guardar(pid, slots, mat)
+            if len(mat):
+                out[pid] = mat
+    return out
+
+def templates_em_cache(pessoa_id: str) -> Optional[Tuple[List[int], np.ndarray]]:
+    """(slots, matriz) do cache do processo, sem ir ao banco (None se ausente/expirado)."""
+    with _cache_lock:
+        item = _cache.get(pessoa_id)
+    if item is None or item[0] <= time.monotonic() or not len(item[2]):
+        return None
+    return item[1], item[2]
+
+def semear_templates(pessoa_id: str, slots: List[int], mat: np.ndarray) -> None:
+    """Põe no cache do processo templates vindos de outra fonte (cache local em disco)."""
+    _guardar(pessoa_id, list(slots), _normalizar(mat))
+
+def gravar_templates(pessoa_id: str, slots: List[int], mat: np.ndarray) -> np.ndarray:
+    """Grava um conjunto completo de templates + centróide (pessoa ausente no banco). Levanta em erro."""
+    from config.database import embedding_para_bytes, gravar_embedding, depois_de_gravar_embedding
+    mat = _normalizar(mat)
+    centro = centroide(mat)
+    with conexao() as conn, conn.cursor() as cur:
+        buf = gravar_embedding(cur, pessoa_id, centro)
+        cur.execute("DELETE FROM pessoa_templates WHERE pessoa_id = %s", (pessoa_id,))
+        for slot, v in zip(slots, mat):
+            cur.execute("""
+                INSERT INTO pessoa_templates (pessoa_id, slot, embedding_bin, embedding_dtype)
+                VALUES (%s, %s, %s, %s)
+            """, (pessoa_id, slot, embedding_para_bytes(v), EMBEDDING_DTYPE))
+    depois_de_gravar_embedding(pessoa_id, buf, centro)
+    _guardar(pessoa_id, list(slots), mat)
+    return centro
+
+def invalidar_templates(pessoa_id: Optional[str] = None) -> None:
+    with _cache_lock:
+        if pessoa_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(pessoa_id, None)
+
+def distancia(emb: Any, centro: Optional[Any], templates: Optional[np.ndarray]) -> float:
+    """Menor distância cosseno entre emb e o centróide/templates da pessoa."""
+    q = _normalizar(np.asarray(emb).reshape(-1))
+    dists = []
+    if centro is not None:
+        dists.append(1.0 - float(_normalizar(np.asarray(centro).reshape(-1)) @ q))
+    if templates is not None and len(templates):
+        dists.append(1.0 - float(np.max(templates @ q)))
+    return min(dists) if dists else float("inf")
+
+def refinar(emb: Any, candidatos: List[Tuple[str, float]], limiar: float) -> Optional[Tuple[str, float]]:
+    """
+    candidatos: top-k (pessoa_id, distância ao centróide). Retorna o
+    (pessoa_id, dist) de menor distância a centróide ou template, se <= limiar.
+    """
+    if not candidatos:
+        return None
+    tpl = carregar_templates(pid for pid, _ in candidatos)
+    q = _normalizar(np.asarray(emb).reshape(-1))
+    melhor = None
+    for pid, d in candidatos:
+        t = tpl.get(pid)
+        if t is not None:
+            d = min(d, 1.0 - float(np.max(t @ q)))
+        if melhor is None or d < melhor[1]:
+            melhor = (pid, d)
+    return melhor if melhor[1] <= limiar else None
+
+def _slot_para(mat: np.ndarray, v: np.ndarray, maximo: int, diversidade_min: float) -> Optional[int]:
+    """
+    Índice da linha a escrever (len(mat) = acrescentar) ou None se v não
+    acrescenta diversidade. Cheio: substitui o template mais redundante.
+    """
+    if len(mat) == 0:
+        return 0
+    if float(np.min(1.0 - mat @ v)) < diversidade_min:
+        return None
+    if len(mat) < maximo:
+        return len(mat)
+    todos = np.vstack([mat, v])
+    d = 1.0 - todos @ todos.T
+    np.fill_diagonal(d, np.inf)
+    i = int(np.argmin(d.min(axis=1)))
+    return None if i == len(mat) else i
+
+def admitir_template(pessoa_id: str, emb: Any, qualidade: Optional[float] = None,
+                     limiar: float = 0.30, maximo: int = TEMPLATES_MAX,
+                     nitidez_min: float = TEMPLATE_NITIDEZ_MIN,
+                     diversidade_min: float = TEMPLATE_DIVERSIDADE_MIN) -> Optional[np.ndarray]:
+    """
+    Tenta acrescentar emb como template da pessoa. Retorna o novo centróide
+    (float32) se entrou, None se foi recusado ou se a gravação falhou.
+    """
+    v = _normalizar(np.asarray(emb).reshape(-1))
+    atual = carregar_templates([pessoa_id]).get(pessoa_id)
+    if atual is not None:
+        # checagem barata no cache antes de ir ao banco
+        if qualidade is None or qualidade < nitidez_min:
+            return None
+        if distancia(v, None, atual) > limiar:
+            return None
+        if _slot_para(atual, v, maximo, diversidade_min) is None:
+            return None
+
+    from config.database import (embedding_para_bytes, embedding_de_bytes, gravar_embedding,
+                                 depois_de_gravar_embedding, invalidar_cache_embedding)
+    invalidar_cache_embedding(pessoa_id)
+    invalidar_templates(pessoa_id)
+    try:
+        with conexao() as conn, conn.cursor() as cur:
+            # serializa admissões da mesma pessoa (outras máquinas/processos)
+            cur.execute("INSERT INTO pessoas (pessoa_id) VALUES (%s) ON CONFLICT DO NOTHING", (pessoa_id,))
+            cur.execute("SELECT 1 FROM pessoas WHERE pessoa_id = %s FOR UPDATE", (pessoa_id,))
+            slots, mat = ler_templates(cur, [pessoa_id]).get(pessoa_id, ([], np.zeros((0, len(v)), np.float32)))
+            if not len(mat):
+                # embedding gravado direto por salvar_embedding_db: vira o template 0
+                cur.execute("SELECT embedding_bin, embedding_dtype FROM pessoas WHERE pessoa_id = %s", (pessoa_id,))
+                buf, dtype = cur.fetchone()
+                if buf is not None:
+                    cur.execute("""
+                        INSERT INTO pessoa_templates (pessoa_id, slot, embedding_bin, embedding_dtype)
+                        VALUES (%s, 0, %s, %s)
+                    """, (pessoa_id, buf, dtype or "float32"))
+                    slots, mat = [0], _normalizar(embedding_de_bytes(buf, dtype))[None, :]
+            if len(mat) and (qualidade is None or qualidade < nitidez_min):
+                return None
+            i = _slot_para(mat, v, maximo, diversidade_min)
+            if i is None:
+                return None
+            slot = slots[i] if i < len(slots) else (max(slots) + 1 if slots else 0)
+            cur.execute("""
+                INSERT INTO pessoa_templates (pessoa_id, slot, embedding_bin, embedding_dtype, qualidade)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (pessoa_id, slot) DO UPDATE
+                  SET embedding_bin = EXCLUDED.embedding_bin, embedding_dtype = EXCLUDED.embedding_dtype,
+                      qualidade = EXCLUDED.qualidade, criado_em = now()
+            """, (pessoa_id, slot, embedding_para_bytes(v), EMBEDDING_DTYPE, qualidade))
+            if i < len(mat):
+                mat = mat.copy()
+                mat[i] = v
+            else:
+                mat = np.vstack([mat, v])
+                slots = slots + [slot]
+            centro = centroide(mat)
+            buf = gravar_embedding(cur, pessoa_id, centro)
+        depois_de_gravar_embedding(pessoa_id, buf, centro)
+        _guardar(pessoa_id, slots, mat)
+        logger.info(f"Template {slot} admitido para pessoa_id={pessoa_id} ({len(mat)}/{maximo}, qualidade={qualidade})")
+        return centro
+    except Exception as e:
+        logger.exception(f"Erro ao admitir template: {e}")
+        return None
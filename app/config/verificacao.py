@@ -0,0 +1,96 @@
+# app/config/verificacao.py
+"""
+Cadência da verificação de identidade, separada da amostragem de emoção.
+
+Numa estação pessoal a pessoa na frente da câmera quase nunca muda, então
+o embedding (Facenet512, a etapa mais cara depois da emoção) não precisa
+rodar a cada ciclo. Depois de uma verificação positiva o veredito é herdado
+pelos ciclos seguintes até um gatilho:
+
+- sem_veredito:     ainda não há verificação positiva (ou a última falhou);
+- rastreio_perdido: algum ciclo desde a última verificação ficou sem rosto
+                    (ausente, baixa qualidade, economia, erro de câmera);
+- ausencia_longa:   o último rosto visto tem mais de `ausencia_max` s (ex.:
+                    máquina suspensa, nenhum ciclo rodou no meio);
+- mudanca_quadro:   o quadro (miniatura em cinza) mudou mais de
+                    `mudanca_max` em relação ao da última verificação;
+- intervalo_max:    a última verificação tem mais de `intervalo_max` s.
+
+Cada leitura grava a idade do veredito em identidade_idade_s (0 = verificado
+neste ciclo). intervalo_max = 0 volta a verificar em todo ciclo.
+"""
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config.log import logger
+
+LADO_ASSINATURA = 16   # miniatura LADO x LADO em cinza
+
+
+def mudanca_quadro(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    """Diferença média absoluta entre duas assinaturas, em [0, 1] (1 se faltar alguma)."""
+    if a is None or b is None or a.shape != b.shape:
+        return 1.0
+    return float(np.mean(np.abs(a.astype(np.float32) - b.astype(np.float32)))) / 255.0
+
+
+class CadenciaIdentidade:
+    """Decide quando reverificar a identidade e guarda o último veredito positivo."""
+
+    def __init__(self, intervalo_max: float, ausencia_max: float, mudanca_max: float,
+                 relogio=time.monotonic):
+        self.intervalo_max = intervalo_max
+        self.ausencia_max = ausencia_max
+        self.mudanca_max = mudanca_max
+        self._relogio = relogio
+        self._dist: Optional[float] = None       # distância do último veredito positivo
+        self._verificado_em = 0.0
+        self._visto_em = 0.0
+        self._assinatura: Optional[np.ndarray] = None
+        self._perdido = False
+        self.metricas: Counter = Counter()
+
+    def motivo(self, assinatura: Optional[np.ndarray]) -> Optional[str]:
+        """Gatilho para verificar agora, ou None para herdar o último veredito."""
+        if self._dist is None:
+            return "sem_veredito"
+        agora = self._relogio()
+        if self._perdido:
+            return "rastreio_perdido"
+        if agora - self._visto_em > self.ausencia_max:
+            return "ausencia_longa"
+        if agora - self._verificado_em >= self.intervalo_max:
+            return "intervalo_max"
+        if mudanca_quadro(assinatura, self._assinatura) > self.mudanca_max:
+            return "mudanca_quadro"
+        return None
+
+    def registrar(self, motivo: str, mesma_pessoa: bool, dist: Optional[float],
+                  assinatura: Optional[np.ndarray]) -> None:
+        """Resultado de uma verificação; só um veredito positivo é herdado."""
+        agora = self._relogio()
+        self.metricas["verificadas"] += 1
+        self.metricas[motivo] += 1
+        logger.debug(f"[IDENTIDADE] verificada ({motivo}): mesma_pessoa={mesma_pessoa} dist={dist}")
+        self._dist = (dist or 0.0) if mesma_pessoa else None
+        self._verificado_em = self._visto_em = agora
+        self._assinatura = assinatura
+        self._perdido = False
+
+    def herdar(self) -> Tuple[Optional[float], float]:
+        """(distância, idade em s) do veredito herdado por este ciclo."""
+        agora = self._relogio()
+        self._visto_em = agora
+        self.metricas["herdadas"] += 1
+        return self._dist, agora - self._verificado_em
+
+    def perder(self) -> None:
+        """Ciclo sem rosto: o próximo rosto visto é reverificado."""
+        self._perdido = True
+
+    def invalidar(self) -> None:
+        """Descarta o veredito (ex.: referência ou pessoa trocada)."""
+        self._dist = None
@@ -0,0 +1,120 @@
+# app/config/vetores.py
+"""
+Identidade por vizinho mais próximo no servidor (pgvector, opcional).
+
+Com PGVECTOR_ATIVO, pessoas ganha `embedding_vec vector(EMBEDDING_DIM)`
+com índice HNSW (ou IVFFlat) de distância cosseno, e o match pede ao banco
+os top-k mais próximos em vez de baixar a galeria inteira:
+
+    SELECT pessoa_id, embedding_vec <=> $emb FROM pessoas ORDER BY 2 LIMIT k
+
+O filtro por LIMIAR_COSINE é aplicado nos k retornados (um WHERE na
+distância impediria o uso do índice).
+
+Não depende do pacote python `pgvector`: o vetor vai como literal texto
+'[x,y,...]'::vector.
+"""
+from typing import Any, List, Optional, Tuple
+
+from config.config import PGVECTOR_ATIVO, PGVECTOR_INDICE, PGVECTOR_EF_SEARCH, EMBEDDING_DIM
+from config.conexao import conexao
+from config.log import logger
+
+# desligado na sessão se a extensão não puder ser criada
+_estado = {"ativo": PGVECTOR_ATIVO}
+
+
+def pgvector_ativo() -> bool:
+    return _estado["ativo"]
+
+def vetor_literal(emb: Any) -> str:
+    """np.array/list -> '[x,y,...]' (formato de entrada do tipo vector)."""
+    vals = emb.tolist() if hasattr(emb, "tolist") else list(emb)
+    return "[" + ",".join(repr(float(v)) for v in vals) + "]"
+
+def ensure_pgvector(indice: str = PGVECTOR_INDICE, dim: int = EMBEDDING_DIM) -> bool:
+    """
+    Cria extensão, coluna e índice (idempotente) e preenche embedding_vec a partir
+    de embedding_bin. Em falha (extensão indisponível/sem permissão) desliga o
+    pgvector nesta sessão e o match volta ao caminho no cliente.
+    """
+    if not _estado["ativo"]:
+        return False
+    if indice not in ("hnsw", "ivfflat"):
+        raise ValueError(f"índice pgvector desconhecido: {indice}")
+    try:
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            cur.execute(f"ALTER TABLE pessoas ADD COLUMN IF NOT EXISTS embedding_vec vector({int(dim)})")
+        preenchidas = _preencher_vetores(dim)
+        with conexao() as conn, conn.cursor() as cur:
+            if indice == "hnsw":
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS ix_pessoas_embedding_hnsw
+                      ON pessoas USING hnsw (embedding_vec vector_cosine_ops)
+                """)
+            else:
+                # IVFFlat precisa de dados para treinar as listas: ~sqrt(n), mínimo 1
+                cur.execute("SELECT COUNT(*) FROM pessoas WHERE embedding_vec IS NOT NULL")
+                listas = max(1, int(cur.fetchone()[0] ** 0.5))
+                cur.execute(f"""
+                    CREATE INDEX IF NOT EXISTS ix_pessoas_embedding_ivfflat
+                      ON pessoas USING ivfflat (embedding_vec vector_cosine_ops) WITH (lists = {listas})
+                """)
+        logger.info(f"pgvector ativo (índice {indice}, {preenchidas} vetores preenchidos)")
+        return True
+    except Exception as e:
+        _estado["ativo"] = False
+        logger.warning(f"pgvector indisponível, match de identidade fica no cliente: {e}")
+        return False
+
+def _preencher_vetores(dim: int, lote: int = 500) -> int:
+    """Copia embedding_bin -> embedding_vec (só vetores com a dimensão da coluna)."""
+    from psycopg2.extras import execute_values
+    from config.database import embedding_de_bytes
+    total = 0
+    while True:
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT pessoa_id, embedding_bin, embedding_dtype FROM pessoas
+                 WHERE embedding_vec IS NULL AND embedding_bin IS NOT NULL
+                   AND octet_length(embedding_bin) = %s * CASE embedding_dtype WHEN 'float16' THEN 2 ELSE 4 END
+                 LIMIT %s FOR UPDATE SKIP LOCKED
+            """, (int(dim), lote))
+            rows = cur.fetchall()
+            if not rows:
+                return total
+            execute_values(cur, """
+                UPDATE pessoas p SET embedding_vec = v.vec::vector
+                  FROM (VALUES %s) AS v(pessoa_id, vec)
+                 WHERE p.pessoa_id = v.pessoa_id
+            """, [(pid, vetor_literal(embedding_de_bytes(b, dt))) for pid, b, dt in rows])
+        total += len(rows)
+
+def salvar_vetor(cur, pessoa_id: str, emb: Any) -> None:
+    """Atualiza embedding_vec na mesma transação de salvar_embedding_db."""
+    if len(emb) != EMBEDDING_DIM:
+        return
+    cur.execute("UPDATE pessoas SET embedding_vec = %s::vector WHERE pessoa_id = %s",
+                (vetor_literal(emb), pessoa_id))
+
+def buscar_similares(emb: Any, k: int = 5, limiar: Optional[float] = None) -> List[Tuple[str, float]]:
+    """
+    Top-k (pessoa_id, distância cosseno) mais próximos, em ordem crescente.
+    Com `limiar`, descarta os que passam dele. Levanta exceção em erro de banco.
+    """
+    lit = vetor_literal(emb)
+    with conexao() as conn, conn.cursor() as cur:
+        if PGVECTOR_INDICE == "hnsw":
+            cur.execute(f"SET LOCAL hnsw.ef_search = {max(int(k), PGVECTOR_EF_SEARCH)}")
+        cur.execute("""
+            SELECT pessoa_id, embedding_vec <=> %s::vector AS dist
+              FROM pessoas
+             WHERE embedding_vec IS NOT NULL
+             ORDER BY embedding_vec <=> %s::vector
+             LIMIT %s
+        """, (lit, lit, int(k)))
+        rows = [(pid, float(d)) for pid, d in cur.fetchall()]
+    if limiar is not None:
+        rows = [(pid, d) for pid, d in rows if d <= limiar]
+    return rows
@@ -1,5 +1,6 @@
 # app/main_trial.py
-import os, sys, time, csv
+import os, sys, time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 import re
 import psutil
@@ -19,6 +20,15 @@ try:
 except Exception:
     _analisar_emocao = None
 
+from trial.trial_csv import exportar_csv
+from trial.trial_sessao import SessaoTrial, carregar_sessao, dataframe_sessao
+
+try:
+    # pool compartilhado do projeto (health check + reconexão)
+    from config.conexao import registrar_pool
+except Exception:
+    registrar_pool = None
+
 try:
     import tkinter as tk
     from tkinter import simpledialog, messagebox
@@ -99,10 +109,14 @@ def coletar_emocoes_reais(cap) -> dict:
 
 
 # ========== RECURSOS DO SISTEMA ==========
-def coletar_recursos():
-    return {"cpu": psutil.cpu_percent(interval=1),
-            "mem": psutil.virtual_memory().percent,
-            "disk": psutil.disk_usage('/').percent}
+try:
+    # amostrador em background do projeto (não bloqueia o loop)
+    from config.recursos import coletar_recursos
+except Exception:
+    def coletar_recursos():
+        return {"cpu": psutil.cpu_percent(interval=None),
+                "mem": psutil.virtual_memory().percent,
+                "disk": psutil.disk_usage('/').percent}
 
 
 # --- util p/ comparar datetimes com/sem timezone ---
@@ -164,21 +178,40 @@ def email_valido(email: str) -> bool:
     return bool(re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", str(email or "").strip()))
 
 # ---------- DB ----------
-def trial_conn():
-    if not NEON_DB_URL or "postgres" not in NEON_DB_URL:
-        raise RuntimeError("NEON_DB_URL não configurada.")
+def _trial_ssl_kwargs() -> dict:
     ssl_kwargs = {}
     try:
         import certifi
         ssl_kwargs["sslrootcert"] = certifi.where()
     except Exception:
         pass
-    return psycopg2.connect(NEON_DB_URL, connect_timeout=10, **ssl_kwargs)
+    return ssl_kwargs
+
+def trial_conn():
+    if not NEON_DB_URL or "postgres" not in NEON_DB_URL:
+        raise RuntimeError("NEON_DB_URL não configurada.")
+    return psycopg2.connect(NEON_DB_URL, connect_timeout=10, **_trial_ssl_kwargs())
+
+@contextmanager
+def trial_conexao():
+    """Conexão do pool 'trial' (ou conexão avulsa se o pool não estiver disponível)."""
+    if registrar_pool is None:
+        conn = trial_conn()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+        return
+    if not NEON_DB_URL or "postgres" not in NEON_DB_URL:
+        raise RuntimeError("NEON_DB_URL não configurada.")
+    pool = registrar_pool("trial", dsn=NEON_DB_URL, connect_timeout=10, **_trial_ssl_kwargs())
+    with pool.conexao() as conn:
+        yield conn
 
 def checar_trial_por_email(email: str):
     try:
-        conn = trial_conn()
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with trial_conexao() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
                 SELECT email, ativo, expires_at
                   FROM trial_licencas
@@ -186,7 +219,6 @@ def checar_trial_por_email(email: str):
                  LIMIT 1
             """, (email,))
             row = cur.fetchone()
-        conn.close()
         return row
     except Exception as e:
         alert_erro("Não foi possível consultar o servidor de licença", str(e))
@@ -203,22 +235,15 @@ def caminho_pdf_na_area_de_trabalho(email: str) -> str:
     fname = f"trial_relatorio_{email.replace('@','_').replace('.','_')}.pdf"
     return os.path.join(desktop, fname)
 
-def preparar_csv(path: str):
-    if not os.path.exists(path):
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            csv.writer(f).writerow([
-                "data_hora","feliz","triste","medo","raiva","desgosto","surpresa","neutro",
-                "cpu","memoria","disco"
-            ])
-
-def append_csv(path: str, data_hora, emocoes, rec):
-    with open(path, "a", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow([
-            data_hora.strftime("%Y-%m-%d %H:%M:%S"),
-            emocoes.get("feliz",0), emocoes.get("triste",0), emocoes.get("medo",0),
-            emocoes.get("raiva",0), emocoes.get("desgosto",0), emocoes.get("surpresa",0), emocoes.get("neutro",0),
-            rec.get("cpu",0), rec.get("mem",0), rec.get("disk",0)
-        ])
+def caminho_sessao(email: str) -> str:
+    """Colunas da sessão (trial/trial_sessao.py) ficam fora da área de trabalho; o CSV é exportado no fim."""
+    nome = f"trial_{email.replace('@','_').replace('.','_')}_{datetime.now():%Y%m%d_%H%M%S}"
+    return os.path.join(os.path.expanduser("~"), ".well", "trial", nome)
+
+# mesmas colunas/formato do CSV de antes
+CSV_CABECALHO = ["data_hora","feliz","triste","medo","raiva","desgosto","surpresa","neutro",
+                 "cpu","memoria","disco"]
+CSV_FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
 
 # --- Desktop cross-platform (Windows OneDrive / macOS iCloud / Linux XDG) ---
 def _get_desktop_dir() -> str:
@@ -271,9 +296,8 @@ def _get_desktop_dir() -> str:
     return fallback
 
 
-def gerar_pdf_relatorio(csv_path: str, out_path: str = None, titulo: str = None):
+def gerar_pdf_relatorio(sessao_dir: str, out_path: str = None, titulo: str = None):
     try:
-        import pandas as pd
         import matplotlib.pyplot as plt
         from matplotlib.backends.backend_pdf import PdfPages
     except Exception as e:
@@ -281,16 +305,15 @@ def gerar_pdf_relatorio(csv_path: str, out_path: str = None, titulo: str = None)
         return None
 
     try:
-        df = pd.read_csv(csv_path)
-        df["data_hora"] = pd.to_datetime(df["data_hora"], errors="coerce")
-        df = df.sort_values("data_hora").reset_index(drop=True)
+        # colunas memory-mapped, já em ordem de data_hora: sem parse do CSV nem cópia
+        df = dataframe_sessao(sessao_dir)
         if df.empty:
-            alert("Relatório", "CSV sem dados — não foi gerado PDF.")
+            alert("Relatório", "Sessão sem dados — não foi gerado PDF.")
             return None
 
         EMOCOES = ["feliz","triste","medo","raiva","desgosto","surpresa","neutro"]
         titulo = titulo or "Relatório Trial"
-        out_path = out_path or os.path.splitext(csv_path)[0] + "_relatorio.pdf"
+        out_path = out_path or os.path.join(sessao_dir, "relatorio.pdf")
 
         info = {"leituras": len(df), "inicio": df["data_hora"].min(), "fim": df["data_hora"].max()}
         for c in EMOCOES + ["cpu","memoria","disco"]:
@@ -376,7 +399,7 @@ if __name__ == "__main__":
 
     # Autorizado
     csv_path = caminho_csv_na_area_de_trabalho(email)
-    preparar_csv(csv_path)
+    sessao = SessaoTrial(caminho_sessao(email))
     alert("Autorizado", f"Licença validada. A coleta será feita por {TEST_DURATION_MIN} minutos.")
 
     inicio = datetime.now()
@@ -397,7 +420,7 @@ if __name__ == "__main__":
                 # COLETA REAL
                 emocoes = coletar_emocoes_reais(cap)
                 recursos = coletar_recursos()
-                append_csv(csv_path, agora, emocoes, recursos)
+                sessao.adicionar(agora, emocoes, recursos)
             except Exception as e:
                 print(f"[WARN] Falha na coleta: {e}")
             time.sleep(INTERVALO)
@@ -410,8 +433,15 @@ if __name__ == "__main__":
         except Exception:
             pass
 
+        sessao.fechar()
+        try:
+            exportar_csv(carregar_sessao(sessao.diretorio), csv_path,
+                         cabecalho=CSV_CABECALHO, formato_data=CSV_FORMATO_DATA)
+        except Exception as e:
+            alert_erro("CSV", f"Falha ao exportar o CSV: {e}\nDados da sessão em: {sessao.diretorio}")
+
         pdf_path = gerar_pdf_relatorio(
-            csv_path,
+            sessao.diretorio,
             out_path=caminho_pdf_na_area_de_trabalho(email),
             titulo=f"Relatório Trial — {email}"
         )
@@ -0,0 +1,14 @@
+-- Pessoas (embedding binário; JSONB só para linhas antigas ainda não migradas)
+CREATE TABLE IF NOT EXISTS pessoas (
+  pessoa_id        VARCHAR(64) PRIMARY KEY,
+  embedding        JSONB,
+  embedding_bin    BYTEA,
+  embedding_dtype  VARCHAR(8),
+  created_at       TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- bancos criados antes do embedding binário
+ALTER TABLE pessoas
+  ADD COLUMN IF NOT EXISTS embedding_bin   BYTEA,
+  ADD COLUMN IF NOT EXISTS embedding_dtype VARCHAR(8),
+  ALTER COLUMN embedding DROP NOT NULL;
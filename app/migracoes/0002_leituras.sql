@@ -0,0 +1,44 @@
+-- Leituras e log do sistema. Em bancos existentes as tabelas já vêm de fora;
+-- aqui só garantimos as colunas que o app grava.
+CREATE TABLE IF NOT EXISTS leituras_emocionais (
+  id                SERIAL,
+  pessoa_id         VARCHAR(64),
+  data_captura      TIMESTAMP NOT NULL DEFAULT NOW(),
+  raiva             REAL,
+  desgosto          REAL,
+  medo              REAL,
+  feliz             REAL,
+  triste            REAL,
+  surpresa          REAL,
+  neutro            REAL,
+  emocao_dominante  VARCHAR(20) CHECK (emocao_dominante IN
+                    ('feliz','triste','medo','raiva','desgosto','surpresa','neutro','usuario_ausente')),
+  cpu               REAL,
+  memoria           REAL,
+  disco             REAL,
+  PRIMARY KEY (id)
+);
+
+ALTER TABLE leituras_emocionais
+  ADD COLUMN IF NOT EXISTS camera_status VARCHAR(30) DEFAULT 'ok',
+  ADD COLUMN IF NOT EXISTS face_status   VARCHAR(30) DEFAULT 'ok',
+  ADD COLUMN IF NOT EXISTS mesma_pessoa  BOOLEAN,
+  ADD COLUMN IF NOT EXISTS qualidade     REAL,
+  ADD COLUMN IF NOT EXISTS brilho        REAL,
+  ADD COLUMN IF NOT EXISTS face_distance REAL,
+  ADD COLUMN IF NOT EXISTS perfil_energia   VARCHAR(20),
+  ADD COLUMN IF NOT EXISTS perfil_transicao VARCHAR(40),
+  ADD COLUMN IF NOT EXISTS latencias        JSONB,
+  ADD COLUMN IF NOT EXISTS leitura_uuid     UUID;
+
+-- Chave de idempotência do spool (inclui data_captura p/ servir a tabelas particionadas)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_leituras_uuid
+  ON leituras_emocionais (leitura_uuid, data_captura);
+
+CREATE TABLE IF NOT EXISTS logs_sistema (
+  id             SERIAL PRIMARY KEY,
+  identificacao  BIGINT,
+  data_hora      TIMESTAMP,
+  nivel          VARCHAR(20),
+  mensagem       TEXT
+);
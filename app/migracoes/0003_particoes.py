@@ -0,0 +1,13 @@
+"""
+Antes convertia leituras_emocionais para particionada conforme
+PARTICIONAR_LEITURAS no momento de aplicar, e a mesma versão virava schemas
+diferentes em hosts diferentes. A conversão agora é um comando explícito:
+
+    python -m config.particoes --converter
+
+Mantida (vazia) para não renumerar as versões seguintes.
+"""
+
+
+def aplicar(cur):
+    pass
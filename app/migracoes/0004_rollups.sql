@@ -0,0 +1,144 @@
+-- Rollups minuto/hora/dia (config/rollups.py): coluna inserido_em no bruto,
+-- tabelas de agregados, views com as médias e a marca d'água.
+
+-- sem default volátil no ADD COLUMN: não reescreve a tabela; linhas antigas ficam NULL
+ALTER TABLE leituras_emocionais ADD COLUMN IF NOT EXISTS inserido_em TIMESTAMPTZ;
+ALTER TABLE leituras_emocionais ALTER COLUMN inserido_em SET DEFAULT now();
+CREATE INDEX IF NOT EXISTS ix_leituras_inserido_brin ON leituras_emocionais USING brin (inserido_em);
+
+CREATE TABLE IF NOT EXISTS rollup_marca (
+  nome  VARCHAR(40) PRIMARY KEY,
+  ate   TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS leituras_rollup_minuto (
+  balde                TIMESTAMP NOT NULL,
+  pessoa_id            VARCHAR(64) NOT NULL,
+  leituras             INTEGER NOT NULL DEFAULT 0,
+  ausentes             INTEGER NOT NULL DEFAULT 0,
+  n_emocoes            INTEGER NOT NULL DEFAULT 0,
+  soma_raiva           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_desgosto        DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_medo            DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_feliz           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_triste          DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_surpresa        DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_neutro          DOUBLE PRECISION NOT NULL DEFAULT 0,
+  dom_desgosto         INTEGER NOT NULL DEFAULT 0,
+  dom_feliz            INTEGER NOT NULL DEFAULT 0,
+  dom_medo             INTEGER NOT NULL DEFAULT 0,
+  dom_neutro           INTEGER NOT NULL DEFAULT 0,
+  dom_raiva            INTEGER NOT NULL DEFAULT 0,
+  dom_surpresa         INTEGER NOT NULL DEFAULT 0,
+  dom_triste           INTEGER NOT NULL DEFAULT 0,
+  dom_usuario_ausente  INTEGER NOT NULL DEFAULT 0,
+  n_recursos           INTEGER NOT NULL DEFAULT 0,
+  soma_cpu             DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_memoria         DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_disco           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  PRIMARY KEY (balde, pessoa_id)
+);
+CREATE INDEX IF NOT EXISTS ix_leituras_rollup_minuto_pessoa ON leituras_rollup_minuto (pessoa_id, balde);
+
+CREATE OR REPLACE VIEW vw_rollup_minuto AS
+SELECT balde, pessoa_id, leituras, ausentes,
+       soma_raiva / NULLIF(n_emocoes, 0) AS raiva,
+       soma_desgosto / NULLIF(n_emocoes, 0) AS desgosto,
+       soma_medo / NULLIF(n_emocoes, 0) AS medo,
+       soma_feliz / NULLIF(n_emocoes, 0) AS feliz,
+       soma_triste / NULLIF(n_emocoes, 0) AS triste,
+       soma_surpresa / NULLIF(n_emocoes, 0) AS surpresa,
+       soma_neutro / NULLIF(n_emocoes, 0) AS neutro,
+       soma_cpu / NULLIF(n_recursos, 0) AS cpu,
+       soma_memoria / NULLIF(n_recursos, 0) AS memoria,
+       soma_disco / NULLIF(n_recursos, 0) AS disco,
+       dom_desgosto, dom_feliz, dom_medo, dom_neutro, dom_raiva, dom_surpresa, dom_triste, dom_usuario_ausente
+  FROM leituras_rollup_minuto;
+
+CREATE TABLE IF NOT EXISTS leituras_rollup_hora (
+  balde                TIMESTAMP NOT NULL,
+  pessoa_id            VARCHAR(64) NOT NULL,
+  leituras             INTEGER NOT NULL DEFAULT 0,
+  ausentes             INTEGER NOT NULL DEFAULT 0,
+  n_emocoes            INTEGER NOT NULL DEFAULT 0,
+  soma_raiva           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_desgosto        DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_medo            DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_feliz           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_triste          DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_surpresa        DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_neutro          DOUBLE PRECISION NOT NULL DEFAULT 0,
+  dom_desgosto         INTEGER NOT NULL DEFAULT 0,
+  dom_feliz            INTEGER NOT NULL DEFAULT 0,
+  dom_medo             INTEGER NOT NULL DEFAULT 0,
+  dom_neutro           INTEGER NOT NULL DEFAULT 0,
+  dom_raiva            INTEGER NOT NULL DEFAULT 0,
+  dom_surpresa         INTEGER NOT NULL DEFAULT 0,
+  dom_triste           INTEGER NOT NULL DEFAULT 0,
+  dom_usuario_ausente  INTEGER NOT NULL DEFAULT 0,
+  n_recursos           INTEGER NOT NULL DEFAULT 0,
+  soma_cpu             DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_memoria         DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_disco           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  PRIMARY KEY (balde, pessoa_id)
+);
+CREATE INDEX IF NOT EXISTS ix_leituras_rollup_hora_pessoa ON leituras_rollup_hora (pessoa_id, balde);
+
+CREATE OR REPLACE VIEW vw_rollup_hora AS
+SELECT balde, pessoa_id, leituras, ausentes,
+       soma_raiva / NULLIF(n_emocoes, 0) AS raiva,
+       soma_desgosto / NULLIF(n_emocoes, 0) AS desgosto,
+       soma_medo / NULLIF(n_emocoes, 0) AS medo,
+       soma_feliz / NULLIF(n_emocoes, 0) AS feliz,
+       soma_triste / NULLIF(n_emocoes, 0) AS triste,
+       soma_surpresa / NULLIF(n_emocoes, 0) AS surpresa,
+       soma_neutro / NULLIF(n_emocoes, 0) AS neutro,
+       soma_cpu / NULLIF(n_recursos, 0) AS cpu,
+       soma_memoria / NULLIF(n_recursos, 0) AS memoria,
+       soma_disco / NULLIF(n_recursos, 0) AS disco,
+       dom_desgosto, dom_feliz, dom_medo, dom_neutro, dom_raiva, dom_surpresa, dom_triste, dom_usuario_ausente
+  FROM leituras_rollup_hora;
+
+CREATE TABLE IF NOT EXISTS leituras_rollup_dia (
+  balde                TIMESTAMP NOT NULL,
+  pessoa_id            VARCHAR(64) NOT NULL,
+  leituras             INTEGER NOT NULL DEFAULT 0,
+  ausentes             INTEGER NOT NULL DEFAULT 0,
+  n_emocoes            INTEGER NOT NULL DEFAULT 0,
+  soma_raiva           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_desgosto        DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_medo            DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_feliz           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_triste          DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_surpresa        DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_neutro          DOUBLE PRECISION NOT NULL DEFAULT 0,
+  dom_desgosto         INTEGER NOT NULL DEFAULT 0,
+  dom_feliz            INTEGER NOT NULL DEFAULT 0,
+  dom_medo             INTEGER NOT NULL DEFAULT 0,
+  dom_neutro           INTEGER NOT NULL DEFAULT 0,
+  dom_raiva            INTEGER NOT NULL DEFAULT 0,
+  dom_surpresa         INTEGER NOT NULL DEFAULT 0,
+  dom_triste           INTEGER NOT NULL DEFAULT 0,
+  dom_usuario_ausente  INTEGER NOT NULL DEFAULT 0,
+  n_recursos           INTEGER NOT NULL DEFAULT 0,
+  soma_cpu             DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_memoria         DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_disco           DOUBLE PRECISION NOT NULL DEFAULT 0,
+  PRIMARY KEY (balde, pessoa_id)
+);
+CREATE INDEX IF NOT EXISTS ix_leituras_rollup_dia_pessoa ON leituras_rollup_dia (pessoa_id, balde);
+
+CREATE OR REPLACE VIEW vw_rollup_dia AS
+SELECT balde, pessoa_id, leituras, ausentes,
+       soma_raiva / NULLIF(n_emocoes, 0) AS raiva,
+       soma_desgosto / NULLIF(n_emocoes, 0) AS desgosto,
+       soma_medo / NULLIF(n_emocoes, 0) AS medo,
+       soma_feliz / NULLIF(n_emocoes, 0) AS feliz,
+       soma_triste / NULLIF(n_emocoes, 0) AS triste,
+       soma_surpresa / NULLIF(n_emocoes, 0) AS surpresa,
+       soma_neutro / NULLIF(n_emocoes, 0) AS neutro,
+       soma_cpu / NULLIF(n_recursos, 0) AS cpu,
+       soma_memoria / NULLIF(n_recursos, 0) AS memoria,
+       soma_disco / NULLIF(n_recursos, 0) AS disco,
+       dom_desgosto, dom_feliz, dom_medo, dom_neutro, dom_raiva, dom_surpresa, dom_triste, dom_usuario_ausente
+  FROM leituras_rollup_dia;
@@ -0,0 +1,18 @@
+"""
+Índices das consultas de relatório em leituras_emocionais (config/indices.py):
+pessoa + janela de data, e BRIN para janelas de todas as pessoas.
+
+Fora de transação: a tabela quente recebe inserções enquanto o agente faz
+login, então cada índice é construído com CONCURRENTLY (por partição, com
+ON ONLY + ATTACH, se ela estiver particionada). Definições congeladas aqui.
+"""
+from config.indices import criar_indice_online
+
+TRANSACAO = False
+
+
+def aplicar(cur):
+    criar_indice_online(cur, "leituras_emocionais", "ix_leituras_pessoa_data",
+                        "(pessoa_id, data_captura)")
+    criar_indice_online(cur, "leituras_emocionais", "ix_leituras_data_brin",
+                        "USING brin (data_captura) WITH (pages_per_range = 32)")
@@ -0,0 +1,6 @@
+"""Embeddings antigos (JSONB) -> embedding_bin, na transação da migração."""
+from config.database import migrar_embeddings_binarios
+
+
+def aplicar(cur):
+    migrar_embeddings_binarios(cur=cur)
@@ -0,0 +1,83 @@
+-- Armazenamento compacto (config/compacto.py): lookups de códigos,
+-- leituras_compactas e a view vw_leituras_emocionais com os nomes/tipos originais.
+
+-- códigos fixos (não reordenar: estão gravados nas linhas)
+CREATE TABLE IF NOT EXISTS emocao_codigo (
+  codigo  SMALLINT PRIMARY KEY,
+  nome    VARCHAR(20) NOT NULL UNIQUE
+);
+INSERT INTO emocao_codigo (codigo, nome) VALUES
+  (0, 'neutro'), (1, 'feliz'), (2, 'triste'), (3, 'medo'),
+  (4, 'raiva'), (5, 'desgosto'), (6, 'surpresa'), (7, 'usuario_ausente')
+ON CONFLICT DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS status_codigo (
+  codigo  SMALLSERIAL PRIMARY KEY,
+  nome    VARCHAR(30) NOT NULL UNIQUE
+);
+
+-- colunas ordenadas por alinhamento (8 -> 4 -> 2 -> 1 byte -> varlena)
+CREATE TABLE IF NOT EXISTS leituras_compactas (
+  data_captura      TIMESTAMP NOT NULL DEFAULT NOW(),
+  inserido_em       TIMESTAMPTZ DEFAULT now(),
+  leitura_uuid      UUID,
+  id                SERIAL PRIMARY KEY,
+  qualidade         REAL,
+  brilho            REAL,
+  face_distance     REAL,
+  raiva SMALLINT, desgosto SMALLINT, medo SMALLINT, feliz SMALLINT, triste SMALLINT,
+  surpresa SMALLINT, neutro SMALLINT, cpu SMALLINT, memoria SMALLINT, disco SMALLINT,
+  emocao_dominante  SMALLINT REFERENCES emocao_codigo (codigo),
+  camera_status     SMALLINT REFERENCES status_codigo (codigo),
+  face_status       SMALLINT REFERENCES status_codigo (codigo),
+  mesma_pessoa      BOOLEAN,
+  pessoa_id         VARCHAR(64),
+  perfil_energia    VARCHAR(20),
+  perfil_transicao  VARCHAR(40),
+  latencias         JSONB
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_leituras_compactas_uuid
+  ON leituras_compactas (leitura_uuid, data_captura);
+CREATE INDEX IF NOT EXISTS ix_leituras_compactas_inserido_brin ON leituras_compactas USING brin (inserido_em);
+CREATE INDEX IF NOT EXISTS ix_leituras_pessoa_data_leituras_compactas
+  ON leituras_compactas (pessoa_id, data_captura);
+CREATE INDEX IF NOT EXISTS ix_leituras_data_brin_leituras_compactas
+  ON leituras_compactas USING brin (data_captura) WITH (pages_per_range = 32);
+
+-- percentuais em centésimos; códigos -> nomes
+CREATE OR REPLACE VIEW vw_leituras_emocionais AS
+SELECT id, pessoa_id, data_captura, raiva, desgosto, medo, feliz, triste, surpresa, neutro,
+       emocao_dominante, cpu, memoria, disco, camera_status, face_status, mesma_pessoa,
+       qualidade, brilho, face_distance, perfil_energia, perfil_transicao, latencias,
+       leitura_uuid, inserido_em
+  FROM leituras_emocionais
+UNION ALL
+SELECT c.id AS id,
+       c.pessoa_id AS pessoa_id,
+       c.data_captura AS data_captura,
+       (c.raiva::real / 100)::real AS raiva,
+       (c.desgosto::real / 100)::real AS desgosto,
+       (c.medo::real / 100)::real AS medo,
+       (c.feliz::real / 100)::real AS feliz,
+       (c.triste::real / 100)::real AS triste,
+       (c.surpresa::real / 100)::real AS surpresa,
+       (c.neutro::real / 100)::real AS neutro,
+       e.nome AS emocao_dominante,
+       (c.cpu::real / 100)::real AS cpu,
+       (c.memoria::real / 100)::real AS memoria,
+       (c.disco::real / 100)::real AS disco,
+       sc.nome AS camera_status,
+       sf.nome AS face_status,
+       c.mesma_pessoa AS mesma_pessoa,
+       c.qualidade AS qualidade,
+       c.brilho AS brilho,
+       c.face_distance AS face_distance,
+       c.perfil_energia AS perfil_energia,
+       c.perfil_transicao AS perfil_transicao,
+       c.latencias AS latencias,
+       c.leitura_uuid AS leitura_uuid,
+       c.inserido_em AS inserido_em
+  FROM leituras_compactas c
+  LEFT JOIN emocao_codigo e  ON e.codigo  = c.emocao_dominante
+  LEFT JOIN status_codigo sc ON sc.codigo = c.camera_status
+  LEFT JOIN status_codigo sf ON sf.codigo = c.face_status;
@@ -0,0 +1,18 @@
+-- Galeria com vários templates por pessoa (config/templates.py);
+-- pessoas.embedding_bin passa a ser o centróide dos templates
+CREATE TABLE IF NOT EXISTS pessoa_templates (
+  pessoa_id        VARCHAR(64) NOT NULL REFERENCES pessoas (pessoa_id) ON DELETE CASCADE,
+  slot             SMALLINT NOT NULL,
+  embedding_bin    BYTEA NOT NULL,
+  embedding_dtype  VARCHAR(8) NOT NULL,
+  qualidade        REAL,
+  criado_em        TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (pessoa_id, slot)
+);
+
+-- o embedding único de hoje vira o template 0
+INSERT INTO pessoa_templates (pessoa_id, slot, embedding_bin, embedding_dtype)
+SELECT pessoa_id, 0, embedding_bin, COALESCE(embedding_dtype, 'float32')
+  FROM pessoas
+ WHERE embedding_bin IS NOT NULL
+ON CONFLICT DO NOTHING;
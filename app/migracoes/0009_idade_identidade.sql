@@ -0,0 +1,42 @@
+-- identidade_idade_s: idade do veredito de identidade herdado (config/verificacao.py)
+ALTER TABLE leituras_emocionais ADD COLUMN IF NOT EXISTS identidade_idade_s REAL;
+ALTER TABLE leituras_compactas ADD COLUMN IF NOT EXISTS identidade_idade_s REAL;
+
+-- coluna nova no fim da view (depois de inserido_em): CREATE OR REPLACE aceita
+CREATE OR REPLACE VIEW vw_leituras_emocionais AS
+SELECT id, pessoa_id, data_captura, raiva, desgosto, medo, feliz, triste, surpresa, neutro,
+       emocao_dominante, cpu, memoria, disco, camera_status, face_status, mesma_pessoa,
+       qualidade, brilho, face_distance, perfil_energia, perfil_transicao, latencias,
+       leitura_uuid, inserido_em, identidade_idade_s
+  FROM leituras_emocionais
+UNION ALL
+SELECT c.id AS id,
+       c.pessoa_id AS pessoa_id,
+       c.data_captura AS data_captura,
+       (c.raiva::real / 100)::real AS raiva,
+       (c.desgosto::real / 100)::real AS desgosto,
+       (c.medo::real / 100)::real AS medo,
+       (c.feliz::real / 100)::real AS feliz,
+       (c.triste::real / 100)::real AS triste,
+       (c.surpresa::real / 100)::real AS surpresa,
+       (c.neutro::real / 100)::real AS neutro,
+       e.nome AS emocao_dominante,
+       (c.cpu::real / 100)::real AS cpu,
+       (c.memoria::real / 100)::real AS memoria,
+       (c.disco::real / 100)::real AS disco,
+       sc.nome AS camera_status,
+       sf.nome AS face_status,
+       c.mesma_pessoa AS mesma_pessoa,
+       c.qualidade AS qualidade,
+       c.brilho AS brilho,
+       c.face_distance AS face_distance,
+       c.perfil_energia AS perfil_energia,
+       c.perfil_transicao AS perfil_transicao,
+       c.latencias AS latencias,
+       c.leitura_uuid AS leitura_uuid,
+       c.inserido_em AS inserido_em,
+       c.identidade_idade_s AS identidade_idade_s
+  FROM leituras_compactas c
+  LEFT JOIN emocao_codigo e  ON e.codigo  = c.emocao_dominante
+  LEFT JOIN status_codigo sc ON sc.codigo = c.camera_status
+  LEFT JOIN status_codigo sf ON sf.codigo = c.face_status;
@@ -1,31 +1,23 @@
-import json
-import psycopg2
-from config.config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
-
-def _conn():
-    return psycopg2.connect(
-        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD,
-        host=DB_HOST, port=DB_PORT
-    )
+from config.conexao import conexao
+from config.config import EMBEDDING_DTYPE
+from config.database import embedding_para_bytes, _decodificar_embedding
 
 def salvar_embedding_db(pessoa_id: str, emb_array) -> None:
-    """emb_array: numpy array (ou list) com floats."""
-    emb_list = emb_array.tolist() if hasattr(emb_array, "tolist") else list(emb_array)
-    conn = _conn(); cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO pessoas (pessoa_id, embedding)
-        VALUES (%s, %s::jsonb)
-        ON CONFLICT (pessoa_id)
-        DO UPDATE SET embedding = EXCLUDED.embedding
-    """, (pessoa_id, json.dumps(emb_list)))
-    conn.commit(); cur.close(); conn.close()
+    """emb_array: numpy array (ou list) com floats. Gravado como BYTEA (EMBEDDING_DTYPE)."""
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO pessoas (pessoa_id, embedding_bin, embedding_dtype)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (pessoa_id)
+            DO UPDATE SET embedding_bin = EXCLUDED.embedding_bin,
+                          embedding_dtype = EXCLUDED.embedding_dtype,
+                          embedding = NULL
+        """, (pessoa_id, embedding_para_bytes(emb_array), EMBEDDING_DTYPE))
 
 def carregar_embedding_db(pessoa_id: str):
-    import numpy as np
-    conn = _conn(); cur = conn.cursor()
-    cur.execute("SELECT embedding FROM pessoas WHERE pessoa_id=%s", (pessoa_id,))
-    row = cur.fetchone()
-    cur.close(); conn.close()
-    if row and row[0]:
-        return np.array(row[0], dtype="float32")  # psycopg2 já decodifica JSONB -> list
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("SELECT embedding_bin, embedding_dtype, embedding FROM pessoas WHERE pessoa_id=%s", (pessoa_id,))
+        row = cur.fetchone()
+    if row:
+        return _decodificar_embedding(*row)  # BYTEA -> np.frombuffer; JSONB antigo como fallback
     return None
@@ -0,0 +1,277 @@
+# app/simulacao.py
+"""
+Simulação acelerada do loop principal (config/ciclo.py).
+
+Relógio simulado + roteiro de quadros (presente, ausente, escuro, borrado,
+outra_pessoa) + modelos stub com latências configuráveis. Uma sessão de 8h
+roda em segundos e o relatório mostra quanto cada política custaria em
+inferências, gravações no banco e aberturas de câmera.
+
+Uso:
+    python app/simulacao.py --horas 8 --politica padrao --politica sem_economia
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.ciclo import LoopEmocional, Servicos, POLITICA_PADRAO
+from config.energia import GerenciadorEnergia
+from config.latencia import AgregadorLatencia
+from config.log import logger
+from config.verificacao import LADO_ASSINATURA
+
+ESTADOS = ("presente", "ausente", "escuro", "borrado", "outra_pessoa")
+
+# latências simuladas (ms) por etapa
+LATENCIAS_PADRAO: Dict[str, float] = {
+    "camera_open": 300.0, "warmup": 150.0, "grab": 30.0, "encode": 15.0,
+    "quality": 8.0, "detect": 250.0, "assinatura": 2.0, "embed": 400.0, "identity_match": 5.0,
+    "emotion": 350.0, "db_write": 20.0, "db_read": 15.0,
+}
+
+# políticas nomeadas para comparação (sobrescrevem POLITICA_PADRAO)
+POLITICAS: Dict[str, Dict] = {
+    "padrao":         {},
+    "sem_economia":   {"economia_ativa": False},
+    "cooldown_curto": {"cooldown_segundos": 30},
+    "streak_5":       {"ruim_streak_limiar": 5},
+    "intervalo_30":   {"intervalo_base": 30},
+    "verificar_sempre": {"verificacao_intervalo_max": 0},
+}
+
+# roteiro típico de um dia de trabalho: (duração em minutos, estado)
+ROTEIRO_DIA: List[Tuple[float, str]] = [
+    (90, "presente"), (15, "ausente"), (60, "presente"), (10, "borrado"),
+    (50, "presente"), (60, "ausente"), (20, "escuro"), (90, "presente"),
+    (5, "outra_pessoa"), (60, "presente"), (20, "ausente"),
+]
+
+
+class RelogioSimulado:
+    """Relógio que só avança quando alguém dorme ou 'gasta' latência."""
+
+    def __init__(self, inicio: Optional[datetime] = None):
+        self.inicio = inicio or datetime(2025, 1, 6, 8, 0, 0)
+        self.t = 0.0
+
+    def avancar(self, segundos: float) -> None:
+        self.t += max(0.0, segundos)
+
+    def time(self) -> float:
+        return self.inicio.timestamp() + self.t
+
+    def monotonic(self) -> float:
+        return self.t
+
+    def agora(self) -> datetime:
+        return self.inicio + timedelta(seconds=self.t)
+
+    def sleep(self, segundos: float) -> None:
+        self.avancar(segundos)
+
+
+class RoteiroQuadros:
+    """Estado da cena em função do tempo simulado (repete o roteiro ao fim)."""
+
+    def __init__(self, roteiro: List[Tuple[float, str]]):
+        for _, estado in roteiro:
+            if estado not in ESTADOS:
+                raise ValueError(f"estado desconhecido: {estado}")
+        self.trechos = [(m * 60.0, e) for m, e in roteiro]
+        self.total = sum(d for d, _ in self.trechos)
+
+    def estado_em(self, t: float) -> Tuple[str, float]:
+        """Retorna (estado, segundos desde o início do trecho)."""
+        t = t % self.total if self.total else 0.0
+        acc = 0.0
+        for dur, estado in self.trechos:
+            if t < acc + dur:
+                return estado, t - acc
+            acc += dur
+        return self.trechos[-1][1], 0.0
+
+
+class ServicosSimulados(Servicos):
+    """Stubs dos serviços: avançam o relógio e contam o custo de cada chamada."""
+
+    # embeddings simbólicos por pessoa; comparar() só compara rótulos
+    _EMB = {"presente": "emb_usuario", "outra_pessoa": "emb_visitante"}
+
+    def __init__(self, relogio: RelogioSimulado, roteiro: RoteiroQuadros,
+                 latencias: Optional[Dict[str, float]] = None,
+                 idle_timeout: float = 60.0, cpu: float = 20.0):
+        self.relogio = relogio
+        self.roteiro = roteiro
+        self.lat = dict(LATENCIAS_PADRAO, **(latencias or {}))
+        self.idle_timeout = idle_timeout
+        self.cpu_fixa = cpu
+        self.contagem = Counter()
+        self.banco_pessoas: Dict[str, str] = {}
+
+    def _gastar(self, etapa: str) -> None:
+        self.relogio.avancar(self.lat.get(etapa, 0.0) / 1000.0)
+
+    def _estado(self) -> str:
+        return self.roteiro.estado_em(self.relogio.monotonic())[0]
+
+    def capturar(self, pessoa_id, crono):
+        self.contagem["camera_open"] += 1
+        for etapa in ("camera_open", "warmup", "grab", "encode"):
+            with crono.etapa(etapa):
+                self._gastar(etapa)
+        return f"sim://{self._estado()}"
+
+    def qualidade(self, img_path):
+        self._gastar("quality")
+        estado = img_path.split("://", 1)[1]
+        if estado == "escuro":
+            return 12.0, 80.0
+        if estado == "borrado":
+            return 110.0, 8.0
+        return 120.0, 150.0
+
+    def detectar(self, img_path, detector):
+        self.contagem["detect"] += 1
+        self._gastar("detect")
+        return img_path.split("://", 1)[1] in self._EMB
+
+    def assinatura(self, img_path):
+        self._gastar("assinatura")
+        # cena estável por estado; trocar de estado muda o quadro inteiro
+        return np.full((LADO_ASSINATURA, LADO_ASSINATURA), 40 * ESTADOS.index(img_path.split("://", 1)[1]), np.uint8)
+
+    def embedding(self, img_path):
+        self.contagem["embed"] += 1
+        self._gastar("embed")
+        return self._EMB.get(img_path.split("://", 1)[1])
+
+    def comparar(self, emb_ref, emb_now, limiar):
+        self._gastar("identity_match")
+        return (emb_ref == emb_now, 0.1 if emb_ref == emb_now else 0.6)
+
+    def emocao(self, img_path):
+        self.contagem["emotion"] += 1
+        self._gastar("emotion")
+        return {"neutral": 70.0, "happy": 20.0, "sad": 10.0}
+
+    def identificar(self, img_path, limiar, crono):
+        emb = crono.medir("embed", self.embedding, img_path) if img_path else None
+        with crono.etapa("identity_match"):
+            self.contagem["db_read"] += 1
+            self._gastar("db_read")
+            for pid, e in self.banco_pessoas.items():
+                if e == emb:
+                    return pid, emb, 0.1, "db_match"
+        pid = f"pessoa-{len(self.banco_pessoas) + 1}"
+        if emb is not None:
+            self.salvar_embedding(pid, emb)
+        return pid, emb, None, "new_id"
+
+    def carregar_embedding(self, pessoa_id):
+        self.contagem["db_read"] += 1
+        self._gastar("db_read")
+        return self.banco_pessoas.get(pessoa_id)
+
+    def salvar_embedding(self, pessoa_id, emb):
+        self.contagem["db_write"] += 1
+        self._gastar("db_write")
+        self.banco_pessoas[pessoa_id] = emb
+
+    def templates(self, pessoa_id):
+        return None
+
+    def admitir_template(self, pessoa_id, emb, qualidade, limiar):
+        # um template por pessoa na simulação: só o cadastro grava
+        if pessoa_id in self.banco_pessoas:
+            return None
+        self.salvar_embedding(pessoa_id, emb)
+        return emb
+
+    def guardar_identidade_local(self, pessoa_id, origem, dist):
+        pass
+
+    def salvar_leitura(self, leitura):
+        self.contagem["db_write"] += 1
+        self.contagem["leituras"] += 1
+        if leitura.com_emocao:
+            self.contagem["leituras_com_emocao"] += 1
+        self._gastar("db_write")
+
+    def remover_imagem(self, img_path):
+        pass
+
+    def usando_computador(self):
+        estado, desde = self.roteiro.estado_em(self.relogio.monotonic())
+        return estado != "ausente" or desde <= self.idle_timeout
+
+    def recursos(self):
+        return {"cpu": self.cpu_fixa, "mem": 40.0, "disk": 50.0}
+
+    def cpu(self, janela_s):
+        return self.cpu_fixa
+
+
+def simular(politica: Optional[Dict] = None,
+            horas: float = 8.0,
+            roteiro: Optional[List[Tuple[float, str]]] = None,
+            latencias: Optional[Dict[str, float]] = None,
+            cpu: float = 20.0) -> Dict:
+    """Roda uma sessão simulada e retorna o resumo de custos."""
+    relogio = RelogioSimulado()
+    servicos = ServicosSimulados(relogio, RoteiroQuadros(roteiro or ROTEIRO_DIA), latencias, cpu=cpu)
+    energia = GerenciadorEnergia(ler_bateria=lambda: (None, None),
+                                 ler_temperatura=lambda: None,
+                                 relogio=relogio.monotonic)
+    agregador = AgregadorLatencia(intervalo_log=float("inf"), relogio=relogio.monotonic)
+    loop = LoopEmocional(servicos=servicos, politica=politica, relogio=relogio,
+                         energia=energia, agregador=agregador, gravar_latencias=False)
+
+    t0 = time.perf_counter()
+    loop.bootstrap()
+    ciclos = loop.executar(ate=relogio.time() + horas * 3600.0)
+    c = servicos.contagem
+    return {
+        "horas_simuladas": round(relogio.monotonic() / 3600.0, 2),
+        "ciclos": ciclos,
+        "camera_open": c["camera_open"],
+        "inferencias": c["detect"] + c["embed"] + c["emotion"],
+        "detect": c["detect"], "embed": c["embed"], "emotion": c["emotion"],
+        "db_write": c["db_write"], "db_read": c["db_read"],
+        "leituras_com_emocao": c["leituras_com_emocao"],
+        "cobertura_pct": round(100.0 * c["leituras_com_emocao"] / max(1, c["leituras"]), 1),
+        "segundos_reais": round(time.perf_counter() - t0, 3),
+        "latencias": agregador.resumo(),
+    }
+
+
+def silenciar_logs() -> None:
+    """
+    Tira os sinks de config/log.py (log.txt e logs_sistema): a simulação não
+    escreve arquivo nem grava logs simulados no banco; só WARNING+ no stderr.
+    """
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+def main():
+    silenciar_logs()
+    parser = argparse.ArgumentParser(description="Simulação acelerada do loop de captura")
+    parser.add_argument("--horas", type=float, default=8.0)
+    parser.add_argument("--politica", action="append", choices=sorted(POLITICAS),
+                        help="política a comparar (pode repetir); padrão: todas")
+    parser.add_argument("--cpu", type=float, default=20.0, help="CPU simulada (%%)")
+    args = parser.parse_args()
+
+    nomes = args.politica or list(POLITICAS)
+    colunas = ["ciclos", "camera_open", "inferencias", "embed", "db_write", "leituras_com_emocao", "cobertura_pct", "segundos_reais"]
+    print(f"{'politica':<16}" + "".join(f"{c:>20}" for c in colunas))
+    for nome in nomes:
+        res = simular(dict(POLITICA_PADRAO, **POLITICAS[nome]), horas=args.horas, cpu=args.cpu)
+        print(f"{nome:<16}" + "".join(f"{res[c]:>20}" for c in colunas))
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,3 @@ CREATE TABLE IF NOT EXISTS trials (
 
 CREATE INDEX IF NOT EXISTS idx_trials_ativo ON trials (ativo);
 CREATE UNIQUE INDEX IF NOT EXISTS ux_trials_email ON trials (email);
-
--- Exemplo: já deixar um registro seu
-INSERT INTO trials (email, machine_ip, ativo, expires_at)
-VALUES ('arthur@exemplo.com', '127.0.0.1', 'S', NOW() + INTERVAL '7 days')
-ON CONFLICT (email) DO NOTHING;
@@ -4,6 +4,11 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 from datetime import datetime
 
+try:
+    from trial.trial_sessao import dataframe_sessao
+except ImportError:   # rodando como script de dentro de trial/
+    from trial_sessao import dataframe_sessao
+
 EMOCOES = ["feliz","triste","medo","raiva","desgosto","surpresa","neutro"]
 
 def load_csv(path):
@@ -96,15 +101,21 @@ def graf_recursos_series(pdf, df):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--csv", required=True, help="Caminho do CSV gerado pelo trial")
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument("--csv", help="Caminho do CSV gerado pelo trial")
+    origem.add_argument("--sessao", help="Diretório da sessão (colunas .npy); lido sem cópia")
     parser.add_argument("--out", required=False, help="Caminho do PDF de saída")
     parser.add_argument("--titulo", default="Relatório Trial")
     args = parser.parse_args()
 
-    df = load_csv(args.csv)
+    if args.sessao:
+        df = dataframe_sessao(args.sessao)
+        out = args.out or os.path.join(args.sessao, "relatorio.pdf")
+    else:
+        df = load_csv(args.csv)
+        out = args.out or os.path.splitext(args.csv)[0] + "_relatorio.pdf"
     info = resumo_metricas(df)
 
-    out = args.out or os.path.splitext(args.csv)[0] + "_relatorio.pdf"
     with PdfPages(out) as pdf:
         pagina_capa(pdf, args.titulo, info)
         graf_emocoes_barras(pdf, df)
@@ -1,7 +1,10 @@
 # app/config/trial_csv.py
-import os, csv, platform
+import os, csv, math, platform
 from datetime import datetime
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
 
 def _desktop_path() -> str:
     home = os.path.expanduser("~")
@@ -27,37 +30,36 @@ _HEADERS = [
     "cpu","memoria","disco"
 ]
 
-def ensure_csv_with_header(csv_path: str):
-    if not os.path.exists(csv_path):
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(_HEADERS)
+def _texto(v) -> str:
+    if isinstance(v, bytes):
+        return v.decode(errors="replace")
+    if isinstance(v, float) and math.isnan(v):
+        return ""
+    return v
 
-def append_trial_row(csv_path: str,
-                     data_hora: datetime,
-                     emocoes: Optional[Dict[str, float]],
-                     dominante: str,
-                     meta: Dict,
-                     recursos: Dict[str, float]):
-    row = [
-        data_hora.isoformat(timespec="seconds"),
-        dominante,
-        (emocoes or {}).get("feliz",0),
-        (emocoes or {}).get("triste",0),
-        (emocoes or {}).get("medo",0),
-        (emocoes or {}).get("raiva",0),
-        (emocoes or {}).get("desgosto",0),
-        (emocoes or {}).get("surpresa",0),
-        (emocoes or {}).get("neutro",0),
-        meta.get("brilho"),
-        meta.get("qualidade"),
-        meta.get("face_status"),
-        meta.get("camera_status"),
-        meta.get("mesma_pessoa"),
-        meta.get("face_distance"),
-        recursos.get("cpu",0),
-        recursos.get("mem",0),
-        recursos.get("disk",0),
-    ]
-    with open(csv_path, "a", newline="") as f:
-        csv.writer(f).writerow(row)
+def exportar_csv(colunas: Dict[str, "np.ndarray"], csv_path: str,
+                 cabecalho: Sequence[str] = _HEADERS, formato_data: Optional[str] = None) -> int:
+    """
+    Acrescenta as linhas da sessão ao CSV de uma vez (colunas de
+    trial_sessao.carregar_sessao); o cabeçalho só entra se o arquivo é novo.
+    formato_data: strftime de data_hora; padrão ISO com segundos. Retorna as linhas.
+    """
+    n = len(colunas["data_hora"])
+    datas = colunas["data_hora"].astype("datetime64[s]").tolist()
+    valores = []
+    for nome in cabecalho:
+        if nome == "data_hora":
+            valores.append([d.strftime(formato_data) if formato_data else d.isoformat(timespec="seconds")
+                            for d in datas])
+        elif nome == "mesma_pessoa":
+            valores.append(["" if v < 0 else bool(v) for v in colunas[nome].tolist()])
+        else:
+            valores.append([_texto(v) for v in colunas[nome].tolist()])
+    # acrescenta: sessões anteriores do mesmo email ficam no arquivo (cabeçalho só na primeira)
+    novo = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+    with open(csv_path, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if novo:
+            w.writerow(cabecalho)
+        w.writerows(zip(*valores))
+    return n
@@ -1,10 +1,9 @@
 # app/config/database.py
 import json
-import psycopg2
 from psycopg2.extras import Json
 from typing import Any, Dict, Optional
 
-from config.config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+from config.conexao import conexao
 from config.log import logger
 
 # ---- conjunto permitido (alinhado ao CHECK do banco) ----
@@ -12,46 +11,30 @@ PERMITIDAS = {
     "feliz", "triste", "medo", "raiva", "desgosto", "surpresa", "neutro", "usuario_ausente"
 }
 
-# ---------- Conexão ----------
-def _conn():
-    return psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT,
-    )
-
 # ---------- Tabelas (opcional: chame no startup) ----------
 def ensure_tables():
     """Cria/ajusta tabelas necessárias (idempotente)."""
     try:
-        conn = _conn()
-        cur = conn.cursor()
-
-        # Tabela de pessoas (embedding em JSONB)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS pessoas (
-              pessoa_id   VARCHAR(64) PRIMARY KEY,
-              embedding   JSONB NOT NULL,
-              created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # Colunas extras na leituras_emocionais (se ainda não existirem)
-        cur.execute("""
-            ALTER TABLE leituras_emocionais
-              ADD COLUMN IF NOT EXISTS camera_status VARCHAR(30) DEFAULT 'ok',
-              ADD COLUMN IF NOT EXISTS face_status   VARCHAR(30) DEFAULT 'ok',
-              ADD COLUMN IF NOT EXISTS mesma_pessoa  BOOLEAN,
-              ADD COLUMN IF NOT EXISTS qualidade     REAL,
-              ADD COLUMN IF NOT EXISTS brilho        REAL,
-              ADD COLUMN IF NOT EXISTS face_distance REAL;
-        """)
+        with conexao() as conn, conn.cursor() as cur:
+            # Tabela de pessoas (embedding em JSONB)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS pessoas (
+                  pessoa_id   VARCHAR(64) PRIMARY KEY,
+                  embedding   JSONB NOT NULL,
+                  created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
 
-        conn.commit()
-        cur.close()
-        conn.close()
+            # Colunas extras na leituras_emocionais (se ainda não existirem)
+            cur.execute("""
+                ALTER TABLE leituras_emocionais
+                  ADD COLUMN IF NOT EXISTS camera_status VARCHAR(30) DEFAULT 'ok',
+                  ADD COLUMN IF NOT EXISTS face_status   VARCHAR(30) DEFAULT 'ok',
+                  ADD COLUMN IF NOT EXISTS mesma_pessoa  BOOLEAN,
+                  ADD COLUMN IF NOT EXISTS qualidade     REAL,
+                  ADD COLUMN IF NOT EXISTS brilho        REAL,
+                  ADD COLUMN IF NOT EXISTS face_distance REAL;
+            """)
         logger.info("Tabelas verificadas/criadas com sucesso.")
     except Exception as e:
         logger.exception(f"Erro ao garantir tabelas: {e}")
@@ -88,14 +71,13 @@ def salvar_embedding_db(pessoa_id: str, emb_array: Any) -> None:
     """
     try:
         emb_list = emb_array.tolist() if hasattr(emb_array, "tolist") else list(emb_array)
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO pessoas (pessoa_id, embedding)
-            VALUES (%s, %s)
-            ON CONFLICT (pessoa_id) DO UPDATE
-              SET embedding = EXCLUDED.embedding
-        """, (pessoa_id, Json(emb_list)))
-        conn.commit(); cur.close(); conn.close()
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO pessoas (pessoa_id, embedding)
+                VALUES (%s, %s)
+                ON CONFLICT (pessoa_id) DO UPDATE
+                  SET embedding = EXCLUDED.embedding
+            """, (pessoa_id, Json(emb_list)))
         logger.debug(f"Embedding salvo para pessoa_id={pessoa_id} (len={len(emb_list)})")
     except Exception as e:
         logger.exception(f"Erro ao salvar embedding no banco: {e}")
@@ -106,10 +88,9 @@ def carregar_embedding_db(pessoa_id: str):
     """
     try:
         import numpy as np
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("SELECT embedding FROM pessoas WHERE pessoa_id=%s", (pessoa_id,))
-        row = cur.fetchone()
-        cur.close(); conn.close()
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("SELECT embedding FROM pessoas WHERE pessoa_id=%s", (pessoa_id,))
+            row = cur.fetchone()
         if row and row[0] is not None:
             return np.array(row[0], dtype="float32")
         return None
@@ -142,30 +123,29 @@ def salvar_em_banco(
     dominante = _normalizar_dominante(emocoes)
 
     try:
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO leituras_emocionais (
-              pessoa_id, data_captura,
-              raiva, desgosto, medo, feliz, triste, surpresa, neutro, emocao_dominante,
-              cpu, memoria, disco,
-              camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance
-            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,
-                      %s,%s,%s,
-                      %s,%s,%s,%s,%s,%s)
-        """, (
-            pessoa_id, data_captura,
-            (emocoes or {}).get("raiva", 0),
-            (emocoes or {}).get("desgosto", 0),
-            (emocoes or {}).get("medo", 0),
-            (emocoes or {}).get("feliz", 0),
-            (emocoes or {}).get("triste", 0),
-            (emocoes or {}).get("surpresa", 0),
-            (emocoes or {}).get("neutro", 0),
-            dominante,
-            recursos.get("cpu", 0), recursos.get("mem", 0), recursos.get("disk", 0),
-            camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance
-        ))
-        conn.commit(); cur.close(); conn.close()
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO leituras_emocionais (
+                  pessoa_id, data_captura,
+                  raiva, desgosto, medo, feliz, triste, surpresa, neutro, emocao_dominante,
+                  cpu, memoria, disco,
+                  camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance
+                ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,
+                          %s,%s,%s,
+                          %s,%s,%s,%s,%s,%s)
+            """, (
+                pessoa_id, data_captura,
+                (emocoes or {}).get("raiva", 0),
+                (emocoes or {}).get("desgosto", 0),
+                (emocoes or {}).get("medo", 0),
+                (emocoes or {}).get("feliz", 0),
+                (emocoes or {}).get("triste", 0),
+                (emocoes or {}).get("surpresa", 0),
+                (emocoes or {}).get("neutro", 0),
+                dominante,
+                recursos.get("cpu", 0), recursos.get("mem", 0), recursos.get("disk", 0),
+                camera_status, face_status, mesma_pessoa, qualidade, brilho, face_distance
+            ))
         logger.info(f"Registro salvo — pessoa={pessoa_id} estado={dominante} cam={camera_status} face={face_status}")
     except Exception as e:
         logger.exception(f"❌ Erro ao salvar no banco: {e}")
@@ -176,10 +156,9 @@ def listar_pessoas_embeddings():
     """
     import numpy as np
     try:
-        conn = _conn(); cur = conn.cursor()
-        cur.execute("SELECT pessoa_id, embedding FROM pessoas")
-        rows = cur.fetchall()
-        cur.close(); conn.close()
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("SELECT pessoa_id, embedding FROM pessoas")
+            rows = cur.fetchall()
         out = []
         for pid, emb in rows:
             if emb is not None:
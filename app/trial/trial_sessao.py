@@ -0,0 +1,157 @@
+# app/trial/trial_sessao.py
+"""
+Sessão do trial em colunas: um .npy memory-mapped por coluna (layout
+fixo, escrito in-place), em vez de reabrir o CSV a cada leitura.
+
+    sessao = SessaoTrial(diretorio)
+    sessao.adicionar(agora, emocoes, recursos, meta, dominante)   # só escreve na memória mapeada
+    ...
+    sessao.fechar()
+    exportar_csv(carregar_sessao(diretorio), csv_path)           # CSV uma vez, no fim
+
+- sincronizar() (a cada FSYNC_S, no adicionar) faz flush das páginas e grava
+  meta.json com o número de linhas; se o processo cair, carregar_sessao()
+  ainda recupera as linhas até o último flush (e as seguintes que o SO já
+  tiver escrito: data_hora != 0).
+- carregar_sessao() devolve as colunas com np.load(mmap_mode="r"): nada é
+  parseado nem copiado; o relatório monta o DataFrame com copy=False.
+- Capacidade dobra quando enche (recria os arquivos; raro: 30 min a 10 s
+  são 180 linhas).
+"""
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+EMOCOES = ("feliz", "triste", "medo", "raiva", "desgosto", "surpresa", "neutro")
+RECURSOS = (("cpu", "cpu"), ("memoria", "mem"), ("disco", "disk"))   # coluna, chave em recursos
+META_REAIS = ("brilho", "qualidade", "face_distance")
+META_TEXTO = ("face_status", "camera_status")
+
+# coluna -> dtype (larguras fixas; texto em bytes, NaN = ausente, -1 = bool ausente)
+COLUNAS: Dict[str, str] = {
+    "data_hora": "M8[s]",
+    "emocao_dominante": "S20",
+    **{e: "f8" for e in EMOCOES},
+    **{m: "f8" for m in META_REAIS},
+    **{m: "S32" for m in META_TEXTO},
+    "mesma_pessoa": "i1",
+    **{c: "f8" for c, _ in RECURSOS},
+}
+CAPACIDADE_INICIAL = 1024
+FSYNC_S = 30.0
+_META = "meta.json"
+
+
+def _vazio(dtype: str):
+    if dtype.startswith("f"):
+        return np.nan
+    if dtype == "i1":
+        return -1
+    return 0 if dtype.startswith("M") else b""
+
+
+class SessaoTrial:
+    def __init__(self, diretorio: str, capacidade: int = CAPACIDADE_INICIAL,
+                 fsync_s: float = FSYNC_S, relogio=time.monotonic):
+        self.diretorio = diretorio
+        self._fsync_s = fsync_s
+        self._relogio = relogio
+        self._ultimo_fsync = relogio()
+        os.makedirs(diretorio, exist_ok=True)
+        self.n = 0
+        self._cols = self._abrir(capacidade)
+
+    def _caminho(self, coluna: str) -> str:
+        return os.path.join(self.diretorio, f"{coluna}.npy")
+
+    def _abrir(self, capacidade: int, anteriores: Optional[dict] = None) -> Dict[str, np.memmap]:
+        """
+        Cria as colunas com `capacidade` linhas (copiando as de `anteriores`,
+        que é esvaziado). Nenhum arquivo é renomeado enquanto está mapeado —
+        no Windows o os.replace falharia (WinError 32): o mapa antigo e o do
+        .tmp são soltos antes da troca, e o arquivo final é reaberto.
+        """
+        for nome, dtype in COLUNAS.items():
+            tmp = self._caminho(nome) + ".tmp"
+            novo = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=(capacidade,))
+            novo[:] = _vazio(dtype)
+            if anteriores is not None:
+                antigo = anteriores.pop(nome)
+                novo[:self.n] = antigo[:self.n]
+                del antigo   # última referência: fecha o mapa do arquivo atual
+            novo.flush()
+            del novo
+            os.replace(tmp, self._caminho(nome))
+        self.capacidade = capacidade
+        return {nome: np.load(self._caminho(nome), mmap_mode="r+") for nome in COLUNAS}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def adicionar(self, data_hora: datetime, emocoes: Optional[Dict[str, float]],
+                  recursos: Dict[str, float], meta: Optional[Dict] = None,
+                  dominante: Optional[str] = None) -> None:
+        if self.n == self.capacidade:
+            self.sincronizar()
+            anteriores, self._cols = self._cols, {}
+            self._cols = self._abrir(self.capacidade * 2, anteriores)
+        i, c = self.n, self._cols
+        emocoes, meta = emocoes or {}, meta or {}
+        if dominante is None and emocoes:
+            dominante = max(emocoes, key=emocoes.get)
+        c["emocao_dominante"][i] = (dominante or "").encode()[:20]
+        for e in EMOCOES:
+            c[e][i] = emocoes.get(e, 0)
+        for m in META_REAIS:
+            v = meta.get(m)
+            c[m][i] = np.nan if v is None else v
+        for m in META_TEXTO:
+            c[m][i] = (meta.get(m) or "").encode()[:32]
+        mp = meta.get("mesma_pessoa")
+        c["mesma_pessoa"][i] = -1 if mp is None else int(bool(mp))
+        for col, chave in RECURSOS:
+            c[col][i] = recursos.get(chave, 0)
+        # data_hora por último: linha com data_hora != 0 está completa
+        c["data_hora"][i] = np.datetime64(data_hora.replace(microsecond=0), "s")
+        self.n += 1
+        if self._relogio() - self._ultimo_fsync >= self._fsync_s:
+            self.sincronizar()
+
+    def sincronizar(self) -> None:
+        for mm in self._cols.values():
+            mm.flush()
+        tmp = os.path.join(self.diretorio, _META + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"linhas": self.n, "capacidade": self.capacidade, "colunas": COLUNAS}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.diretorio, _META))
+        self._ultimo_fsync = self._relogio()
+
+    def fechar(self) -> None:
+        self.sincronizar()
+        self._cols = {}
+
+
+def carregar_sessao(diretorio: str) -> Dict[str, np.ndarray]:
+    """Colunas da sessão (memory-mapped, só leitura), cortadas nas linhas gravadas."""
+    cols = {nome: np.load(os.path.join(diretorio, f"{nome}.npy"), mmap_mode="r") for nome in COLUNAS}
+    vazias = np.flatnonzero(cols["data_hora"].view("i8") == 0)
+    n = int(vazias[0]) if len(vazias) else len(cols["data_hora"])
+    return {nome: arr[:n] for nome, arr in cols.items()}
+
+def dataframe_sessao(diretorio: str):
+    """
+    DataFrame sobre as colunas memory-mapped (copy=False: sem cópia nem parse).
+    Só as colunas de texto (bytes de largura fixa) são decodificadas para str.
+    """
+    import pandas as pd
+    cols = dict(carregar_sessao(diretorio))
+    for nome, dtype in COLUNAS.items():
+        if dtype.startswith("S"):
+            cols[nome] = np.char.decode(cols[nome], "utf-8", errors="replace")
+    return pd.DataFrame(cols, copy=False)